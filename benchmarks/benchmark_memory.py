@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+#
+# Report memory use of loaded projects, per object class and in total.
+#
+#     python -m benchmarks.benchmark_memory path/to/Foo.xcodeproj [...]
+#
+# The per-object figure counts the item instance and its attribute
+# dictionary if it has one, but not the shared parsed data.
+#
+
+import gc
+import sys
+import resource
+import argparse
+import collections
+
+import xcodeproject
+
+
+def max_rss_kilobytes():
+    # kilobytes on Linux, bytes on OS X
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 if sys.platform == 'darwin' else max_rss
+
+
+def instance_size(item):
+    size = sys.getsizeof(item)
+    instance_dict = getattr(item, '__dict__', None)
+    if instance_dict is not None:
+        size += sys.getsizeof(instance_dict)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report memory use of loaded Xcode projects')
+    parser.add_argument('paths', nargs='+', help='Paths to .xcodeproj bundles')
+    args = parser.parse_args()
+
+    gc.collect()
+    rss_before = max_rss_kilobytes()
+    projects = [xcodeproject.XcodeProject(path) for path in args.paths]
+    gc.collect()
+    rss_after = max_rss_kilobytes()
+
+    sizes = collections.defaultdict(list)
+    for project in projects:
+        for item in project.objects.values():
+            sizes[type(item).__name__].append(instance_size(item))
+
+    object_count = sum(len(project.objects) for project in projects)
+    print '{} projects, {} objects, peak RSS grew by {:.1f} MB ({:.0f} bytes per object)'.format(len(projects), object_count, (rss_after - rss_before) / 1024.0, (rss_after - rss_before) * 1024.0 / max(object_count, 1))
+    for class_name, class_sizes in sorted(sizes.items(), key=lambda i: -len(i[1])):
+        print '    {:<32} {:>8} objects {:>6.0f} bytes per instance'.format(class_name, len(class_sizes), sum(class_sizes) / float(len(class_sizes)))
+
+
+if __name__ == '__main__':
+    main()
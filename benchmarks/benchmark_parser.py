@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+# Compare the native pbxproj parser with the previous plutil-based
+# loading path on one or more real project files.
+#
+#     python -m benchmarks.benchmark_parser path/to/Foo.xcodeproj [...]
+#
+# The plutil timings are skipped on systems without plutil.
+#
+
+import os
+import time
+import plistlib
+import argparse
+import subprocess
+import distutils.spawn
+
+from xcodeproject import pbxproj
+
+
+def time_call(function, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        result = function()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_native(path):
+    return pbxproj.parse_pbxproj_file(path)[0]
+
+
+def parse_plutil(path):
+    xml_data = subprocess.check_output(['plutil', '-convert', 'xml1', '-o', '-', path])
+    return plistlib.readPlistFromString(xml_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the native pbxproj parser against plutil')
+    parser.add_argument('paths', nargs='+', help='Paths to .xcodeproj bundles')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='Number of runs per project, the best one is reported')
+    args = parser.parse_args()
+
+    have_plutil = distutils.spawn.find_executable('plutil') is not None
+    for path in args.paths:
+        project_file_path = os.path.join(os.path.abspath(os.path.expanduser(path)), 'project.pbxproj')
+        native_time, data = time_call(lambda: parse_native(project_file_path), args.repeat)
+        print '{}: {} objects'.format(path, len(data['objects']))
+        print '    native: {:.3f}s'.format(native_time)
+        if have_plutil:
+            plutil_time, plutil_data = time_call(lambda: parse_plutil(project_file_path), args.repeat)
+            print '    plutil: {:.3f}s ({:.1f}x, output {})'.format(plutil_time, plutil_time / native_time, 'identical' if plutil_data == data else 'DIFFERENT')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+#
+# Time parsing, loading, line number mapping, reference and path resolution
+# and every built-in subcommand on generated or given projects, record peak
+# memory, and write the results as JSON.
+#
+#     python -m benchmarks.benchmark_suite -o results.json
+#     python -m benchmarks.benchmark_suite --sizes 1000,500000 -o results.json
+#     python -m benchmarks.benchmark_suite --compare baseline.json path/to/Foo.xcodeproj
+#
+# Each measurement runs in a fresh process so that its peak memory is not
+# hidden by an earlier one. The best time of --repeat runs is reported.
+#
+
+import os
+import sys
+import time
+import json
+import shutil
+import platform
+import resource
+import tempfile
+import argparse
+import subprocess
+import multiprocessing
+
+import xcodeproject
+from xcodeproject import pbxproj
+from xcodeproject import tool
+
+from . import generate_project
+
+
+# subcommands that do not fit a one-shot benchmark of a single project
+SKIPPED_SUBCOMMANDS = ('watch', 'cache', 'serve', 'print-workspace-dependencies')
+
+# extra arguments for subcommands that need them, the project path is appended
+SUBCOMMAND_ARGUMENTS = {
+    'change-project-level-whitespace-setting': ['--dry-run', '{path}', '1'],
+    'set-build-settings': ['--dry-run', '--set', 'BENCHMARK_SETTING=1', '{path}'],
+    'query': ['{path}', 'PBXNativeTarget.buildPhases[isa=PBXShellScriptBuildPhase].shellScript'],
+}
+
+
+def max_rss_kilobytes():
+    # kilobytes on Linux, bytes on OS X
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 if sys.platform == 'darwin' else max_rss
+
+
+def read_file(path):
+    with open(os.path.join(path, 'project.pbxproj'), 'rb') as f:
+        return f.read()
+
+
+def resolve_all_references(project):
+    for item in project.objects.values():
+        for property_name, converter_class in item.converter_map.items():
+            if converter_class is not xcodeproject.IdentityPropertyConverter:
+                getattr(item, property_name, None)
+
+
+def load_many(path, intern_pool=None, count=4, parse_cache=None):
+    return [xcodeproject.XcodeProject(path, lazy=True, cache=parse_cache, intern_pool=intern_pool) for i in range(count)]
+
+
+def primed_parse_cache(path):
+    parse_cache = xcodeproject.ParseCache(tempfile.mkdtemp())
+    pbxproj.PBXProjFile(os.path.join(path, 'project.pbxproj'), cache=parse_cache).close()
+    return parse_cache
+
+
+def load_many_from_cache(path, parse_cache, intern_pool=None):
+    # each copy unpickles its own strings, which only an intern pool shares again
+    try:
+        return load_many(path, intern_pool, parse_cache=parse_cache)
+    finally:
+        shutil.rmtree(parse_cache.directory)
+
+
+def compute_reference_graph(project):
+    project.reference_graph = None
+    project.reference_graph_edges()
+
+
+def run_subcommand(arguments):
+    saved_argv, saved_stdout = sys.argv, sys.stdout
+    sys.argv = ['xcodeproject-util', '--no-server'] + arguments
+    sys.stdout = tool.OutputBuffer()
+    try:
+        tool.XcodeprojectTool.main()
+    except SystemExit:
+        pass
+    finally:
+        sys.argv, sys.stdout = saved_argv, saved_stdout
+
+
+def measurements(path):
+    """Return a list of ``(name, setup, function)`` tuples. ``function`` is timed and called with the result of ``setup``."""
+    measurements = [
+        ('parse', lambda: read_file(path), lambda data: pbxproj.PBXProjParser(data, path=path).parse()),
+        ('load', lambda: None, lambda unused: xcodeproject.XcodeProject(path)),
+        ('load_lazy', lambda: None, lambda unused: xcodeproject.XcodeProject(path, lazy=True)),
+        ('load_lazy_4_copies', lambda: None, lambda unused: load_many(path)),
+        ('load_lazy_4_copies_intern_pool', lambda: xcodeproject.InternPool(), lambda intern_pool: load_many(path, intern_pool)),
+        ('load_lazy_4_copies_from_cache', lambda: primed_parse_cache(path), lambda parse_cache: load_many_from_cache(path, parse_cache)),
+        ('load_lazy_4_copies_from_cache_intern_pool', lambda: primed_parse_cache(path), lambda parse_cache: load_many_from_cache(path, parse_cache, xcodeproject.InternPool())),
+        ('line_numbers', lambda: xcodeproject.XcodeProject(path, lazy=True), lambda project: project.object_id_line_number_map_for_path(os.path.join(path, 'project.pbxproj'))),
+        ('resolve_references', lambda: xcodeproject.XcodeProject(path), resolve_all_references),
+        ('reference_graph', lambda: xcodeproject.XcodeProject(path, lazy=True), compute_reference_graph),
+        ('resolved_paths', lambda: xcodeproject.XcodeProject(path, lazy=True), lambda project: project.resolved_path_map()),
+    ]
+    for subcommand_name in sorted(tool.XcodeprojectTool().subcommand_map()):
+        if subcommand_name in SKIPPED_SUBCOMMANDS:
+            continue
+        arguments = [subcommand_name] + [argument.format(path=path) for argument in SUBCOMMAND_ARGUMENTS.get(subcommand_name, ['{path}'])]
+        measurements.append(('subcommand:' + subcommand_name, lambda arguments=arguments: arguments, run_subcommand))
+    return measurements
+
+
+def run_measurement(path, name, repeat):
+    setup, function = [(setup, function) for n, setup, function in measurements(path) if n == name][0]
+    rss_before = max_rss_kilobytes()
+    best = None
+    for i in range(repeat):
+        argument = setup()
+        start = time.time()
+        function(argument)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del argument
+    peak_rss = max_rss_kilobytes()
+    return {'seconds': best, 'peak_rss_kb': peak_rss, 'rss_growth_kb': peak_rss - rss_before}
+
+
+def run_measurement_in_process(path, name, repeat):
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply(run_measurement, (path, name, repeat))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def benchmark_project(path, repeat):
+    project_file = pbxproj.PBXProjFile(os.path.join(path, 'project.pbxproj'))
+    result = {'path': path, 'objects': len(project_file.data['objects']), 'bytes': project_file.stat_result.st_size, 'measurements': {}}
+    project_file.close()
+    print '{}: {} objects'.format(path, result['objects'])
+    for name, setup, function in measurements(path):
+        measurement = run_measurement_in_process(path, name, repeat)
+        result['measurements'][name] = measurement
+        print '    {:<55} {:>8.3f}s {:>8.1f} MB peak RSS'.format(name, measurement['seconds'], measurement['peak_rss_kb'] / 1024.0)
+        sys.stdout.flush()
+    return result
+
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_results, threshold):
+    baseline_projects = dict((project['objects'], project) for project in baseline_results['projects'])
+    regression_count = 0
+    for project in results['projects']:
+        baseline_project = baseline_projects.get(project['objects'])
+        if not baseline_project:
+            continue
+        print 'Compared to {} ({} objects):'.format(baseline_results.get('revision') or 'baseline', project['objects'])
+        for name, measurement in sorted(project['measurements'].items()):
+            baseline_measurement = baseline_project['measurements'].get(name)
+            if not baseline_measurement:
+                continue
+            ratio = measurement['seconds'] / max(baseline_measurement['seconds'], 1e-6)
+            regression = ratio > threshold
+            regression_count += regression
+            print '    {:<55} {:>8.3f}s -> {:>8.3f}s {:>6.2f}x{}'.format(name, baseline_measurement['seconds'], measurement['seconds'], ratio, '  SLOWER' if regression else '')
+    return regression_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark project loading and the built-in subcommands')
+    parser.add_argument('paths', nargs='*', help='Paths to .xcodeproj bundles. If none are given, projects are generated')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated approximate object counts of the generated projects')
+    parser.add_argument('--targets', type=int, default=10, help='Number of targets in generated projects')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='Number of runs per measurement, the best one is reported')
+    parser.add_argument('-o', '--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', metavar='JSON_FILE', help='Compare the timings with earlier results for projects with the same number of objects')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio reported as a regression by --compare')
+    args = parser.parse_args()
+
+    temp_dir = None
+    paths = [os.path.abspath(path) for path in args.paths]
+    if not paths:
+        temp_dir = tempfile.mkdtemp()
+        for object_count in [int(size) for size in args.sizes.split(',')]:
+            path = os.path.join(temp_dir, 'Generated{}.xcodeproj'.format(object_count))
+            groups = max(1, object_count // 1000)
+            files = generate_project.ProjectGenerator.file_count_for_object_count(object_count, args.targets, groups, 2)
+            generate_project.generate_project(path, targets=args.targets, files=files, groups=groups)
+            paths.append(path)
+
+    try:
+        results = {
+            'revision': revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': args.repeat,
+            'projects': [benchmark_project(path, args.repeat) for path in paths],
+        }
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline_results = json.load(f)
+        if compare(results, baseline_results, args.threshold):
+            exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+#
+# Write a synthetic but valid Xcode project of a chosen size, laid out
+# the way Xcode writes project files, for benchmarks and load tests.
+#
+#     python -m benchmarks.generate_project /tmp/Big.xcodeproj --objects 500000
+#     python -m benchmarks.generate_project /tmp/Big.xcodeproj --targets 20 --files 10000 --groups 200
+#
+# Each source file gets a file reference in one of the groups and a build
+# file in the sources build phase of one of the targets. Each target also
+# has a product, a shell script build phase and its own build configurations.
+#
+
+import os
+import argparse
+import collections
+
+
+class ProjectGenerator(object):
+
+    def __init__(self, name='Generated', targets=1, files=100, groups=10, configurations=2):
+        self.name = name
+        self.target_count = max(targets, 1)
+        self.file_count = files
+        self.group_count = max(groups, 1)
+        self.configuration_names = ['Debug', 'Release'] + ['Configuration{}'.format(i) for i in range(3, configurations + 1)]
+        self.configuration_names = self.configuration_names[:max(configurations, 1)]
+        self.next_id = 0
+        # isa -> [(object_id, text)]
+        self.sections = collections.defaultdict(list)
+
+    @classmethod
+    def object_count(cls, targets, files, groups, configurations):
+        # project, main group, products group, project configuration list and configurations,
+        # the groups, per target the target, product, configuration list, two build phases
+        # and configurations, and per file a file reference and a build file
+        return 4 + configurations + groups + targets * (5 + configurations) + 2 * files
+
+    @classmethod
+    def file_count_for_object_count(cls, object_count, targets, groups, configurations):
+        return max(0, (object_count - cls.object_count(targets, 0, groups, configurations)) // 2)
+
+    def new_id(self):
+        self.next_id += 1
+        return '{:024X}'.format(self.next_id)
+
+    def add_object(self, isa, object_id, comment, entries, single_line=False):
+        header = '\t\t{}{} = {{'.format(object_id, ' /* {} */'.format(comment) if comment else '')
+        entries = [('isa', isa)] + entries
+        if single_line:
+            text = header + ''.join('{} = {}; '.format(key, value) for key, value in entries) + '};\n'
+        else:
+            text = header + '\n' + ''.join('\t\t\t{} = {};\n'.format(key, value) for key, value in entries) + '\t\t};\n'
+        self.sections[isa].append((object_id, text))
+
+    @classmethod
+    def reference(cls, object_id, comment):
+        return '{} /* {} */'.format(object_id, comment)
+
+    @classmethod
+    def list_value(cls, elements, indent='\t\t\t'):
+        return '(\n' + ''.join('{}\t{},\n'.format(indent, element) for element in elements) + indent + ')'
+
+    def add_configuration_list(self, owner_description, build_settings):
+        configuration_ids = []
+        for configuration_name in self.configuration_names:
+            configuration_id = self.new_id()
+            settings = dict(build_settings)
+            settings['GCC_OPTIMIZATION_LEVEL'] = '0' if configuration_name == 'Debug' else 's'
+            settings_text = '{\n' + ''.join('\t\t\t\t{} = {};\n'.format(key, settings[key]) for key in sorted(settings)) + '\t\t\t}'
+            self.add_object('XCBuildConfiguration', configuration_id, configuration_name, [('buildSettings', settings_text), ('name', configuration_name)])
+            configuration_ids.append(configuration_id)
+
+        configuration_list_id = self.new_id()
+        comment = 'Build configuration list for {}'.format(owner_description)
+        self.add_object('XCConfigurationList', configuration_list_id, comment, [
+            ('buildConfigurations', self.list_value([self.reference(i, n) for i, n in zip(configuration_ids, self.configuration_names)])),
+            ('defaultConfigurationIsVisible', '0'),
+            ('defaultConfigurationName', self.configuration_names[-1]),
+        ])
+        return self.reference(configuration_list_id, comment)
+
+    def generate(self):
+        project_id, main_group_id, products_group_id = self.new_id(), self.new_id(), self.new_id()
+        group_ids = [self.new_id() for i in range(self.group_count)]
+        group_children = collections.defaultdict(list)
+        target_names = ['Target{}'.format(i + 1) for i in range(self.target_count)]
+        target_build_files = collections.defaultdict(list)
+
+        for i in range(self.file_count):
+            file_name = 'File{}.m'.format(i + 1)
+            file_reference_id, build_file_id = self.new_id(), self.new_id()
+            self.add_object('PBXFileReference', file_reference_id, file_name, [('fileEncoding', '4'), ('lastKnownFileType', 'sourcecode.c.objc'), ('path', file_name), ('sourceTree', '"<group>"')], single_line=True)
+            self.add_object('PBXBuildFile', build_file_id, '{} in Sources'.format(file_name), [('fileRef', self.reference(file_reference_id, file_name))], single_line=True)
+            group_children[i % self.group_count].append(self.reference(file_reference_id, file_name))
+            target_build_files[i % self.target_count].append(self.reference(build_file_id, '{} in Sources'.format(file_name)))
+
+        for i, group_id in enumerate(group_ids):
+            group_name = 'Group{}'.format(i + 1)
+            self.add_object('PBXGroup', group_id, group_name, [('children', self.list_value(group_children[i])), ('path', group_name), ('sourceTree', '"<group>"')])
+
+        target_references, product_references = [], []
+        for i, target_name in enumerate(target_names):
+            target_id, product_id, sources_phase_id, script_phase_id = self.new_id(), self.new_id(), self.new_id(), self.new_id()
+            self.add_object('PBXFileReference', product_id, target_name, [('explicitFileType', '"compiled.mach-o.executable"'), ('includeInIndex', '0'), ('path', target_name), ('sourceTree', 'BUILT_PRODUCTS_DIR')], single_line=True)
+            self.add_object('PBXSourcesBuildPhase', sources_phase_id, 'Sources', [('buildActionMask', '2147483647'), ('files', self.list_value(target_build_files[i])), ('runOnlyForDeploymentPostprocessing', '0')])
+            self.add_object('PBXShellScriptBuildPhase', script_phase_id, 'ShellScript', [
+                ('buildActionMask', '2147483647'),
+                ('files', self.list_value([])),
+                ('inputPaths', self.list_value([])),
+                ('outputPaths', self.list_value([])),
+                ('runOnlyForDeploymentPostprocessing', '0'),
+                ('shellPath', '/bin/sh'),
+                ('shellScript', '"echo {}\\n"'.format(target_name)),
+            ])
+            configuration_list = self.add_configuration_list('PBXNativeTarget "{}"'.format(target_name), {'PRODUCT_NAME': '"$(TARGET_NAME)"'})
+            self.add_object('PBXNativeTarget', target_id, target_name, [
+                ('buildConfigurationList', configuration_list),
+                ('buildPhases', self.list_value([self.reference(sources_phase_id, 'Sources'), self.reference(script_phase_id, 'ShellScript')])),
+                ('buildRules', self.list_value([])),
+                ('dependencies', self.list_value([])),
+                ('name', target_name),
+                ('productName', target_name),
+                ('productReference', self.reference(product_id, target_name)),
+                ('productType', '"com.apple.product-type.tool"'),
+            ])
+            target_references.append(self.reference(target_id, target_name))
+            product_references.append(self.reference(product_id, target_name))
+
+        self.add_object('PBXGroup', main_group_id, None, [('children', self.list_value([self.reference(i, 'Group{}'.format(n + 1)) for n, i in enumerate(group_ids)] + [self.reference(products_group_id, 'Products')])), ('sourceTree', '"<group>"')])
+        self.add_object('PBXGroup', products_group_id, 'Products', [('children', self.list_value(product_references)), ('name', 'Products'), ('sourceTree', '"<group>"')])
+
+        configuration_list = self.add_configuration_list('PBXProject "{}"'.format(self.name), {'ONLY_ACTIVE_ARCH': 'YES', 'SDKROOT': 'macosx'})
+        self.add_object('PBXProject', project_id, 'Project object', [
+            ('attributes', '{\n\t\t\t\tLastUpgradeCheck = 0500;\n\t\t\t}'),
+            ('buildConfigurationList', configuration_list),
+            ('compatibilityVersion', '"Xcode 3.2"'),
+            ('developmentRegion', 'English'),
+            ('hasScannedForEncodings', '0'),
+            ('knownRegions', self.list_value(['en'])),
+            ('mainGroup', main_group_id),
+            ('productRefGroup', self.reference(products_group_id, 'Products')),
+            ('projectDirPath', '""'),
+            ('projectRoot', '""'),
+            ('targets', self.list_value(target_references)),
+        ])
+        self.root_object_id = project_id
+
+    def write(self, f):
+        f.write('// !$*UTF8*$!\n{\n\tarchiveVersion = 1;\n\tclasses = {\n\t};\n\tobjectVersion = 46;\n\tobjects = {\n')
+        for isa in sorted(self.sections):
+            f.write('\n/* Begin {} section */\n'.format(isa))
+            for object_id, text in sorted(self.sections[isa]):
+                f.write(text)
+            f.write('/* End {} section */\n'.format(isa))
+        f.write('\t}};\n\trootObject = {} /* Project object */;\n}}\n'.format(self.root_object_id))
+
+
+def generate_project(path, targets=1, files=100, groups=10, configurations=2):
+    """
+    Write a project with the given numbers of targets, source files, groups
+    and build configurations to the .xcodeproj bundle at the given path.
+    Returns the number of objects in it.
+
+    """
+    generator = ProjectGenerator(os.path.splitext(os.path.basename(path))[0], targets, files, groups, configurations)
+    generator.generate()
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    with open(os.path.join(path, 'project.pbxproj'), 'wb') as f:
+        generator.write(f)
+    return sum(len(objects) for objects in generator.sections.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic Xcode project of a chosen size')
+    parser.add_argument('path', help='Path of the .xcodeproj bundle to write')
+    parser.add_argument('--targets', type=int, default=1, help='Number of targets')
+    parser.add_argument('--files', type=int, default=100, help='Number of source files')
+    parser.add_argument('--groups', type=int, default=10, help='Number of groups the files are spread across')
+    parser.add_argument('--configurations', type=int, default=2, help='Number of build configurations')
+    parser.add_argument('--objects', type=int, help='Approximate total number of objects, overrides --files')
+    args = parser.parse_args()
+
+    files = args.files
+    if args.objects is not None:
+        files = ProjectGenerator.file_count_for_object_count(args.objects, args.targets, args.groups, args.configurations)
+    object_count = generate_project(args.path, args.targets, files, args.groups, args.configurations)
+    print '{}: {} objects'.format(args.path, object_count)
+
+
+if __name__ == '__main__':
+    main()
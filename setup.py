@@ -19,6 +19,10 @@ setup(
     url='https://github.com/liyanage/python-xcodeproject',
     license=license,
     packages=find_packages(exclude=('tests', 'docs')),
+    install_requires=[
+        # os.scandir() backport, avoids a stat() per directory entry when searching for projects
+        'scandir',
+    ],
     entry_points = {
         "console_scripts": [
             "xcodeproject-util=xcodeproject.tool:XcodeprojectTool.main",
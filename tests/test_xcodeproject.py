@@ -1,23 +1,56 @@
 #!usr/bin/env python
 
 from .context import xcodeproject
+from xcodeproject import tool
+from xcodeproject import server
 
 import unittest
 import os
 import sys
 import logging
 import inspect
+import json
+import shutil
+import pstats
+import tempfile
+import threading
+import time
 
 # logging.basicConfig(level=logging.DEBUG)
 
+def fixture_project_path():
+    test_dir_path = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+    return os.path.join(test_dir_path, 'PythonXcodeTest/PythonXcodeTest.xcodeproj')
+
+
+def copy_fixture_project(dest):
+    shutil.copytree(fixture_project_path(), dest)
+    return dest
+
+
+def run_tool(*args):
+    """Run the command line tool in this process and return its exit status, output and error output."""
+    saved_argv, saved_stdout, saved_stderr = sys.argv, sys.stdout, sys.stderr
+    sys.argv = ['xcodeproject-util'] + list(args)
+    sys.stdout, sys.stderr = tool.OutputBuffer(), tool.OutputBuffer()
+    status = 0
+    try:
+        tool.XcodeprojectTool.main()
+    except SystemExit as e:
+        status = e.code
+    finally:
+        output, error_output = sys.stdout.getvalue(), sys.stderr.getvalue()
+        sys.argv, sys.stdout, sys.stderr = saved_argv, saved_stdout, saved_stderr
+    return status, output, error_output
+
+
 class TestXcodeProject(unittest.TestCase):
 
     def setUp(self):
         self.project = xcodeproject.XcodeProject(os.path.expanduser(self.test_project_path()))
     
     def test_project_path(self):
-        test_dir_path = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
-        return os.path.join(test_dir_path, 'PythonXcodeTest/PythonXcodeTest.xcodeproj')
+        return fixture_project_path()
 
     def testProject(self):
         self.assertIsInstance(self.project, xcodeproject.XcodeProject)
@@ -76,7 +109,968 @@ class TestXcodeProject(unittest.TestCase):
         self.assertEquals(ref.path, 'main.m')
         self.assertEquals(ref.lastKnownFileType, 'sourcecode.c.objc')
         self.assertTrue(ref.id in self.project.file_reference_map())
-        
+
+    def test_lookup_indexes(self):
+        self.assertIsNone(self.project.target_for_name('NoSuchTarget'))
+        self.assertEquals([t.name for t in self.project.targets_for_product_name('PythonXcodeTest')], ['PythonXcodeTest'])
+        self.assertEquals([r.id for r in self.project.file_references_for_path('main.m')], ['1BC96D0C188311C700AFCEDA'])
+        self.assertEquals([r.path for r in self.project.file_references_for_name('Foundation.framework')], ['System/Library/Frameworks/Foundation.framework'])
+        self.assertEquals(len(self.project.file_references_for_file_type('sourcecode.c.objc')), 1)
+        configs = self.project.build_configurations_for_name('Debug')
+        self.assertEquals(len(configs), 2)
+        for config in configs:
+            self.assertIsInstance(config, xcodeproject.XCBuildConfiguration)
+
+    def test_line_numbers(self):
+        build_file = self.project.object_for_id('1BC96D0D188311C700AFCEDA')
+        self.assertEquals([build_file.line_number_start, build_file.line_number_end], [11, 11])
+        main_group = self.project.object_for_id(self.project.main_group_id())
+        self.assertEquals([main_group.line_number_start, main_group.line_number_end], [48, 56])
+
+    def test_raw_source(self):
+        build_file = self.project.object_for_id('1BC96D0D188311C700AFCEDA')
+        self.assertEquals(build_file.raw_source(), '1BC96D0D188311C700AFCEDA /* main.m in Sources */ = {isa = PBXBuildFile; fileRef = 1BC96D0C188311C700AFCEDA /* main.m */; };')
+        main_group = self.project.object_for_id(self.project.main_group_id())
+        source = main_group.raw_source_buffer()
+        self.assertEquals(str(source[:27]), '1BC96CFD188311C700AFCEDA = ')
+        self.assertEquals(str(source[-3:]), '\t};')
+        self.assertEquals(len(source), main_group.byte_offset_end - main_group.byte_offset_start)
+
+    def test_property_resolution(self):
+        self.assertIs(xcodeproject.PBXBuildFile.converter_map, xcodeproject.PBXBuildFile.converter_map)
+        self.assertEquals(set(xcodeproject.PBXBuildFile.converter_map), set(['files', 'fileRef']))
+        self.assertIsInstance(xcodeproject.PBXBuildFile.fileRef, xcodeproject.ReferenceProperty)
+
+        target = self.project.target_for_name('PythonXcodeTest')
+        self.assertFalse('buildConfigurationList' in target.__dict__)
+        config_list = target.buildConfigurationList
+        self.assertIs(target.__dict__['buildConfigurationList'], config_list)
+        self.assertIs(target.buildConfigurationList, config_list)
+        self.assertEquals(target.productName, 'PythonXcodeTest')
+        self.assertFalse('productName' in target.__dict__)
+
+    def test_slots(self):
+        build_file = self.project.object_for_id('1BC96D0D188311C700AFCEDA')
+        self.assertFalse(hasattr(build_file, '__dict__'))
+        self.assertFalse(hasattr(build_file, '_resolved_fileRef'))
+        ref = build_file.fileRef
+        self.assertIs(build_file._resolved_fileRef, ref)
+        self.assertIs(build_file.fileRef, ref)
+        self.assertEquals(build_file.name, '(no name)')
+        self.assertFalse(hasattr(ref, '__dict__'))
+        self.assertEquals(ref.path, 'main.m')
+
+    def test_resolved_paths(self):
+        source_root = os.path.dirname(fixture_project_path())
+        prefix_header = self.project.object_for_id('1BC96D0F188311C700AFCEDA')
+        self.assertEquals(prefix_header.resolved_path(), os.path.join(source_root, 'PythonXcodeTest/PythonXcodeTest-Prefix.pch'))
+        self.assertEquals(prefix_header.parent_group().name, 'Supporting Files')
+        self.assertEquals(prefix_header.parent_group().parent_group().resolved_path(), os.path.join(source_root, 'PythonXcodeTest'))
+        self.assertEquals(self.project.object_for_id(self.project.main_group_id()).parent_group(), None)
+        self.assertEquals(self.project.resolved_path_for_id('1BC96D06188311C700AFCEDA'), '$(BUILT_PRODUCTS_DIR)/PythonXcodeTest')
+        self.assertEquals(self.project.resolved_path_for_id('1BC96D09188311C700AFCEDA'), '$(SDKROOT)/System/Library/Frameworks/Foundation.framework')
+        self.assertEquals(len(self.project.resolved_path_map()), 10)
+        self.assertEquals(self.project.parent_group_id_map()['1BC96D0C188311C700AFCEDA'], '1BC96D0B188311C700AFCEDA')
+
+    def test_query(self):
+        query = xcodeproject.Query('PBXNativeTarget[name=PythonXcodeTest].buildPhases[isa=PBXShellScriptBuildPhase].shellScript')
+        self.assertEquals(query.evaluate(self.project), ['echo foo\n', "print 'foo'\n"])
+        self.assertEquals(self.project.property_indexes.keys(), [('PBXNativeTarget', 'name')])
+
+        def evaluate(text):
+            return xcodeproject.Query(text).evaluate(self.project)
+        self.assertEquals(evaluate('AbstractTarget.buildConfigurationList.buildConfigurations[name=Release].buildSettings.PRODUCT_NAME'), ['$(TARGET_NAME)'])
+        self.assertEquals(evaluate('PBXFileReference[path~=*.m].path'), ['main.m'])
+        self.assertEquals(evaluate('PBXGroup[name][name!="Supporting Files"].name'), ['Products', 'Frameworks'])
+        self.assertEquals(evaluate('*[id=1BC96D05188311C700AFCEDA].productName'), ['PythonXcodeTest'])
+        self.assertEquals([item.id for item in evaluate('PBXBuildFile.fileRef[lastKnownFileType=sourcecode.c.objc]')], ['1BC96D0C188311C700AFCEDA'])
+        self.assertEquals(evaluate('PBXSourcesBuildPhase.files.id'), ['1BC96D0D188311C700AFCEDA'])
+        self.assertEquals(evaluate('NoSuchClass.name'), [])
+        for text in ['', 'PBXGroup.', 'PBXGroup[name', 'PBXGroup name']:
+            self.assertRaises(xcodeproject.QuerySyntaxError, xcodeproject.Query, text)
+
+    def test_intern_pool(self):
+        intern_pool = xcodeproject.InternPool()
+        projects = [xcodeproject.XcodeProject(fixture_project_path(), intern_pool=intern_pool) for i in range(2)]
+        settings = [project.object_for_id('1BC96D15188311C700AFCEDA').build_settings() for project in projects]
+        self.assertEquals(settings[0], settings[1])
+        self.assertTrue(settings[0]['PRODUCT_NAME'] is settings[1]['PRODUCT_NAME'])
+        self.assertTrue(settings[0]['GCC_PREFIX_HEADER'] is settings[1]['GCC_PREFIX_HEADER'])
+        self.assertTrue(intern_pool.hit_rate() > 0.5)
+        # object IDs and the references to them share one string
+        object_ids = dict((object_id, object_id) for object_id in projects[0].object_data)
+        build_file_data = projects[1].object_data['1BC96D0D188311C700AFCEDA']
+        self.assertTrue(build_file_data['fileRef'] is object_ids['1BC96D0C188311C700AFCEDA'])
+        self.assertEquals(intern_pool.stats()['strings'], len(intern_pool))
+        intern_pool.release()
+        self.assertEquals((len(intern_pool), intern_pool.hit_rate()), (0, 0.0))
+
+    def test_iter_objects(self):
+        objects = list(xcodeproject.iter_objects(self.project.path, isa='PBXShellScriptBuildPhase'))
+        self.assertEquals([object_id for object_id, isa, data, line_numbers in objects], ['1BD5F5D6188781A60008AA07', '1BD5F5D7188781C90008AA07'])
+        for object_id, isa, data, line_numbers in objects:
+            item = self.project.object_for_id(object_id)
+            self.assertEquals(isa, 'PBXShellScriptBuildPhase')
+            self.assertEquals(data, item.data)
+            self.assertEquals(line_numbers, (item.line_number_start, item.line_number_end))
+        all_objects = list(xcodeproject.iter_objects(os.path.join(self.project.path, 'project.pbxproj'), isa=None))
+        self.assertEquals(dict((object_id, data) for object_id, isa, data, line_numbers in all_objects), self.project.object_data)
+
+    def test_referrers(self):
+        referrers = self.project.referrers_of(self.project.object_for_id('1BC96D0C188311C700AFCEDA'))
+        self.assertEquals(sorted(item.isa for item in referrers), ['PBXBuildFile', 'PBXGroup'])
+        self.assertEquals(self.project.referenced_object_ids('1BC96D0D188311C700AFCEDA'), set(['1BC96D0C188311C700AFCEDA']))
+        self.assertEquals(self.project.referrers_of(self.project.root_object_id), [])
+        self.assertTrue(self.project.main_group_id() in self.project.referenced_object_ids(self.project.root_object_id))
+
+    def test_unreachable_objects(self):
+        self.assertEquals(self.project.unreachable_objects(), [])
+        self.assertEquals(len(self.project.reachable_object_ids()), len(self.project.objects))
+
+
+class TestUnreachableObjects(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_path = copy_fixture_project(os.path.join(self.temp_dir, 'Test.xcodeproj'))
+        project_file_path = os.path.join(self.project_path, 'project.pbxproj')
+        with open(project_file_path) as f:
+            text = f.read()
+        text = text.replace('/* End PBXBuildFile section */', '''/* End PBXBuildFile section */
+\t\tAAAAAAAAAAAAAAAAAAAAAAA1 /* Unused.m */ = {isa = PBXFileReference; path = Unused.m; sourceTree = "<group>"; };
+\t\tAAAAAAAAAAAAAAAAAAAAAAA2 /* Orphan.m */ = {isa = PBXFileReference; path = Orphan.m; sourceTree = "<group>"; };
+\t\tAAAAAAAAAAAAAAAAAAAAAAA3 /* Unused */ = {isa = PBXGroup; children = (AAAAAAAAAAAAAAAAAAAAAAA1, ); sourceTree = "<group>"; };''')
+        with open(project_file_path, 'w') as f:
+            f.write(text)
+        self.project = xcodeproject.XcodeProject(self.project_path, lazy=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_unreachable_objects(self):
+        self.assertEquals([item.id for item in self.project.unreachable_objects()], ['AAAAAAAAAAAAAAAAAAAAAAA1', 'AAAAAAAAAAAAAAAAAAAAAAA2', 'AAAAAAAAAAAAAAAAAAAAAAA3'])
+        self.assertEquals([item.id for item in self.project.referrers_of('AAAAAAAAAAAAAAAAAAAAAAA1')], ['AAAAAAAAAAAAAAAAAAAAAAA3'])
+        self.assertEquals(self.project.referrers_of('AAAAAAAAAAAAAAAAAAAAAAA2'), [])
+
+
+class TestRefresh(unittest.TestCase):
+
+    lazy = False
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_path = copy_fixture_project(os.path.join(self.temp_dir, 'Test.xcodeproj'))
+        self.project_file_path = os.path.join(self.project_path, 'project.pbxproj')
+        self.project = xcodeproject.XcodeProject(self.project_path, lazy=self.lazy)
+
+    def tearDown(self):
+        self.project.close()
+        shutil.rmtree(self.temp_dir)
+
+    def edit_project_file(self, replace_file):
+        with open(self.project_file_path) as f:
+            text = f.read()
+        text = text.replace('\t\t1BC96D11188311C700AFCEDA /* PythonXcodeTest.1 in CopyFiles */ = {isa = PBXBuildFile; fileRef = 1BC96D10188311C700AFCEDA /* PythonXcodeTest.1 */; };\n', '')
+        text = text.replace('\t\t\t\t1BC96D11188311C700AFCEDA /* PythonXcodeTest.1 in CopyFiles */,\n', '')
+        text = text.replace('shellScript = "echo foo\\n";', 'shellScript = "echo bar\\n";')
+        text = text.replace('/* End PBXFileReference section */', '\t\tAAAAAAAAAAAAAAAAAAAAAAA1 /* New.m */ = {isa = PBXFileReference; path = New.m; sourceTree = "<group>"; };\n/* End PBXFileReference section */')
+        path = self.project_file_path + '.new' if replace_file else self.project_file_path
+        with open(path, 'w') as f:
+            f.write(text)
+        if replace_file:
+            os.rename(path, self.project_file_path)
+        # make sure the change is visible even with coarse modification times
+        os.utime(self.project_file_path, (0, 0))
+
+    def check_refresh(self, replace_file):
+        self.assertFalse(self.project.refresh())
+        copy_files_phase = self.project.object_for_id('1BC96D04188311C700AFCEDA')
+        script_phase = self.project.object_for_id('1BD5F5D6188781A60008AA07')
+        build_file = self.project.object_for_id('1BC96D0D188311C700AFCEDA')
+        self.assertEquals(len(copy_files_phase.files), 1)
+
+        self.edit_project_file(replace_file)
+        changes = self.project.refresh()
+        self.assertEquals(self.project.project_file.loaded_incrementally, replace_file)
+        self.assertEquals(changes.added, set(['AAAAAAAAAAAAAAAAAAAAAAA1']))
+        self.assertEquals(changes.removed, set(['1BC96D11188311C700AFCEDA']))
+        self.assertEquals(changes.modified, set(['1BC96D04188311C700AFCEDA', '1BD5F5D6188781A60008AA07']))
+
+        self.assertIs(self.project.object_for_id('1BC96D04188311C700AFCEDA'), copy_files_phase)
+        self.assertIs(self.project.object_for_id('1BC96D0D188311C700AFCEDA'), build_file)
+        self.assertEquals(copy_files_phase.files, [])
+        self.assertEquals(script_phase.shellScript, 'echo bar\n')
+        self.assertEquals((script_phase.line_number_start, script_phase.line_number_end), (138, 151))
+        self.assertIn('echo bar', script_phase.raw_source())
+        self.assertEquals(self.project.object_for_id('AAAAAAAAAAAAAAAAAAAAAAA1').path, 'New.m')
+        self.assertFalse(self.project.has_object_with_id('1BC96D11188311C700AFCEDA'))
+        self.assertNotIn('1BC96D11188311C700AFCEDA', self.project.class_name_to_item_map['PBXBuildFile'])
+        self.assertIn('AAAAAAAAAAAAAAAAAAAAAAA1', self.project.class_name_to_item_map['PBXFileReference'])
+        self.assertEquals(self.project.object_data, xcodeproject.pbxproj.parse_pbxproj_file(self.project_file_path)[0]['objects'])
+
+    def test_refresh_replaced_file(self):
+        self.check_refresh(replace_file=True)
+
+    def test_refresh_file_changed_in_place(self):
+        self.check_refresh(replace_file=False)
+
+
+class TestLazyRefresh(TestRefresh):
+
+    lazy = True
+
+
+class TestGeneratedProject(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_generate_project(self):
+        from benchmarks import generate_project
+        path = os.path.join(self.temp_dir, 'Generated.xcodeproj')
+        object_count = generate_project.generate_project(path, targets=3, files=50, groups=4, configurations=3)
+        self.assertEquals(object_count, generate_project.ProjectGenerator.object_count(3, 50, 4, 3))
+
+        project = xcodeproject.XcodeProject(path)
+        self.assertEquals(len(project.objects), object_count)
+        self.assertEquals(sorted(target.name for target in project.targets()), ['Target1', 'Target2', 'Target3'])
+        self.assertEquals([config.name for config in project.root_object().buildConfigurationList], ['Debug', 'Release', 'Configuration3'])
+        self.assertEquals(len(project.file_references_for_file_type('sourcecode.c.objc')), 50)
+        self.assertEquals(project.unreachable_objects(), [])
+
+
+class TestLazyXcodeProject(TestXcodeProject):
+
+    def setUp(self):
+        self.project = xcodeproject.XcodeProject(os.path.expanduser(fixture_project_path()), lazy=True)
+
+    def test_lazy_materialization(self):
+        project = xcodeproject.XcodeProject(os.path.expanduser(fixture_project_path()), lazy=True)
+        self.assertEquals(len(project.materialized_objects), 0)
+        self.assertEquals(len(project.objects), len(project.object_data))
+
+        target = project.target_for_name('PythonXcodeTest')
+        self.assertEquals(project.materialized_objects.keys(), [target.id])
+        self.assertEquals(len(target.script_build_phases()), 2)
+        self.assertFalse(set(project.build_file_map()) & set(project.materialized_objects))
+
+        self.assertRaises(Exception, project.object_for_id, 'invalid')
+        self.assertRaises(AttributeError, getattr, target, 'noSuchProperty')
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_path = copy_fixture_project(os.path.join(self.temp_dir, 'Test.xcodeproj'))
+        self.cache = xcodeproject.ParseCache(os.path.join(self.temp_dir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def load(self):
+        return xcodeproject.XcodeProject(self.project_path, cache=self.cache)
+
+    def test_hit_and_miss(self):
+        project = self.load()
+        self.assertFalse(project.project_file.loaded_from_cache)
+        cached_project = self.load()
+        self.assertTrue(cached_project.project_file.loaded_from_cache)
+        self.assertEquals(cached_project.object_data, project.object_data)
+        self.assertEquals(cached_project.object_for_id('1BC96D0D188311C700AFCEDA').raw_source(), project.object_for_id('1BC96D0D188311C700AFCEDA').raw_source())
+        self.assertEquals((self.cache.hits, self.cache.misses), (1, 1))
+
+        # same content with a new modification time is still a hit
+        project_file_path = os.path.join(self.project_path, 'project.pbxproj')
+        os.utime(project_file_path, (0, 0))
+        self.assertTrue(self.load().project_file.loaded_from_cache)
+
+        with open(project_file_path, 'ab') as f:
+            f.write('\n')
+        os.utime(project_file_path, (1000000000, 1000000000))
+        self.assertFalse(self.load().project_file.loaded_from_cache)
+
+        # an edit that keeps the size and modification time is still a miss
+        with open(project_file_path, 'rb') as f:
+            text = f.read()
+        with open(project_file_path, 'wb') as f:
+            f.write(text.replace('Test Shell Script Phase 1', 'Test Shell Script Phase 9'))
+        os.utime(project_file_path, (1000000000, 1000000000))
+        project = self.load()
+        self.assertFalse(project.project_file.loaded_from_cache)
+        self.assertEquals(project.object_data['1BD5F5D6188781A60008AA07']['name'], 'Test Shell Script Phase 9')
+
+    def test_intern_pool(self):
+        self.load()
+        intern_pool = xcodeproject.InternPool()
+        projects = [xcodeproject.XcodeProject(self.project_path, cache=self.cache, intern_pool=intern_pool) for i in range(2)]
+        self.assertTrue(all(project.project_file.loaded_from_cache for project in projects))
+        build_files = [project.object_data['1BC96D0D188311C700AFCEDA'] for project in projects]
+        self.assertTrue(build_files[0]['fileRef'] is build_files[1]['fileRef'])
+        self.assertTrue(build_files[0].keys()[0] is build_files[1].keys()[0])
+        object_id = [object_id for object_id in projects[1].object_data if object_id == '1BC96D0D188311C700AFCEDA'][0]
+        self.assertTrue(object_id is [object_id for object_id in projects[0].project_file.object_span_map if object_id == '1BC96D0D188311C700AFCEDA'][0])
+        self.assertEquals(projects[0].object_data, self.load().object_data)
+        self.assertTrue(intern_pool.hit_rate() > 0.5)
+
+    def test_eviction(self):
+        self.load()
+        self.assertEquals(len(self.cache.entries()), 1)
+        self.assertEquals(self.cache.evict(max_size=self.cache.total_size()), 0)
+        self.assertEquals(self.cache.clear(), 1)
+        self.assertEquals(self.cache.entries(), [])
+
+    def test_store_lists_directory_once(self):
+        listing_count = [0]
+        entry_files = self.cache.entry_files
+        def counting_entry_files():
+            listing_count[0] += 1
+            return entry_files()
+        self.cache.entry_files = counting_entry_files
+
+        for name in ['A', 'B', 'C']:
+            shutil.copytree(self.project_path, os.path.join(self.temp_dir, name + '.xcodeproj'))
+            xcodeproject.XcodeProject(os.path.join(self.temp_dir, name + '.xcodeproj'), cache=self.cache)
+        self.load()
+        self.load()
+        self.assertEquals(listing_count[0], 1)
+        self.assertEquals(self.cache.known_total_size, self.cache.total_size())
+
+        # the four entries are about the same size, so only the newest one fits
+        self.cache.max_size = self.cache.known_total_size // 2
+        os.utime(os.path.join(self.project_path, 'project.pbxproj'), (0, 0))
+        with open(os.path.join(self.project_path, 'project.pbxproj'), 'ab') as f:
+            f.write('\n')
+        self.load()
+        self.assertEquals(listing_count[0], 3)
+        self.assertEquals(self.cache.known_total_size, self.cache.total_size())
+        self.assertTrue(self.cache.total_size() <= self.cache.max_size)
+        self.assertEquals([entry[0] for entry in self.cache.entries()], [os.path.join(self.project_path, 'project.pbxproj')])
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for path in ['App/App.xcodeproj/project.xcworkspace', 'App/Pods/Pods.xcodeproj', 'Lib/Lib.xcodeproj', 'Lib/Tests/LibTests.xcodeproj',
+                     'Vendor/Foo/Foo.xcodeproj', 'Vendor/Foo/Tests/FooTests.xcodeproj', '.git/Old.xcodeproj', 'DerivedData/Build.xcodeproj']:
+            os.makedirs(os.path.join(self.temp_dir, path))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def find(self, *args, **kwargs):
+        return [os.path.relpath(path, self.temp_dir) for path in xcodeproject.iter_project_paths(self.temp_dir, *args, **kwargs)]
+
+    def test_default_pruning(self):
+        paths = xcodeproject.iter_project_paths(self.temp_dir)
+        self.assertFalse(isinstance(paths, list))
+        self.assertEquals(self.find(), ['App/App.xcodeproj', 'Lib/Lib.xcodeproj', 'Lib/Tests/LibTests.xcodeproj', 'Vendor/Foo/Foo.xcodeproj', 'Vendor/Foo/Tests/FooTests.xcodeproj'])
+        self.assertEquals(len(self.find(pruned_directory_names=[])), 8)
+
+    def test_exclude_patterns(self):
+        skipped = []
+        self.assertEquals(self.find(exclude_patterns=['Vendor/*/Tests', 'Lib/*.xcodeproj'], skip_callback=skipped.append), ['App/App.xcodeproj', 'Lib/Tests/LibTests.xcodeproj', 'Vendor/Foo/Foo.xcodeproj'])
+        self.assertEquals(len(skipped), 2)
+        self.assertEquals(self.find(exclude_patterns=['Tests']), ['App/App.xcodeproj', 'Lib/Lib.xcodeproj', 'Vendor/Foo/Foo.xcodeproj'])
+
+    def test_scandir_iterators_are_closed(self):
+        from xcodeproject import discovery
+        closed_directories = []
+
+        class Entry(object):
+            def __init__(self, directory, name):
+                self.name = name
+                self.path = os.path.join(directory, name)
+            def is_dir(self, follow_symlinks=True):
+                return os.path.isdir(self.path) and (follow_symlinks or not os.path.islink(self.path))
+
+        class ScandirIterator(object):
+            def __init__(self, directory):
+                self.directory = directory
+                self.entries = iter([Entry(directory, name) for name in os.listdir(directory)])
+            def __iter__(self):
+                return self.entries
+            def close(self):
+                closed_directories.append(self.directory)
+
+        saved_scandir = discovery.scandir
+        discovery.scandir = ScandirIterator
+        try:
+            self.assertEquals(self.find(), ['App/App.xcodeproj', 'Lib/Lib.xcodeproj', 'Lib/Tests/LibTests.xcodeproj', 'Vendor/Foo/Foo.xcodeproj', 'Vendor/Foo/Tests/FooTests.xcodeproj'])
+        finally:
+            discovery.scandir = saved_scandir
+        self.assertEquals(sorted(os.path.relpath(path, self.temp_dir) for path in closed_directories), ['.', 'App', 'Lib', 'Lib/Tests', 'Vendor', 'Vendor/Foo', 'Vendor/Foo/Tests'])
+
+
+class TestWorkspace(unittest.TestCase):
+
+    lazy = False
+    jobs = 1
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for name in ['App', 'Lib', 'Extra']:
+            copy_fixture_project(os.path.join(self.temp_dir, name, name + '.xcodeproj'))
+
+        project_file_path = os.path.join(self.temp_dir, 'App', 'App.xcodeproj', 'project.pbxproj')
+        with open(project_file_path) as f:
+            text = f.read()
+        text = text.replace('/* End PBXBuildFile section */', '''/* End PBXBuildFile section */
+\t\tBBBBBBBBBBBBBBBBBBBBBBB1 /* Lib.xcodeproj */ = {isa = PBXFileReference; path = ../Lib/Lib.xcodeproj; sourceTree = SOURCE_ROOT; };
+\t\tBBBBBBBBBBBBBBBBBBBBBBB2 = {isa = PBXContainerItemProxy; containerPortal = BBBBBBBBBBBBBBBBBBBBBBB1; proxyType = 1; remoteGlobalIDString = 1BC96D05188311C700AFCEDA; remoteInfo = PythonXcodeTest; };
+\t\tBBBBBBBBBBBBBBBBBBBBBBB3 = {isa = PBXTargetDependency; name = PythonXcodeTest; targetProxy = BBBBBBBBBBBBBBBBBBBBBBB2; };
+\t\tBBBBBBBBBBBBBBBBBBBBBBB4 /* Extra.xcodeproj */ = {isa = PBXFileReference; path = ../Extra/Extra.xcodeproj; sourceTree = SOURCE_ROOT; };
+\t\tBBBBBBBBBBBBBBBBBBBBBBB5 = {isa = PBXContainerItemProxy; containerPortal = BBBBBBBBBBBBBBBBBBBBBBB4; proxyType = 2; remoteGlobalIDString = 1BC96D06188311C700AFCEDA; remoteInfo = PythonXcodeTest; };
+\t\tBBBBBBBBBBBBBBBBBBBBBBB6 = {isa = PBXReferenceProxy; path = PythonXcodeTest; remoteRef = BBBBBBBBBBBBBBBBBBBBBBB5; sourceTree = BUILT_PRODUCTS_DIR; };
+\t\tBBBBBBBBBBBBBBBBBBBBBBB7 = {isa = PBXContainerItemProxy; containerPortal = BBBBBBBBBBBBBBBBBBBBBBB1; proxyType = 1; remoteGlobalIDString = CCCCCCCCCCCCCCCCCCCCCCCC; remoteInfo = Gone; };''')
+        text = text.replace('\t\t\tdependencies = (\n', '\t\t\tdependencies = (\n\t\t\t\tBBBBBBBBBBBBBBBBBBBBBBB3,\n')
+        text = text.replace('\t\t\thasScannedForEncodings = 0;\n', '\t\t\thasScannedForEncodings = 0;\n\t\t\tprojectReferences = (\n\t\t\t\t{\n\t\t\t\t\tProjectRef = BBBBBBBBBBBBBBBBBBBBBBB4;\n\t\t\t\t},\n\t\t\t);\n')
+        with open(project_file_path, 'w') as f:
+            f.write(text)
+
+        os.makedirs(os.path.join(self.temp_dir, 'Broken', 'Broken.xcodeproj'))
+        with open(os.path.join(self.temp_dir, 'Broken', 'Broken.xcodeproj', 'project.pbxproj'), 'w') as f:
+            f.write('{ broken')
+
+        self.workspace_path = os.path.join(self.temp_dir, 'All.xcworkspace')
+        os.mkdir(self.workspace_path)
+        with open(os.path.join(self.workspace_path, 'contents.xcworkspacedata'), 'w') as f:
+            f.write('''<?xml version="1.0" encoding="UTF-8"?>
+<Workspace version = "1.0">
+   <Group location = "container:App" name = "App">
+      <FileRef location = "group:App.xcodeproj"></FileRef>
+   </Group>
+   <FileRef location = "container:Lib/Lib.xcodeproj"></FileRef>
+   <FileRef location = "absolute:{}"></FileRef>
+   <FileRef location = "group:Missing/Missing.xcodeproj"></FileRef>
+   <FileRef location = "group:Broken/Broken.xcodeproj"></FileRef>
+   <FileRef location = "group:README.md"></FileRef>
+</Workspace>
+'''.format(os.path.join(self.temp_dir, 'App', 'App.xcodeproj')))
+        self.workspace = xcodeproject.XcodeWorkspace(self.workspace_path, lazy=self.lazy, jobs=self.jobs)
+
+    def tearDown(self):
+        self.workspace.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_projects(self):
+        self.assertEquals([project.name for project in self.workspace.projects.values()], ['App.xcodeproj', 'Lib.xcodeproj', 'Extra.xcodeproj'])
+        self.assertEquals(self.workspace.missing_project_paths, [os.path.join(self.temp_dir, 'Missing', 'Missing.xcodeproj')])
+        broken_project_path = os.path.join(self.temp_dir, 'Broken', 'Broken.xcodeproj')
+        self.assertEquals(self.workspace.failed_project_paths, [broken_project_path])
+        self.assertIsInstance(self.workspace.load_errors[broken_project_path], xcodeproject.pbxproj.PBXProjParseError)
+        app, lib, extra = self.workspace.projects.values()
+        self.assertIs(self.workspace.project_for_path(os.path.join(self.temp_dir, 'Lib', '..', 'App', 'App.xcodeproj')), app)
+        self.assertIs(app.workspace, self.workspace)
+
+    def test_cross_project_references(self):
+        app, lib, extra = self.workspace.projects.values()
+        dependency_targets = app.target_for_name('PythonXcodeTest').dependency_targets()
+        self.assertEquals([(target.id, target.project) for target in dependency_targets], [('1BC96D05188311C700AFCEDA', lib)])
+        self.assertEquals(lib.target_for_name('PythonXcodeTest').dependency_targets(), [])
+
+        product = app.object_for_id('BBBBBBBBBBBBBBBBBBBBBBB6').remote_object()
+        self.assertEquals((product.id, product.project), ('1BC96D06188311C700AFCEDA', extra))
+        self.assertIsNone(app.object_for_id('BBBBBBBBBBBBBBBBBBBBBBB7').remote_object())
+        self.assertEquals(self.workspace.unresolved_proxy_ids, [(app.path, 'BBBBBBBBBBBBBBBBBBBBBBB7')])
+
+        # without a workspace, only references within the project can be resolved
+        project = xcodeproject.XcodeProject(app.path)
+        self.assertIsNone(project.object_for_id('BBBBBBBBBBBBBBBBBBBBBBB3').resolved_target())
+        self.assertEquals(project.target_for_name('PythonXcodeTest').dependency_targets(), [])
+
+    def test_tool(self):
+        status, output, error_output = run_tool('print-workspace-dependencies', '--jobs', '2', self.workspace_path)
+        self.assertEquals(status, 1)
+        self.assertIn('Unable to load {}'.format(os.path.join(self.temp_dir, 'Broken', 'Broken.xcodeproj')), error_output)
+        self.assertEquals(output.splitlines(), [
+            os.path.join(self.temp_dir, 'App', 'App.xcodeproj'),
+            'PythonXcodeTest -> PythonXcodeTest Lib.xcodeproj',
+            os.path.join(self.temp_dir, 'Lib', 'Lib.xcodeproj'),
+            os.path.join(self.temp_dir, 'Extra', 'Extra.xcodeproj'),
+        ])
+        self.assertIn('Missing.xcodeproj', error_output)
+        self.assertIn('BBBBBBBBBBBBBBBBBBBBBBB7', error_output)
+
+
+class TestParallelLazyWorkspace(TestWorkspace):
+
+    lazy = True
+    jobs = 2
+
+    def test_small_parse_cache(self):
+        # too small for the results of the worker processes, so they go to a temporary cache
+        parse_cache = xcodeproject.ParseCache(os.path.join(self.temp_dir, 'cache'), max_size=1000)
+        xcode_workspace = xcodeproject.XcodeWorkspace(self.workspace_path, cache=parse_cache, jobs=2)
+        # Extra is the only project referenced by App, so it is parsed in this process
+        self.assertEquals([project.project_file.loaded_from_cache for project in xcode_workspace.projects.values()], [True, True, False])
+        self.assertEquals(parse_cache.entries(), [])
+        xcode_workspace.close()
+
+
+class TestTool(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for name in ['A', 'B', 'C']:
+            copy_fixture_project(os.path.join(self.temp_dir, name + '.xcodeproj'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_parallel_jobs(self):
+        os.mkdir(os.path.join(self.temp_dir, 'Broken.xcodeproj'))
+        with open(os.path.join(self.temp_dir, 'Broken.xcodeproj', 'project.pbxproj'), 'w') as f:
+            f.write('{ broken')
+
+        status, output, error_output = run_tool('print-shell-scripts', '--recursive', self.temp_dir)
+        self.assertEquals(status, 1)
+        self.assertEquals(output.count('Begin script "Test Shell Script Phase 1"'), 3)
+        self.assertTrue('Broken.xcodeproj' in error_output)
+
+        parallel_result = run_tool('print-shell-scripts', '--recursive', '--jobs', '3', self.temp_dir)
+        self.assertEquals(parallel_result, (status, output, error_output))
+
+    def test_should_forward_to_server(self):
+        xcodeproject_tool = tool.XcodeprojectTool()
+        def should_forward(*arguments):
+            return xcodeproject_tool.should_forward_to_server(*xcodeproject_tool.global_argument_parser().parse_known_args(list(arguments)))
+        self.assertTrue(should_forward('print-shell-scripts', 'watch'))
+        self.assertTrue(should_forward('--timings', 'print-shell-scripts', '--recursive', 'serve'))
+        self.assertFalse(should_forward('watch', 'A.xcodeproj'))
+        self.assertFalse(should_forward('--profile', 'serve', 'serv'))
+        self.assertFalse(should_forward('--no-server', 'print-shell-scripts', 'A.xcodeproj'))
+
+    def test_timings_and_profile(self):
+        project_path = os.path.join(self.temp_dir, 'A.xcodeproj')
+        status, output, error_output = run_tool('--timings-json', 'print-shell-scripts', project_path)
+        report = json.loads(error_output)
+        self.assertEquals(report['project'], project_path)
+        self.assertEquals(report['phases']['parse']['count'], 26)
+        self.assertEquals(sorted(report['phases']), ['objects', 'parse', 'read', 'references', 'subcommand'])
+
+        profile_path = os.path.join(self.temp_dir, 'profile')
+        status, output, error_output = run_tool('--profile', profile_path, '--timings', 'print-shell-scripts', project_path)
+        self.assertTrue(error_output.startswith('Timings for {}'.format(project_path)))
+        self.assertTrue(pstats.Stats(profile_path).total_calls > 0)
+
+    def test_change_whitespace_setting(self):
+        status, output, error_output = run_tool('change-project-level-whitespace-setting', '--recursive', '--dry-run', self.temp_dir, '1')
+        self.assertEquals(output.count('would set usesTabs = 1'), 3)
+        status, output, error_output = run_tool('change-project-level-whitespace-setting', '--recursive', self.temp_dir, '1')
+        self.assertEquals((status, output.count('set usesTabs = 1')), (0, 3))
+        status, output, error_output = run_tool('change-project-level-whitespace-setting', '--recursive', self.temp_dir, '1')
+        self.assertEquals(output.count('already has usesTabs setting'), 3)
+
+    def test_set_build_settings(self):
+        project_paths = sorted(os.path.join(self.temp_dir, name) for name in os.listdir(self.temp_dir))
+        args = ['set-build-settings', '--recursive', '--targets', '--configuration', 'Release', '--set', 'SDKROOT=macosx10.9', '--append', 'OTHER_LDFLAGS=-ObjC', '--unset', 'GCC_PRECOMPILE_PREFIX_HEADER', self.temp_dir]
+        status, output, error_output = run_tool(*(args[:1] + ['--dry-run'] + args[1:]))
+        self.assertEquals(output.count('+\t\t\t\tSDKROOT = macosx10.9;\n'), 3)
+        self.assertEquals(output.count('-\t\t\t\tGCC_PRECOMPILE_PREFIX_HEADER = YES;\n'), 3)
+        modification_times = [os.path.getmtime(os.path.join(path, 'project.pbxproj')) for path in project_paths]
+
+        status, output, error_output = run_tool(*args)
+        self.assertEquals((status, output.count('changed 1 build configuration(s)')), (0, 3))
+        project = xcodeproject.XcodeProject(project_paths[0])
+        release_settings = project.target_for_name('PythonXcodeTest').buildConfigurationList.buildConfigurations[1].build_settings()
+        self.assertEquals(release_settings, {'GCC_PREFIX_HEADER': 'PythonXcodeTest/PythonXcodeTest-Prefix.pch', 'OTHER_LDFLAGS': ['$(inherited)', '-ObjC'], 'PRODUCT_NAME': '$(TARGET_NAME)', 'SDKROOT': 'macosx10.9'})
+
+        # nothing left to change, so nothing is written
+        os.utime(os.path.join(project_paths[0], 'project.pbxproj'), (0, 0))
+        status, output, error_output = run_tool(*args)
+        self.assertEquals((status, output), (0, ''.join(path + '\n' for path in project_paths)))
+        self.assertEquals(os.path.getmtime(os.path.join(project_paths[0], 'project.pbxproj')), 0)
+
+
+    def test_print_missing_files(self):
+        os.mkdir(os.path.join(self.temp_dir, 'PythonXcodeTest'))
+        open(os.path.join(self.temp_dir, 'PythonXcodeTest', 'main.m'), 'w').close()
+        status, output, error_output = run_tool('print-missing-files', '--recursive', self.temp_dir)
+        self.assertEquals(status, 0)
+        self.assertEquals(output.count('======= File references to missing files'), 3)
+        self.assertEquals(output.count('1BC96D0F188311C700AFCEDA {}\n'.format(os.path.join(self.temp_dir, 'PythonXcodeTest', 'PythonXcodeTest-Prefix.pch'))), 3)
+        self.assertEquals(output.count('1BC96D10188311C700AFCEDA'), 3)
+        self.assertFalse('main.m' in output)
+
+        listing_cache = xcodeproject.DirectoryListingCache()
+        for name in ['A', 'B', 'C']:
+            project = xcodeproject.XcodeProject(os.path.join(self.temp_dir, name + '.xcodeproj'), lazy=True)
+            self.assertEquals([object_id for object_id, path in xcodeproject.missing_file_references(project, listing_cache)], ['1BC96D0F188311C700AFCEDA', '1BC96D10188311C700AFCEDA'])
+        self.assertEquals(listing_cache.listing_count, 1)
+
+    def test_query(self):
+        status, output, error_output = run_tool('query', '--recursive', '--jobs', '2', self.temp_dir, 'PBXShellScriptBuildPhase[shellPath=/bin/sh].shellScript')
+        self.assertEquals(output, ''.join('{}\necho foo\n\n'.format(os.path.join(self.temp_dir, name + '.xcodeproj')) for name in ['A', 'B', 'C']))
+        status, output, error_output = run_tool('query', '--json', os.path.join(self.temp_dir, 'A.xcodeproj'), 'PBXNativeTarget')
+        self.assertEquals(json.loads(output.splitlines()[1]), {'id': '1BC96D05188311C700AFCEDA', 'isa': 'PBXNativeTarget', 'line': 94})
+        status, output, error_output = run_tool('query', '--count', os.path.join(self.temp_dir, 'A.xcodeproj'), 'XCBuildConfiguration')
+        self.assertEquals(output.splitlines()[1], '4')
+
+    def test_query_build_settings(self):
+        project_path = os.path.join(self.temp_dir, 'B.xcodeproj')
+        run_tool('set-build-settings', '--set', 'SDKROOT=iphoneos', project_path)
+
+        status, output, error_output = run_tool('query-build-settings', '--recursive', '--where', 'name=SDKROOT', '--where', 'value!=macosx', self.temp_dir)
+        self.assertEquals(output, '{0}\t\tDebug\tSDKROOT\tiphoneos\n{0}\t\tRelease\tSDKROOT\tiphoneos\n'.format(project_path))
+
+        status, output, error_output = run_tool('query-build-settings', '--recursive', '--jobs', '2', '-w', 'name=SDKROOT', '--group-by', 'value', '--format', 'csv', self.temp_dir)
+        self.assertEquals(output, 'value,count\r\nmacosx,4\r\niphoneos,2\r\n')
+
+        status, output, error_output = run_tool('query-build-settings', '--recursive', '-w', 'target=PythonXcodeTest', '-w', 'name=PRODUCT_*', '-f', 'ndjson', self.temp_dir)
+        self.assertEquals(len(output.splitlines()), 6)
+        self.assertEquals(json.loads(output.splitlines()[0]), {'project': os.path.join(self.temp_dir, 'A.xcodeproj'), 'target': 'PythonXcodeTest', 'configuration': 'Debug', 'name': 'PRODUCT_NAME', 'value': '$(TARGET_NAME)'})
+
+        status, output, error_output = run_tool('query-build-settings', '-w', 'foo=bar', project_path)
+        self.assertEquals(status, 2)
+
+
+class TestBuildSettingEdit(unittest.TestCase):
+
+    def test_append(self):
+        build_settings = {'OTHER_LDFLAGS': '-lz  -ObjC', 'LIST': ['a', 'b']}
+        edit = xcodeproject.BuildSettingEdit.from_argument
+        self.assertTrue(edit('append', 'OTHER_LDFLAGS=-lc++').apply(build_settings))
+        self.assertEquals(build_settings['OTHER_LDFLAGS'], ['-lz', '-ObjC', '-lc++'])
+        self.assertFalse(edit('append', 'OTHER_LDFLAGS=-ObjC').apply(build_settings))
+        self.assertFalse(edit('append', 'LIST=a').apply(build_settings))
+        self.assertTrue(edit('append', 'NEW=x').apply(build_settings))
+        self.assertEquals(build_settings['NEW'], ['$(inherited)', 'x'])
+
+
+class TestBuildSettingsStore(unittest.TestCase):
+
+    def test_rows(self):
+        store = xcodeproject.BuildSettingsStore()
+        store.add_rows('A', [('', 'Debug', 'SDKROOT', 'macosx'), ('App', 'Debug', 'SWIFT_VERSION', '5'), ('App', 'Release', 'SWIFT_VERSION', '4.2')])
+        store.add_rows('B', [('Lib', 'Debug', 'SWIFT_VERSION', '4.2')])
+        self.assertEquals(len(store.strings), 12)
+        where = xcodeproject.SettingsFilter.from_expression
+        rows = store.rows([where('name=SWIFT_VERSION'), where('value!=5')])
+        self.assertEquals([store.row_values(row) for row in rows], [['A', 'App', 'Release', 'SWIFT_VERSION', '4.2'], ['B', 'Lib', 'Debug', 'SWIFT_VERSION', '4.2']])
+        self.assertEquals(store.group_counts('project', rows), {'A': 1, 'B': 1})
+        self.assertEquals(store.group_counts('value', store.rows([where('configuration=D*')])).items(), [('4.2', 1), ('5', 1), ('macosx', 1)])
+        self.assertEquals(store.rows([where('name=MISSING')]), [])
+        self.assertRaises(ValueError, where, 'name~SDKROOT')
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_path = copy_fixture_project(os.path.join(self.temp_dir, 'Test.xcodeproj'))
+        self.socket_path = os.path.join(self.temp_dir, 'server.sock')
+        self.tool_server = server.ToolServer(self.socket_path, tool.run_tool)
+        tool.server_project_cache = server.ProjectLRU()
+        self.server_thread = threading.Thread(target=self.tool_server.serve_forever)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.tool_server.shutdown()
+        self.server_thread.join()
+        self.tool_server.server_close()
+        tool.server_project_cache = None
+        shutil.rmtree(self.temp_dir)
+
+    def test_forward_request(self):
+        status, output, error_output = server.forward_request(self.socket_path, ['print-shell-scripts', self.project_path])
+        self.assertEquals(status, 0)
+        self.assertTrue('Begin script "Test Shell Script Phase 1"' in output)
+        self.assertEquals(server.forward_request(self.socket_path, ['print-shell-scripts', self.project_path]), (status, output, error_output))
+        self.assertEquals((tool.server_project_cache.misses, tool.server_project_cache.hits), (1, 1))
+
+        status, output, error_output = server.forward_request(self.socket_path, ['set-build-settings', '--set', 'SDKROOT=iphoneos', os.path.relpath(self.project_path)])
+        self.assertTrue('changed 2 build configuration(s)' in output)
+        status, output, error_output = server.forward_request(self.socket_path, ['query-build-settings', '-w', 'name=SDKROOT', self.project_path])
+        self.assertEquals(output.count('\tiphoneos\n'), 2)
+        self.assertEquals(tool.server_project_cache.refreshes, 1)
+
+        # runs in the server process, so that the projects end up in its cache
+        status, output, error_output = server.forward_request(self.socket_path, ['print-shell-scripts', '--jobs', '2', self.project_path])
+        self.assertEquals(status, 0)
+        self.assertEquals(tool.server_project_cache.hits, 3)
+
+        status, output, error_output = server.forward_request(self.socket_path, ['watch', self.project_path])
+        self.assertEquals(status, 1)
+        self.assertEquals(server.forward_request(os.path.join(self.temp_dir, 'missing.sock'), ['cache']), None)
+
+    def test_client(self):
+        os.environ['XCODEPROJECT_SOCKET'] = self.socket_path
+        try:
+            status, output, error_output = tool.run_tool(['print-unreachable-objects', self.project_path])
+            self.assertEquals(tool.server_project_cache.misses, 1)
+            self.assertEquals(tool.run_tool(['--no-server', 'print-unreachable-objects', self.project_path]), (status, output, error_output))
+            self.assertEquals(tool.server_project_cache.misses, 1)
+        finally:
+            del os.environ['XCODEPROJECT_SOCKET']
+
+    def test_verbose_request(self):
+        root_logger = logging.getLogger()
+        level, handlers = root_logger.level, root_logger.handlers[:]
+        status, output, error_output = server.forward_request(self.socket_path, ['-v', 'print-shell-scripts', self.project_path])
+        self.assertEquals(status, 0)
+        self.assertEquals((root_logger.level, root_logger.handlers), (level, handlers))
+
+    def test_forwarded_environment(self):
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        os.environ['XCODEPROJECT_CACHE_DIR'] = cache_dir
+        try:
+            status, output, error_output = server.forward_request(self.socket_path, ['print-shell-scripts', self.project_path])
+        finally:
+            del os.environ['XCODEPROJECT_CACHE_DIR']
+        self.assertEquals(status, 0)
+        self.assertTrue(os.listdir(cache_dir))
+        self.assertFalse('XCODEPROJECT_CACHE_DIR' in os.environ)
+
+    def test_connect_checks_socket(self):
+        not_a_socket_path = os.path.join(self.temp_dir, 'file.sock')
+        open(not_a_socket_path, 'w').close()
+        self.assertEquals(server.connect(not_a_socket_path), None)
+        client = server.connect(self.socket_path)
+        self.assertTrue(client is not None)
+        client.close()
+
+    def test_project_lru(self):
+        other_project_path = os.path.join(self.temp_dir, 'Other.xcodeproj')
+        shutil.copytree(self.project_path, other_project_path)
+        project_cache = server.ProjectLRU(max_objects=30)
+        for path in [self.project_path, other_project_path, self.project_path]:
+            project = project_cache.project(path, True, lambda: xcodeproject.XcodeProject(path, lazy=True))
+            self.assertEquals(project.path, path)
+            self.assertEquals((len(project_cache), project_cache.object_count), (1, 26))
+        self.assertEquals(project_cache.misses, 3)
+
+
+class TestPBXProjWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_file_path = os.path.join(self.temp_dir, 'project.pbxproj')
+        shutil.copy(os.path.join(fixture_project_path(), 'project.pbxproj'), self.project_file_path)
+        with open(self.project_file_path) as f:
+            self.original_text = f.read()
+        self.project_file = xcodeproject.pbxproj.PBXProjFile(self.project_file_path)
+
+    def tearDown(self):
+        self.project_file.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_write(self):
+        writer = xcodeproject.pbxproj.PBXProjWriter(self.project_file)
+        writer.set_property('1BC96CFD188311C700AFCEDA', 'usesTabs', '1')
+        writer.set_property('1BC96CFD188311C700AFCEDA', 'indentWidth', 4)
+        writer.remove_property('1BC96CFD188311C700AFCEDA', 'sourceTree')
+        writer.set_property('1BD5F5D6188781A60008AA07', 'shellScript', 'echo "bar"\n')
+        writer.set_property('1BC96D0D188311C700AFCEDA', 'settings', {'ATTRIBUTES': ['Public']})
+        writer.set_property('1BC96D0A188311C700AFCEDA', 'isa', 'PBXBuildFile')
+        self.assertTrue(writer.write())
+
+        with open(self.project_file_path) as f:
+            text = f.read()
+        expected_text = self.original_text.replace('\t\t\t);\n\t\t\tsourceTree = "<group>";\n\t\t};\n\t\t1BC96D07188311C700AFCEDA', '\t\t\t);\n\t\t\tindentWidth = 4;\n\t\t\tusesTabs = 1;\n\t\t};\n\t\t1BC96D07188311C700AFCEDA')
+        expected_text = expected_text.replace('shellScript = "echo foo\\n";', 'shellScript = "echo \\"bar\\"\\n";')
+        expected_text = expected_text.replace('fileRef = 1BC96D0C188311C700AFCEDA /* main.m */; };', 'fileRef = 1BC96D0C188311C700AFCEDA /* main.m */; settings = {ATTRIBUTES = (Public, ); }; };')
+        self.assertEquals(text, expected_text)
+
+        data = xcodeproject.pbxproj.parse_pbxproj_file(self.project_file_path)[0]
+        self.assertEquals(data['objects']['1BD5F5D6188781A60008AA07']['shellScript'], 'echo "bar"\n')
+        self.assertEquals(data['objects']['1BC96D0D188311C700AFCEDA']['settings'], {'ATTRIBUTES': ['Public']})
+
+    def test_no_changes(self):
+        writer = xcodeproject.pbxproj.PBXProjWriter(self.project_file)
+        writer.set_property('1BC96CFD188311C700AFCEDA', 'sourceTree', '<group>')
+        writer.remove_property('1BC96CFD188311C700AFCEDA', 'usesTabs')
+        self.assertFalse(writer.write())
+        self.assertRaises(KeyError, writer.set_property, 'AAAAAAAAAAAAAAAAAAAAAAA1', 'name', 'x')
+
+
+class TestBuildSettingsResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_path = copy_fixture_project(os.path.join(self.temp_dir, 'Test.xcodeproj'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_resolve(self):
+        project = xcodeproject.XcodeProject(self.project_path)
+        resolver = xcodeproject.BuildSettingsResolver(project)
+        target = project.target_for_name('PythonXcodeTest')
+        settings = resolver.resolve(target, 'Debug')
+        self.assertEquals(settings['PRODUCT_NAME'], 'PythonXcodeTest')
+        self.assertEquals(settings['GCC_OPTIMIZATION_LEVEL'], '0')
+        self.assertEquals(settings['SRCROOT'], self.temp_dir)
+        self.assertEquals(settings['GCC_PREPROCESSOR_DEFINITIONS'].split(), ['DEBUG=1'])
+        self.assertTrue(resolver.resolve(target, 'Debug') is settings)
+        self.assertEquals(resolver.value('COPY_PHASE_STRIP', target), 'YES')
+        self.assertEquals(resolver.value('PRODUCT_NAME'), '')
+
+    def test_project_level_values(self):
+        project_file = xcodeproject.pbxproj.PBXProjFile(os.path.join(self.project_path, 'project.pbxproj'))
+        writer = xcodeproject.pbxproj.PBXProjWriter(project_file)
+        writer.set_property('1BC96D12188311C700AFCEDA', ('buildSettings', 'SHARED'), '$(CONFIGURATION)-$(PROJECT_NAME)')
+        writer.set_property('1BC96D12188311C700AFCEDA', ('buildSettings', 'PER_TARGET'), '$(SHARED)-$(PRODUCT_NAME)-$(TARGET_NAME)')
+        writer.write()
+        project_file.close()
+
+        project = xcodeproject.XcodeProject(self.project_path)
+        resolver = xcodeproject.BuildSettingsResolver(project)
+        target = project.target_for_name('PythonXcodeTest')
+        settings = resolver.resolve(target, 'Debug')
+        self.assertEquals(settings['SHARED'], 'Debug-Test')
+        self.assertEquals(settings['PER_TARGET'], 'Debug-Test-PythonXcodeTest-PythonXcodeTest')
+        self.assertEquals(resolver.value('PER_TARGET', None, 'Debug'), 'Debug-Test--')
+        project_evaluator = resolver.project_evaluator_cache['Debug', (('config', 'Debug'),)]
+        shared_key = ('SHARED', len(project_evaluator.layers) - 1)
+        self.assertTrue(shared_key in project_evaluator.values)
+        self.assertEquals(project_evaluator.dependencies[shared_key], frozenset(['CONFIGURATION', 'PROJECT_NAME']))
+
+    def test_xcconfig(self):
+        project_file = xcodeproject.pbxproj.PBXProjFile(os.path.join(self.project_path, 'project.pbxproj'))
+        writer = xcodeproject.pbxproj.PBXProjWriter(project_file)
+        # any file reference will do, the contents come from the loader below
+        writer.set_property('1BC96D15188311C700AFCEDA', 'baseConfigurationReference', '1BC96D0C188311C700AFCEDA')
+        writer.set_property('1BC96D15188311C700AFCEDA', ('buildSettings', 'OTHER_CFLAGS'), ['-DTARGET', '$(inherited)'])
+        writer.write()
+        project_file.close()
+
+        xcconfig_path = os.path.join(self.temp_dir, 'PythonXcodeTest', 'main.m')
+        xcconfig_files = {xcconfig_path: {
+            'GCC_PREPROCESSOR_DEFINITIONS': 'XCCONFIG=1 $(inherited)',
+            'OTHER_CFLAGS': '-DXCCONFIG',
+            'PLATFORM_NAME': 'mac',
+            'PLATFORM_NAME[sdk=iphoneos*]': 'ios',
+            'BUNDLE_IDENTIFIER': 'com.example.${PRODUCT_NAME:lower}-$(PLATFORM_NAME)',
+            'LOOP': '$(LOOP) x',
+        }}
+        project = xcodeproject.XcodeProject(self.project_path)
+        resolver = xcodeproject.BuildSettingsResolver(project, xcconfig_loader=xcconfig_files.get)
+        target = project.target_for_name('PythonXcodeTest')
+        settings = resolver.resolve(target, 'Debug')
+        self.assertEquals(settings['GCC_PREPROCESSOR_DEFINITIONS'].split(), ['XCCONFIG=1', 'DEBUG=1'])
+        self.assertEquals(settings['OTHER_CFLAGS'], '-DTARGET -DXCCONFIG')
+        self.assertEquals(settings['BUNDLE_IDENTIFIER'], 'com.example.pythonxcodetest-mac')
+        self.assertEquals(settings['LOOP'], ' x')
+        self.assertEquals(resolver.value('BUNDLE_IDENTIFIER', target, 'Debug', {'sdk': 'iphoneos7.0'}), 'com.example.pythonxcodetest-ios')
+        # the release configuration has no xcconfig file
+        self.assertFalse('PLATFORM_NAME' in resolver.resolve(target, 'Release'))
+
+
+class TestXcconfig(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.write('Shared/Base.xcconfig', '// shared settings\nSDKROOT = macosx\nWARNING_CFLAGS = -Wall // -Wextra\n')
+        self.write('App.xcconfig', '#include "Shared/Base.xcconfig"\n#include? "Local.xcconfig"\n\nSDKROOT = iphoneos;\nOTHER_LDFLAGS[sdk=iphoneos*] [arch=arm64] = -ObjC\nOTHER_CFLAGS[config=Debug, sdk=iphonesimulator*] = -DSIM\n')
+        self.write('Lib.xcconfig', '#include "Shared/Base.xcconfig"\nPRODUCT_NAME = Lib\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, relative_path, text):
+        path = os.path.join(self.temp_dir, relative_path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_settings(self):
+        cache = xcodeproject.XcconfigCache()
+        self.assertEquals(cache.settings(os.path.join(self.temp_dir, 'App.xcconfig')), {
+            'SDKROOT': 'iphoneos',
+            'WARNING_CFLAGS': '-Wall',
+            'OTHER_LDFLAGS[sdk=iphoneos*][arch=arm64]': '-ObjC',
+            'OTHER_CFLAGS[config=Debug][sdk=iphonesimulator*]': '-DSIM',
+        })
+        self.assertEquals(cache.settings(os.path.join(self.temp_dir, 'Lib.xcconfig')), {'SDKROOT': 'macosx', 'WARNING_CFLAGS': '-Wall', 'PRODUCT_NAME': 'Lib'})
+        self.assertEquals(cache.parse_count, 3)
+        self.assertEquals(cache.settings(os.path.join(self.temp_dir, 'Missing.xcconfig')), None)
+
+    def test_changes(self):
+        cache = xcodeproject.XcconfigCache()
+        app_path = os.path.join(self.temp_dir, 'App.xcconfig')
+        settings = cache.settings(app_path)
+        self.assertTrue(cache.settings(app_path) is settings)
+        self.write('Local.xcconfig', 'LOCAL = 1\n')
+        self.assertEquals(cache.settings(app_path)['LOCAL'], '1')
+        self.write('Shared/Base.xcconfig', 'WARNING_CFLAGS = -Weverything\n')
+        self.assertEquals(cache.settings(app_path)['WARNING_CFLAGS'], '-Weverything')
+        self.assertEquals(cache.parse_count, 4)
+
+    def test_resolver(self):
+        project_path = copy_fixture_project(os.path.join(self.temp_dir, 'Test.xcodeproj'))
+        project_file = xcodeproject.pbxproj.PBXProjFile(os.path.join(project_path, 'project.pbxproj'))
+        writer = xcodeproject.pbxproj.PBXProjWriter(project_file)
+        writer.set_property('1BC96D0C188311C700AFCEDA', 'path', '../App.xcconfig')
+        writer.set_property('1BC96D15188311C700AFCEDA', 'baseConfigurationReference', '1BC96D0C188311C700AFCEDA')
+        writer.write()
+        project_file.close()
+
+        project = xcodeproject.XcodeProject(project_path)
+        resolver = xcodeproject.BuildSettingsResolver(project)
+        target = project.target_for_name('PythonXcodeTest')
+        self.assertEquals(resolver.value('WARNING_CFLAGS', target, 'Debug'), '-Wall')
+        self.assertEquals(resolver.value('OTHER_CFLAGS', target, 'Debug', {'sdk': 'iphonesimulator7.0'}), '-DSIM')
+        self.assertEquals(resolver.value('OTHER_CFLAGS', target, 'Debug', {'sdk': 'iphoneos7.0'}), '')
+
+
+class TestPBXProjParser(unittest.TestCase):
+
+    def parse(self, text):
+        return xcodeproject.pbxproj.PBXProjParser(text).parse()
+
+    def test_values(self):
+        data = self.parse('// !$*UTF8*$!\n{\n\ta = b; /* comment */ c = "quoted \\"value\\"\\n";\n\td = (x, "y z", {e = f;}, ); g = <0a0B>; }\n')
+        self.assertEquals(data, {'a': 'b', 'c': 'quoted "value"\n', 'd': ['x', 'y z', {'e': 'f'}], 'g': '\x0a\x0b'})
+
+    def test_unicode(self):
+        data = self.parse('{ a = "caf\xc3\xa9"; b = "\\U00e9"; }')
+        self.assertEquals(data, {'a': u'caf\xe9', 'b': u'\xe9'})
+
+    def test_objects(self):
+        parser = xcodeproject.pbxproj.PBXProjParser('{\n\tobjects = {\n\t\tA = {isa = X; };\n\t\tB = {\n\t\t\tisa = Y;\n\t\t};\n\t};\n\trootObject = A;\n}\n')
+        data = parser.parse()
+        self.assertEquals(data['objects'], {'A': {'isa': 'X'}, 'B': {'isa': 'Y'}})
+        self.assertEquals(parser.object_line_number_map, {'A': [3, 3], 'B': [4, 6]})
+        self.assertEquals(parser.object_span_map, {'A': (17, 33), 'B': (36, 58)})
+
+    def test_interning(self):
+        data = self.parse('{ objects = { A = {isa = PBXBuildFile; fileRef = B; }; B = {isa = PBXFileReference; }; C = {isa = PBXBuildFile; fileRef = B; }; }; }')
+        objects = data['objects']
+        self.assertIs(objects['A']['isa'], objects['C']['isa'])
+        self.assertIs(objects['A']['fileRef'], objects['C']['fileRef'])
+        self.assertIs(objects['A'].keys()[0], objects['C'].keys()[0])
+
+    def test_errors(self):
+        self.assertRaises(xcodeproject.pbxproj.PBXProjParseError, self.parse, '{ a = b; ')
+        self.assertRaises(xcodeproject.pbxproj.PBXProjParseError, self.parse, '{ a = b }')
+        self.assertRaises(xcodeproject.pbxproj.PBXProjParseError, self.parse, '{ objects = { A = {}; A = {}; }; }')
+
+    def test_error_after_long_whitespace(self):
+        # used to backtrack exponentially in the length of the whitespace run
+        start = time.time()
+        self.assertRaises(xcodeproject.pbxproj.PBXProjParseError, self.parse, '{ a = b;' + ' \t\n' * 1000 + '/* c */ // d\n' + ' ' * 1000 + '@')
+        self.assertTrue(time.time() - start < 1)
+        self.assertEquals(self.parse('{ /* a */ /* b */ a = b; // c\n\t}'), {'a': 'b'})
+
+    def test_invalid_octal_escape(self):
+        self.assertEquals(self.parse('{ a = "\\101\\377"; }'), {'a': 'A\xff'})
+        with self.assertRaises(xcodeproject.pbxproj.PBXProjParseError) as context:
+            self.parse('{\n\ta = b;\n\tc = "x\\777";\n\td = e;\n}')
+        self.assertTrue('on line 3 ' in str(context.exception))
+        self.assertRaises(xcodeproject.pbxproj.PBXProjParseError, self.parse, '{ a = ("caf\xc3", "\\777"); }')
+
+    def test_odd_length_data(self):
+        with self.assertRaises(xcodeproject.pbxproj.PBXProjParseError) as context:
+            self.parse('{\n\ta = <0a0>;\n\tb = c;\n}')
+        self.assertTrue('on line 2 ' in str(context.exception))
+        self.assertRaises(xcodeproject.pbxproj.PBXProjParseError, self.parse, '{ a = (<0a 0b 0>); }')
+
         
         
 
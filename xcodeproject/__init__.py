@@ -1 +1,11 @@
-from .xcodeproject import *
\ No newline at end of file
+from .xcodeproject import *
+from .cache import ParseCache
+from .buildsettings import BuildSettingEdit, BuildSettingsEditor, BuildSettingsResolver
+from .discovery import iter_project_paths
+from .xcconfig import XcconfigCache, load_xcconfig
+from .settingsstore import BuildSettingsStore, SettingsFilter
+from .interning import InternPool
+from .missingfiles import DirectoryListingCache, missing_file_references
+from .query import Query, QuerySyntaxError
+from .workspace import XcodeWorkspace
+from .pbxproj import iter_objects
@@ -0,0 +1,363 @@
+#!usr/bin/env python
+
+import os
+import re
+import fnmatch
+import collections
+
+from . import xcconfig
+
+
+class BuildSettingEdit(collections.namedtuple('BuildSettingEdit', ['operation', 'name', 'value'])):
+    """
+    A change to one build setting.
+
+    ``operation`` is ``'set'``, ``'unset'`` or ``'append'``. Appending adds
+    ``value`` to a list setting unless it is already in the list. A string
+    setting becomes a list of its space-separated words followed by the value,
+    and a setting that is not defined yet becomes ``$(inherited)`` followed by
+    the value.
+
+    """
+
+    operations = ('set', 'unset', 'append')
+
+    @classmethod
+    def from_argument(cls, operation, argument):
+        """Create an edit from a ``NAME=VALUE`` command line argument, or ``NAME`` for unset."""
+        if operation == 'unset':
+            return cls(operation, argument, None)
+        name, separator, value = argument.partition('=')
+        if not separator or not name:
+            raise ValueError('Expected NAME=VALUE instead of "{}"'.format(argument))
+        return cls(operation, name, value)
+
+    def apply(self, build_settings):
+        """Apply the edit to a dictionary of build settings in place. Returns True if it changed anything."""
+        current_value = build_settings.get(self.name)
+        if self.operation == 'unset':
+            if self.name not in build_settings:
+                return False
+            del build_settings[self.name]
+            return True
+        if self.operation == 'set':
+            if current_value == self.value:
+                return False
+            build_settings[self.name] = self.value
+            return True
+
+        if current_value is None:
+            build_settings[self.name] = ['$(inherited)', self.value]
+        elif isinstance(current_value, list):
+            if self.value in current_value:
+                return False
+            build_settings[self.name] = current_value + [self.value]
+        else:
+            values = current_value.split()
+            if self.value in values:
+                return False
+            build_settings[self.name] = values + [self.value]
+        return True
+
+
+class BuildSettingsEditor(object):
+    """
+    Applies a batch of :py:class:`BuildSettingEdit` instances, in order, to the
+    build configurations of a project.
+
+    :param list edits: The edits.
+    :param bool targets: If true, edit the target-level build configurations instead of
+                         the project-level ones.
+    :param list target_names: Only edit the targets with these names. Implies ``targets``.
+    :param list configuration_names: Only edit the configurations with these names,
+                                     like ``['Release']``.
+
+    """
+
+    def __init__(self, edits, targets=False, target_names=None, configuration_names=None):
+        self.edits = list(edits)
+        self.targets = targets or bool(target_names)
+        self.target_names = set(target_names) if target_names else None
+        self.configuration_names = set(configuration_names) if configuration_names else None
+
+    def build_configurations(self, project):
+        if self.targets:
+            configuration_lists = [target.buildConfigurationList for target in sorted(project.targets(), key=lambda target: target.name) if self.target_names is None or target.name in self.target_names]
+        else:
+            configuration_lists = [project.root_object().buildConfigurationList]
+        return [config for configuration_list in configuration_lists for config in configuration_list if self.configuration_names is None or config.name in self.configuration_names]
+
+    def apply(self, project, writer):
+        """
+        Record the changes for the given project in a :py:class:`xcodeproject.pbxproj.PBXProjWriter`
+        for its project file. Returns the build configurations that change.
+
+        """
+        changed_configurations = []
+        for config in self.build_configurations(project):
+            build_settings = config.data.get('buildSettings', {})
+            changed_build_settings = dict(build_settings)
+            changed = False
+            for edit in self.edits:
+                changed = edit.apply(changed_build_settings) or changed
+            if not changed:
+                continue
+
+            for name in set(build_settings) | set(changed_build_settings):
+                if name not in changed_build_settings:
+                    writer.remove_property(config.id, ('buildSettings', name))
+                elif build_settings.get(name) != changed_build_settings[name]:
+                    writer.set_property(config.id, ('buildSettings', name), changed_build_settings[name])
+            if changed_build_settings != build_settings:
+                changed_configurations.append(config)
+        return changed_configurations
+
+
+def identifier(value):
+    return re.sub(r'[^A-Za-z0-9_]', '_', value if not value[:1].isdigit() else '_' + value)
+
+
+class BuildSettingsResolver(object):
+    """
+    Computes the effective build settings of a project or target in a build
+    configuration, layered the way Xcode does it, from lowest to highest:
+
+    1. a few built-in settings like ``TARGET_NAME`` and ``SRCROOT``
+    2. the xcconfig file of the project-level configuration
+    3. the project-level build settings
+    4. the xcconfig file of the target-level configuration
+    5. the target-level build settings
+
+    ``$(inherited)`` expands to the value of the same setting in the layers
+    below. Other ``$(NAME)`` and ``${NAME}`` references expand to the effective
+    value of that setting, optionally with operators like ``:lower`` or
+    ``:rfc1034identifier``. Settings with conditions like ``NAME[sdk=iphoneos*]``
+    apply if the conditions match those given to :py:meth:`resolve`.
+
+    Layers, xcconfig files and resolved results are memoized, so resolving
+    every target and configuration of a project costs little more than
+    expanding each of their settings once. The project-level settings are
+    expanded once per configuration, and their values are reused for every
+    target that does not define a setting they depend on.
+
+    :param project: An :py:class:`xcodeproject.XcodeProject`.
+    :param xcconfig_loader: A callable that takes the absolute path of an xcconfig
+                            file and returns a dictionary of its settings, or None if
+                            it cannot be read. Defaults to :py:func:`xcodeproject.xcconfig.load_xcconfig`.
+
+    """
+
+    reference_re = re.compile(r'\$(?:\(([^()]*)\)|\{([^{}]*)\})')
+    conditional_key_re = re.compile(r'^([^\[]+)((?:\[[^\]=]+=[^\]]*\])+)$')
+    condition_re = re.compile(r'\[([^\]=]+)=([^\]]*)\]')
+
+    operators = {
+        'lower': lambda value: value.lower(),
+        'upper': lambda value: value.upper(),
+        'identifier': identifier,
+        'c99extidentifier': identifier,
+        'rfc1034identifier': lambda value: re.sub(r'[^A-Za-z0-9.\-]', '-', value),
+        'base': lambda value: os.path.splitext(os.path.basename(value))[0],
+        'dir': lambda value: os.path.dirname(value) + '/' if os.path.dirname(value) else '',
+        'file': lambda value: os.path.basename(value),
+        'suffix': lambda value: os.path.splitext(value)[1],
+        'standardizepath': lambda value: os.path.normpath(value) if value else value,
+    }
+
+    def __init__(self, project, xcconfig_loader=None):
+        self.project = project
+        self.xcconfig_loader = xcconfig_loader or xcconfig.load_xcconfig
+        self.xcconfig_settings_cache = {}
+        self.configuration_layers_cache = {}
+        self.conditional_layer_cache = {}
+        self.resolved_settings_cache = {}
+        # (configuration name, conditions) -> evaluator of the project-level layers
+        self.project_evaluator_cache = {}
+
+    def resolve(self, target=None, configuration_name=None, conditions=None):
+        """
+        Return a dictionary of the effective values, as strings, of all settings defined
+        for the target, or at the project level if it is None, in the configuration with
+        the given name, by default the default configuration.
+
+        :param dict conditions: Values for setting conditions other than ``config``,
+                                like ``{'sdk': 'iphoneos', 'arch': 'arm64'}``.
+
+        """
+        configuration_name = configuration_name or self.project.root_object().buildConfigurationList.defaultConfigurationName
+        conditions = dict(conditions or {}, config=configuration_name)
+        key = (target.id if target else None, configuration_name, tuple(sorted(conditions.items())))
+        if key not in self.resolved_settings_cache:
+            evaluator = self.evaluator(target, configuration_name, conditions)
+            names = set()
+            for layer in evaluator.layers:
+                names.update(layer)
+            self.resolved_settings_cache[key] = dict((name, evaluator.value(name)) for name in names)
+            if not target:
+                self.project_evaluator_cache[key[1:]] = evaluator
+        return self.resolved_settings_cache[key]
+
+    def evaluator(self, target, configuration_name, conditions):
+        layers = self.layers(target, configuration_name, conditions)
+        if not target:
+            return SettingsEvaluator(layers, self.reference_re, self.operators)
+        # the project-level layers are the bottom of every target's stack
+        self.resolve(None, configuration_name, conditions)
+        base = self.project_evaluator_cache[configuration_name, tuple(sorted(conditions.items()))]
+        overridden_names = set(name for name, value in layers[0].items() if base.layers[0].get(name) != value)
+        for layer in layers[len(base.layers):]:
+            overridden_names.update(layer)
+        return SettingsEvaluator(layers, self.reference_re, self.operators, base, overridden_names)
+
+    def value(self, name, target=None, configuration_name=None, conditions=None):
+        """Return the effective value of one setting, or an empty string if it is not defined."""
+        return self.resolve(target, configuration_name, conditions).get(name, '')
+
+    def layers(self, target, configuration_name, conditions):
+        project_root = self.project.root_object()
+        layers = [self.builtin_settings(target, configuration_name)]
+        layers.extend(self.configuration_layers(project_root.buildConfigurationList, configuration_name))
+        if target:
+            layers.extend(self.configuration_layers(target.buildConfigurationList, configuration_name))
+        return [self.layer_for_conditions(layer, conditions) for layer in layers]
+
+    def builtin_settings(self, target, configuration_name):
+        source_root = self.project.source_root()
+        settings = {
+            'PROJECT_NAME': os.path.splitext(self.project.name)[0],
+            'PROJECT_DIR': source_root,
+            'PROJECT_FILE_PATH': self.project.path,
+            'SRCROOT': source_root,
+            'SOURCE_ROOT': source_root,
+            'CONFIGURATION': configuration_name,
+        }
+        if target:
+            settings['TARGET_NAME'] = settings['TARGETNAME'] = target.name
+        return settings
+
+    def configuration_layers(self, configuration_list, configuration_name):
+        """Return the xcconfig and build settings layers of one configuration, memoized per configuration list."""
+        key = (configuration_list.id, configuration_name)
+        if key not in self.configuration_layers_cache:
+            configurations = dict((config.name, config) for config in configuration_list)
+            # like Xcode, fall back to the default configuration
+            config = configurations.get(configuration_name) or configurations.get(configuration_list.data.get('defaultConfigurationName'))
+            layers = []
+            if config:
+                xcconfig_settings = self.xcconfig_settings(config)
+                if xcconfig_settings:
+                    layers.append(xcconfig_settings)
+                layers.append(config.build_settings())
+            self.configuration_layers_cache[key] = layers
+        return self.configuration_layers_cache[key]
+
+    def xcconfig_settings(self, config):
+        if 'baseConfigurationReference' not in config.data:
+            return None
+        path = self.file_reference_path(config.baseConfigurationReference)
+        if not path:
+            return None
+        if path not in self.xcconfig_settings_cache:
+            self.xcconfig_settings_cache[path] = self.xcconfig_loader(path)
+        return self.xcconfig_settings_cache[path]
+
+    def file_reference_path(self, file_reference):
+        """Return the absolute path of a file reference, or None if it is relative to something other than the project."""
+        path = file_reference.resolved_path()
+        if path is None:
+            # not in the group tree, so only paths that do not depend on a group work
+            path = self.project.resolved_path_for_data(file_reference.data, None, self.project.source_root())
+        if not path or not os.path.isabs(path):
+            return None
+        return path
+
+    def layer_for_conditions(self, layer, conditions):
+        # most layers have no conditional settings and are used as they are
+        key = (id(layer), tuple(sorted(conditions.items())))
+        if key in self.conditional_layer_cache:
+            return self.conditional_layer_cache[key][1]
+        conditional_keys = [name for name in layer if '[' in name]
+        if not conditional_keys:
+            filtered_layer = layer
+        else:
+            filtered_layer = dict((name, value) for name, value in layer.items() if '[' not in name)
+            for name in sorted(conditional_keys):
+                match = self.conditional_key_re.match(name)
+                if match and all(fnmatch.fnmatchcase(conditions.get(condition_name, ''), pattern) for condition_name, pattern in self.condition_re.findall(match.group(2))):
+                    filtered_layer[match.group(1)] = layer[name]
+        # keep the layer alive so that its id is not reused
+        self.conditional_layer_cache[key] = (layer, filtered_layer)
+        return filtered_layer
+
+
+class SettingsEvaluator(object):
+    """
+    Expands the settings of one stack of layers, memoizing each value per layer.
+
+    Values in the lower layers are taken from the ``base`` evaluator of those
+    layers, if given, unless they depend on one of ``overridden_names``, the
+    settings that this stack defines differently.
+
+    """
+
+    def __init__(self, layers, reference_re, operators, base=None, overridden_names=()):
+        self.layers = layers
+        self.reference_re = reference_re
+        self.operators = operators
+        self.base = base
+        self.base_level_count = len(base.layers) if base else 0
+        self.overridden_names = frozenset(overridden_names)
+        self.values = {}
+        # (name, level) -> names of the settings that the value was expanded from
+        self.dependencies = {}
+        self.in_progress = set()
+
+    def value(self, name, level=None):
+        """The value of a setting as seen from the given layer, by default the top one."""
+        return self.value_and_dependencies(name, level)[0]
+
+    def value_and_dependencies(self, name, level=None):
+        level = len(self.layers) - 1 if level is None else level
+        while level >= 0 and name not in self.layers[level]:
+            level -= 1
+        if level < 0:
+            return '', frozenset()
+        key = (name, level)
+        if key in self.values:
+            return self.values[key], self.dependencies[key]
+        if level < self.base_level_count and key in self.base.values and self.overridden_names.isdisjoint(self.base.dependencies[key]):
+            self.values[key] = self.base.values[key]
+            self.dependencies[key] = self.base.dependencies[key]
+            return self.values[key], self.dependencies[key]
+        if key in self.in_progress:
+            # a setting that refers to itself
+            return '', frozenset([name])
+        value = self.layers[level][name]
+        if isinstance(value, list):
+            value = ' '.join(value)
+        if '$' not in value:
+            self.values[key] = value
+            self.dependencies[key] = frozenset()
+            return value, self.dependencies[key]
+        self.in_progress.add(key)
+        dependencies = set()
+        value = self.reference_re.sub(lambda match: self.expand_reference(match.group(1) or match.group(2) or '', name, level, dependencies), value)
+        self.in_progress.discard(key)
+        self.values[key] = value
+        self.dependencies[key] = frozenset(dependencies)
+        return value, self.dependencies[key]
+
+    def expand_reference(self, expression, name, level, dependencies):
+        reference_name, operators = expression.split(':')[0], expression.split(':')[1:]
+        if reference_name == 'inherited':
+            dependencies.add(name)
+            value, value_dependencies = self.value_and_dependencies(name, level - 1) if level > 0 else ('', ())
+        else:
+            dependencies.add(reference_name)
+            value, value_dependencies = self.value_and_dependencies(reference_name)
+        dependencies.update(value_dependencies)
+        for operator in operators:
+            operator = operator.split('=')[0]
+            if operator in self.operators:
+                value = self.operators[operator](value)
+        return value
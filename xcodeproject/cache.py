@@ -0,0 +1,182 @@
+#!usr/bin/env python
+
+import os
+import time
+import errno
+import hashlib
+import tempfile
+import cPickle as pickle
+
+
+class ParseCache(object):
+    """
+    A persistent, size-bounded cache of parsed project.pbxproj files.
+
+    Each entry is stored in its own file in the cache directory, named after
+    a hash of the project file path. An entry is used if the project file's
+    size and content hash still match. The modification time is not enough,
+    because a tool that rewrites a file in place can keep its size within the
+    resolution of the modification time. When the total size of all
+    entries exceeds ``max_size``, the least recently used entries are removed.
+    The total size is determined by listing the directory once and then kept
+    up to date as entries are stored, so it does not account for entries that
+    other processes store in the same directory until the next eviction.
+
+    :param str directory: The cache directory, created if necessary.
+    :param int max_size: The maximum total size of all entries in bytes.
+
+    """
+
+    # bump this whenever the layout of the cached data changes
+    format_version = 1
+    default_max_size = 512 * 1024 * 1024
+    entry_suffix = '.pbxprojcache'
+
+    def __init__(self, directory, max_size=None):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = max_size if max_size is not None else self.default_max_size
+        self.hits = 0
+        self.misses = 0
+        # total size of all entries, None until the directory is first listed
+        self.known_total_size = None
+
+    def entry_path_for_path(self, path):
+        return os.path.join(self.directory, hashlib.sha1(os.path.abspath(path)).hexdigest() + self.entry_suffix)
+
+    def load(self, path, stat_result, buffer):
+        """
+        Return the cached payload for the file at the given path, or None if there
+        is no valid entry for it. ``stat_result`` and ``buffer`` describe the current
+        state and content of the file.
+
+        """
+        entry_path = self.entry_path_for_path(path)
+        try:
+            with open(entry_path, 'rb') as f:
+                header = pickle.load(f)
+                if not self.header_matches(header, path, stat_result, buffer):
+                    self.misses += 1
+                    return None
+                payload = pickle.load(f)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, ImportError):
+            self.misses += 1
+            return None
+
+        # the modification time of the entry file tracks recent use for eviction
+        self.touch(entry_path)
+        self.hits += 1
+        return payload
+
+    def header_matches(self, header, path, stat_result, buffer):
+        if header.get('format_version') != self.format_version or header.get('path') != os.path.abspath(path):
+            return False
+        if header.get('size') != stat_result.st_size:
+            return False
+        # also catches files that were touched but not changed, e.g. after a branch switch
+        return header.get('content_hash') == self.content_hash(buffer)
+
+    def store(self, path, stat_result, buffer, payload):
+        """Store the payload for the file at the given path and evict old entries if necessary."""
+        header = {
+            'format_version': self.format_version,
+            'path': os.path.abspath(path),
+            'mtime': stat_result.st_mtime,
+            'size': stat_result.st_size,
+            'content_hash': self.content_hash(buffer),
+            'stored': time.time(),
+        }
+        self.ensure_directory()
+        if self.known_total_size is None:
+            self.known_total_size = self.total_size()
+        entry_path = self.entry_path_for_path(path)
+        try:
+            replaced_size = os.stat(entry_path).st_size
+        except OSError:
+            replaced_size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(header, f, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(payload, f, pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.rename(temp_path, entry_path)
+        except:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self.known_total_size += size - replaced_size
+        if self.known_total_size > self.max_size:
+            self.evict()
+
+    def content_hash(self, buffer):
+        return hashlib.sha1(buffer).hexdigest()
+
+    def ensure_directory(self):
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def touch(self, entry_path):
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+
+    def entries(self):
+        """
+        Return a list of ``(project_file_path, entry_size, last_used)`` tuples
+        for all entries, most recently used first.
+
+        """
+        entries = []
+        for entry_path, size, last_used in self.entry_files():
+            try:
+                with open(entry_path, 'rb') as f:
+                    header = pickle.load(f)
+                project_file_path = header.get('path', '(unknown)')
+            except (IOError, OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, ImportError):
+                project_file_path = '(unreadable)'
+            entries.append((project_file_path, size, last_used))
+        return entries
+
+    def entry_files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entry_files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.entry_suffix):
+                continue
+            entry_path = os.path.join(self.directory, name)
+            try:
+                stat_result = os.stat(entry_path)
+            except OSError:
+                continue
+            entry_files.append((entry_path, stat_result.st_size, stat_result.st_mtime))
+        entry_files.sort(key=lambda entry: entry[2], reverse=True)
+        return entry_files
+
+    def total_size(self):
+        return sum(size for entry_path, size, last_used in self.entry_files())
+
+    def evict(self, max_size=None):
+        """Remove least recently used entries until the total size is at most ``max_size``."""
+        max_size = max_size if max_size is not None else self.max_size
+        entry_files = self.entry_files()
+        total_size = sum(size for entry_path, size, last_used in entry_files)
+        evicted_count = 0
+        while entry_files and total_size > max_size:
+            entry_path, size, last_used = entry_files.pop()
+            try:
+                os.unlink(entry_path)
+            except OSError:
+                continue
+            total_size -= size
+            evicted_count += 1
+        self.known_total_size = total_size
+        return evicted_count
+
+    def clear(self):
+        """Remove all entries."""
+        return self.evict(max_size=0)
@@ -0,0 +1,95 @@
+#!usr/bin/env python
+
+import os
+import fnmatch
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # backport for Python 2, see https://pypi.python.org/pypi/scandir
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+DEFAULT_PRUNED_DIRECTORY_NAMES = ('.git', 'DerivedData', 'Pods')
+
+
+def iter_project_paths(root, exclude_patterns=(), pruned_directory_names=DEFAULT_PRUNED_DIRECTORY_NAMES, skip_callback=None):
+    """
+    Find all .xcodeproj bundles below the given root directory and yield their
+    absolute paths as they are found, in a stable depth-first order.
+
+    The walk does not descend into .xcodeproj bundles, into directories named
+    in ``pruned_directory_names`` or into directories matching one of the glob
+    ``exclude_patterns``. Patterns without a slash are matched against the
+    directory name, patterns with one against its path relative to the root,
+    so ``Tests`` and ``Vendor/*/Tests`` both work. Symbolic links to
+    directories are not followed.
+
+    :param str root: The directory to search.
+    :param list exclude_patterns: Glob patterns of directories to skip.
+    :param list pruned_directory_names: Names of directories that are always skipped.
+    :param skip_callback: Called with the path of each directory skipped because of
+                          an exclude pattern.
+
+    """
+    root = os.path.abspath(os.path.expanduser(root))
+    pruned_directory_names = frozenset(pruned_directory_names)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            names = sorted(subdirectory_names(directory))
+        except OSError:
+            continue
+
+        subdirectories = []
+        for name in names:
+            path = os.path.join(directory, name)
+            if name in pruned_directory_names:
+                continue
+            if exclude_patterns and is_excluded(name, os.path.relpath(path, root), exclude_patterns):
+                if skip_callback:
+                    skip_callback(path)
+                continue
+            if name.endswith('.xcodeproj'):
+                yield path
+                continue
+            subdirectories.append(path)
+        # reversed so that the stack pops them in sorted order
+        stack.extend(reversed(subdirectories))
+
+
+def is_excluded(name, relative_path, exclude_patterns):
+    path_components = relative_path.split(os.sep)
+    for pattern in exclude_patterns:
+        if '/' not in pattern:
+            if fnmatch.fnmatchcase(name, pattern):
+                return True
+            continue
+        # like in the shell, wildcards in path patterns do not match across "/"
+        pattern_components = pattern.strip('/').split('/')
+        if len(pattern_components) == len(path_components) and all(fnmatch.fnmatchcase(c, p) for c, p in zip(path_components, pattern_components)):
+            return True
+    return False
+
+
+def subdirectory_names(directory):
+    if scandir:
+        # scandir usually knows the entry type without an extra stat() call per entry
+        entries = scandir(directory)
+        try:
+            return [entry.name for entry in entries if entry.is_dir(follow_symlinks=False)]
+        finally:
+            # older versions of the backport have no close() and close when exhausted
+            if hasattr(entries, 'close'):
+                entries.close()
+
+    names = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            names.append(name)
+    return names
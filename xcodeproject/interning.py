@@ -0,0 +1,115 @@
+#!usr/bin/env python
+
+
+class InternPool(object):
+    """
+    A pool of strings that parsers share, so that equal strings in the data of
+    different projects are stored only once.
+
+    Without a pool, the parser interns dictionary keys, object IDs and unquoted
+    values with the built-in :py:func:`intern`, and data loaded from a parse
+    cache is not interned at all, so each loaded copy has its own strings. A
+    pool covers all of these, and also quoted strings up to ``max_length``
+    characters, like ``"$(TARGET_NAME)"``, ``"<group>"`` or file paths, and
+    Unicode strings, which the built-in cannot intern.
+
+    The pool keeps its strings alive until :py:meth:`release` is called, so it
+    pays off when many projects are held in memory at once or loaded one after
+    the other in one run, most of all when they are loaded from a parse cache.
+    Pooling the strings of cached data takes an extra pass over it, which costs
+    about as much as unpickling it.
+
+    :param int max_length: Quoted strings longer than this are not pooled.
+
+    """
+
+    def __init__(self, max_length=256):
+        self.max_length = max_length
+        self.strings = {}
+        self.lookup_count = 0
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, string):
+        """Return the pooled string equal to the given one, adding it if there is none yet."""
+        self.lookup_count += 1
+        return self.strings.setdefault(string, string)
+
+    def intern_quoted(self, string):
+        if len(string) > self.max_length:
+            return string
+        self.lookup_count += 1
+        return self.strings.setdefault(string, string)
+
+    def intern_in_place(self, value):
+        """
+        Replace all strings in a parsed dictionary or list, including dictionary keys,
+        by pooled ones. The dictionaries and lists are updated instead of copied, so
+        that the replaced strings can be freed right away.
+
+        """
+        pool_string = self.strings.setdefault
+        max_length = self.max_length
+        lookup_count = 0
+        pending = [value]
+        while pending:
+            container = pending.pop()
+            if isinstance(container, dict):
+                for key, element in container.items():
+                    if isinstance(element, basestring):
+                        if len(element) <= max_length:
+                            element = pool_string(element, element)
+                            lookup_count += 1
+                    elif isinstance(element, (dict, list)):
+                        pending.append(element)
+                    pooled_key = pool_string(key, key)
+                    lookup_count += 1
+                    if pooled_key is not key:
+                        del container[key]
+                    container[pooled_key] = element
+            else:
+                for index, element in enumerate(container):
+                    if isinstance(element, basestring):
+                        if len(element) <= max_length:
+                            container[index] = pool_string(element, element)
+                            lookup_count += 1
+                    elif isinstance(element, (dict, list)):
+                        pending.append(element)
+        self.lookup_count += lookup_count
+        return value
+
+    def intern_payload(self, payload):
+        """
+        Pool the strings of a ``(data, object_line_number_map, object_span_map,
+        class_name_to_object_ids_map)`` tuple loaded from a parse cache in place,
+        see :py:meth:`intern_in_place`, and return it.
+
+        """
+        data, object_line_number_map, object_span_map, class_name_to_object_ids_map = payload
+        self.intern_in_place(data)
+        # the object IDs are pooled by now, so these only swap in the pooled strings
+        for object_id_map in object_line_number_map, object_span_map:
+            for object_id, value in object_id_map.items():
+                del object_id_map[object_id]
+                object_id_map[self.strings.setdefault(object_id, object_id)] = value
+        self.intern_in_place(class_name_to_object_ids_map)
+        return payload
+
+    def hit_count(self):
+        # every lookup that did not find a string added one
+        return self.lookup_count - len(self.strings)
+
+    def hit_rate(self):
+        """Return the fraction of lookups that found an existing string."""
+        if not self.lookup_count:
+            return 0.0
+        return float(self.hit_count()) / self.lookup_count
+
+    def stats(self):
+        return {'strings': len(self.strings), 'lookups': self.lookup_count, 'hits': self.hit_count(), 'hit_rate': self.hit_rate()}
+
+    def release(self):
+        """Drop all pooled strings and reset the statistics. Strings still used by loaded projects stay alive."""
+        self.strings = {}
+        self.lookup_count = 0
@@ -0,0 +1,98 @@
+#!usr/bin/env python
+
+import os
+import multiprocessing.pool
+
+
+class DirectoryListingCache(object):
+    """
+    Caches the names of the entries of directories, so that checking whether
+    many files exist takes one listing per directory instead of one ``stat()``
+    call per file. Keep one instance for a whole run to list directories shared
+    by several projects only once.
+
+    :param int threads: The number of threads that list directories in :py:meth:`prefetch`.
+
+    """
+
+    def __init__(self, threads=8):
+        self.threads = threads
+        # directory path -> frozenset of entry names, or None if it cannot be listed
+        self.listings = {}
+        self.listing_count = 0
+
+    def prefetch(self, directories):
+        """List all given directories that are not cached yet, in parallel."""
+        directories = [directory for directory in set(directories) if directory not in self.listings]
+        if not directories:
+            return
+        if self.threads > 1 and len(directories) > 1:
+            pool = multiprocessing.pool.ThreadPool(min(self.threads, len(directories)))
+            try:
+                listings = pool.map(self.list_directory, directories)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            listings = [self.list_directory(directory) for directory in directories]
+        self.listings.update(zip(directories, listings))
+        self.listing_count += len(directories)
+
+    @classmethod
+    def list_directory(cls, directory):
+        try:
+            return frozenset(os.listdir(directory))
+        except OSError:
+            return None
+
+    def names(self, directory):
+        if directory not in self.listings:
+            self.prefetch([directory])
+        return self.listings[directory]
+
+    def exists(self, path):
+        directory, name = os.path.split(path)
+        names = self.names(directory)
+        if names is None:
+            return False
+        if name in names:
+            return True
+        # the names may differ only in case on a case-insensitive file system
+        return os.path.lexists(path)
+
+
+def file_reference_paths(project):
+    """
+    Return a list of ``(object_id, path)`` tuples for the file references of the project
+    whose paths can be resolved to absolute paths, sorted by ID. See
+    :py:meth:`xcodeproject.XcodeProject.resolved_path_map`.
+
+    """
+    resolved_paths = project.resolved_path_map()
+    source_root = project.source_root()
+    paths = []
+    for object_id in sorted(project.project_file.class_name_to_object_ids_map.get('PBXFileReference', ())):
+        path = resolved_paths.get(object_id)
+        if path is None:
+            # not in the group tree, so only paths that do not depend on a group work
+            path = project.resolved_path_for_data(project.object_data[object_id], None, source_root)
+        if path and os.path.isabs(path):
+            paths.append((object_id, path))
+    return paths
+
+
+def missing_file_references(project, listing_cache=None):
+    """
+    Return a list of ``(object_id, path)`` tuples for the file references of the project
+    whose files do not exist, sorted by ID. References relative to build products, SDKs
+    and other source trees outside the project are not checked.
+
+    :param listing_cache: An optional :py:class:`DirectoryListingCache` shared with
+                          other calls.
+
+    """
+    if listing_cache is None:
+        listing_cache = DirectoryListingCache()
+    paths = file_reference_paths(project)
+    listing_cache.prefetch(set(os.path.dirname(path) for object_id, path in paths))
+    return [(object_id, path) for object_id, path in paths if not listing_cache.exists(path)]
@@ -0,0 +1,863 @@
+#!usr/bin/env python
+
+import os
+import re
+import mmap
+import stat
+import difflib
+import tempfile
+import collections
+
+from . import timing
+
+
+class PBXProjParseError(Exception):
+    pass
+
+
+class PBXProjParser(object):
+    """
+    Single-pass parser for the ASCII ("OpenStep") property list format
+    used by project.pbxproj files.
+
+    The parser works directly on the raw file contents, so it does not need
+    plutil or any other external tool. While reading the toplevel ``objects``
+    dictionary it records the start and end line number and the byte span
+    of every object.
+
+    Instead of producing one token at a time, each regular expression match
+    consumes a complete ``key = value;`` dictionary entry or ``value,`` array
+    element, which keeps the number of Python-level steps per object low.
+
+    Dictionary keys and unquoted string values (isa names, object IDs, file
+    types, YES/NO...) are interned, so each distinct one is stored only once
+    no matter how often it occurs.
+
+    :param data: The contents of a project.pbxproj file, either as a string
+                 or as a read-only :py:class:`mmap.mmap`.
+    :param str path: The path the data was read from, used in error messages.
+    :param intern_pool: An optional :py:class:`xcodeproject.interning.InternPool`
+                        used instead of the built-in :py:func:`intern`, which also
+                        covers quoted strings.
+
+    """
+
+    # whitespace runs and comments alternate, so that a run can only be matched one way
+    # and a failed match does not backtrack through every way of splitting it up
+    whitespace_pattern = r'[ \t\r\n]*(?:(?:/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|//[^\n]*)[ \t\r\n]*)*'
+    quoted_string_pattern = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
+    string_pattern = r'([\w$+/:.\-]+)'
+    data_pattern = r'<([0-9a-fA-F\s]*)>'
+    scalar_pattern = '(?:{}|{}|{})'.format(quoted_string_pattern, string_pattern, data_pattern)
+
+    # groups: quoted key, key, quoted value, value, data value, opening "{" or "(", closing "}"
+    dictionary_entry_re = re.compile(r'{0}(?:(?:{1}|{2}){0}={0}(?:{3}{0};|([{{(]))|(}}))'.format(whitespace_pattern, quoted_string_pattern, string_pattern, scalar_pattern))
+    # groups: quoted value, value, data value, separator, opening "{" or "(", closing ")"
+    array_element_re = re.compile(r'{0}(?:{1}{0}([,)])|([{{(])|(\)))'.format(whitespace_pattern, scalar_pattern))
+    dictionary_start_re = re.compile(r'{0}{{'.format(whitespace_pattern))
+    entry_end_re = re.compile(r'{0};'.format(whitespace_pattern))
+    element_end_re = re.compile(r'{0}([,)])'.format(whitespace_pattern))
+    end_of_data_re = re.compile(r'{0}\Z'.format(whitespace_pattern))
+    whitespace_re = re.compile(whitespace_pattern)
+
+    non_ascii_re = re.compile(r'[\x80-\xff]')
+    escape_re = re.compile(r'\\(U[0-9a-fA-F]{4}|[0-7]{1,3}|.)', re.S)
+    escape_map = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+    def __init__(self, data, path=None, intern_pool=None):
+        self.data = data
+        self.path = path or '(unknown)'
+        self.intern_pool = intern_pool
+        self.intern = intern_pool.intern if intern_pool is not None else intern
+        self.pos = 0
+        self.line_number = 1
+        self.line_number_pos = 0
+        self.object_line_number_map = {}
+        self.object_span_map = {}
+
+    def parse(self):
+        """
+        Parse the data and return the toplevel dictionary.
+
+        The ``objects`` dictionary is included in the returned value, and
+        :py:attr:`object_line_number_map` maps each object ID to a
+        ``[start_line, end_line]`` pair afterwards. :py:attr:`object_span_map`
+        maps each object ID to a ``(start, end)`` pair of byte offsets that
+        covers the object from its ID through the terminating semicolon.
+
+        """
+        self.consume(self.dictionary_start_re, 'Expected "{" at start of file')
+        root = self.parse_dictionary(objects_key='objects')
+        self.consume(self.end_of_data_re, 'Unexpected data after end of toplevel dictionary')
+        return root
+
+    def consume(self, regex, message):
+        match = regex.match(self.data, self.pos)
+        if not match:
+            self.fail(message)
+        self.pos = match.end()
+        return match
+
+    def parse_dictionary(self, objects_key=None):
+        dictionary = {}
+        data = self.data
+        match_entry = self.dictionary_entry_re.match
+        intern_string = self.intern
+        while True:
+            match = match_entry(data, self.pos)
+            if not match:
+                self.fail('Invalid dictionary entry')
+            self.pos = match.end()
+            quoted_key, key, quoted_value, value, data_value, container_start, dictionary_end = match.groups()
+            if dictionary_end:
+                return dictionary
+            if quoted_key is not None:
+                key = self.decode_quoted_string(quoted_key)
+                if not isinstance(key, unicode) and self.intern_pool is None:
+                    key = intern(key)
+            else:
+                key = intern_string(key)
+
+            if container_start:
+                if key == objects_key and container_start == '{':
+                    dictionary[key] = objects = {}
+                    for object_id, object_data, line_number_start, line_number_end, span in self.iter_object_entries():
+                        objects[object_id] = object_data
+                        self.object_line_number_map[object_id] = [line_number_start, line_number_end]
+                        self.object_span_map[object_id] = span
+                else:
+                    dictionary[key] = self.parse_container(container_start)
+                self.consume(self.entry_end_re, 'Expected ";"')
+            elif value is not None:
+                dictionary[key] = intern_string(value)
+            elif quoted_value is not None:
+                dictionary[key] = self.decode_quoted_string(quoted_value)
+            else:
+                dictionary[key] = self.decode_data(data_value)
+
+    def iter_object_entries(self, check_duplicates=True):
+        """
+        Parse the entries of the ``objects`` dictionary one at a time, starting
+        after its opening brace, and yield ``(object_id, data, line_number_start,
+        line_number_end, (byte_offset_start, byte_offset_end))`` tuples.
+        Stops after consuming the closing brace.
+
+        Detecting duplicate object IDs requires remembering all IDs seen so
+        far, ``check_duplicates=False`` turns that off.
+
+        """
+        data = self.data
+        match_entry = self.dictionary_entry_re.match
+        seen_line_numbers = {} if check_duplicates else None
+        while True:
+            match = match_entry(data, self.pos)
+            if not match:
+                self.fail('Invalid object entry')
+            if match.group(7):
+                self.pos = match.end()
+                return
+            if match.group(6) != '{':
+                self.fail('Object is not a dictionary')
+            self.pos = match.end()
+
+            # through the same pool as references to the object, so that they share the string
+            if match.group(1) is not None:
+                object_id = self.intern(match.group(1))
+                byte_offset_start = match.start(1) - 1  # include the opening quote
+            else:
+                object_id = self.intern(match.group(2))
+                byte_offset_start = match.start(2)
+            line_number_start = self.line_number_for_pos(byte_offset_start)
+            if seen_line_numbers is not None:
+                if object_id in seen_line_numbers:
+                    self.fail('Object ID {} seen on line {} and {}'.format(object_id, seen_line_numbers[object_id], line_number_start))
+                seen_line_numbers[object_id] = line_number_start
+
+            object_data = self.parse_dictionary()
+            line_number_end = self.line_number_for_pos(self.pos - 1)
+            self.consume(self.entry_end_re, 'Expected ";"')
+            yield object_id, object_data, line_number_start, line_number_end, (byte_offset_start, self.pos)
+
+    def iter_dictionary_entry_spans(self):
+        """
+        Parse the entries of a dictionary one at a time, starting after its opening
+        brace, and yield ``(key, start, end)`` tuples with the byte span of each entry
+        from its key through the terminating semicolon. Stops after consuming the
+        closing brace.
+
+        """
+        while True:
+            match = self.consume(self.dictionary_entry_re, 'Invalid dictionary entry')
+            quoted_key, key, quoted_value, value, data_value, container_start, dictionary_end = match.groups()
+            if dictionary_end:
+                return
+            if quoted_key is not None:
+                key = self.decode_quoted_string(quoted_key)
+                start = match.start(1) - 1
+            else:
+                start = match.start(2)
+            if container_start:
+                self.parse_container(container_start)
+                self.consume(self.entry_end_re, 'Expected ";"')
+            yield key, start, self.pos
+
+    def iter_objects(self):
+        """
+        Parse the toplevel dictionary only up to the end of its ``objects`` dictionary
+        and yield the objects like :py:meth:`iter_object_entries`, without keeping
+        them or their IDs. Entries before ``objects`` are parsed and discarded.
+
+        """
+        self.consume(self.dictionary_start_re, 'Expected "{" at start of file')
+        while True:
+            match = self.consume(self.dictionary_entry_re, 'Invalid dictionary entry')
+            key, container_start, dictionary_end = match.group(2), match.group(6), match.group(7)
+            if dictionary_end:
+                return
+            if not container_start:
+                continue
+            if key == 'objects' and container_start == '{':
+                for entry in self.iter_object_entries(check_duplicates=False):
+                    yield entry
+                return
+            self.parse_container(container_start)
+            self.consume(self.entry_end_re, 'Expected ";"')
+
+    def parse_array(self):
+        array = []
+        data = self.data
+        match_element = self.array_element_re.match
+        intern_string = self.intern
+        while True:
+            match = match_element(data, self.pos)
+            if not match:
+                self.fail('Invalid array element')
+            self.pos = match.end()
+            quoted_value, value, data_value, separator, container_start, array_end = match.groups()
+            if array_end:
+                return array
+
+            if container_start:
+                array.append(self.parse_container(container_start))
+                separator = self.consume(self.element_end_re, 'Expected "," or ")"').group(1)
+            elif value is not None:
+                array.append(intern_string(value))
+            elif quoted_value is not None:
+                array.append(self.decode_quoted_string(quoted_value))
+            else:
+                array.append(self.decode_data(data_value))
+
+            if separator == ')':
+                return array
+
+    def parse_container(self, container_start):
+        if container_start == '{':
+            return self.parse_dictionary()
+        return self.parse_array()
+
+    def line_number_for_pos(self, pos):
+        # positions are requested in increasing order, so only count the newlines since the last call
+        self.line_number += self.count_newlines(self.line_number_pos, pos)
+        self.line_number_pos = pos
+        return self.line_number
+
+    def count_newlines(self, start, end):
+        if isinstance(self.data, mmap.mmap):
+            # mmap has no count(), slicing copies only this short range
+            return self.data[start:end].count('\n')
+        return self.data.count('\n', start, end)
+
+    def decode_quoted_string(self, value):
+        try:
+            if self.non_ascii_re.search(value):
+                value = value.decode('utf-8')
+            if '\\' in value:
+                if '\\U' in value and not isinstance(value, unicode):
+                    value = value.decode('ascii')
+                value = self.escape_re.sub(self.unescape_match, value)
+        except ValueError as e:
+            # the string was consumed along with the rest of its entry or element
+            self.fail('Invalid quoted string ({})'.format(e), self.pos - 1)
+        if self.intern_pool is not None:
+            return self.intern_pool.intern_quoted(value)
+        return value
+
+    @classmethod
+    def unescape_match(cls, match):
+        escape = match.group(1)
+        if len(escape) == 5 and escape[0] == 'U':
+            return unichr(int(escape[1:], 16))
+        if escape[0] in '01234567':
+            if int(escape, 8) > 0xff:
+                raise ValueError('octal escape \\{} is out of range'.format(escape))
+            character = chr(int(escape, 8))
+            return character.decode('latin-1') if isinstance(match.string, unicode) else character
+        return cls.escape_map.get(escape, escape)
+
+    def decode_data(self, value):
+        value = re.sub(r'\s+', '', value)
+        if len(value) % 2:
+            self.fail('Odd number of hex digits in data', self.pos - 1)
+        return value.decode('hex')
+
+    def fail(self, message, pos=None):
+        if pos is None:
+            pos = self.whitespace_re.match(self.data, self.pos).end()
+        line_number = self.count_newlines(0, pos) + 1
+        raise PBXProjParseError('{} on line {} of {}'.format(message, line_number, self.path))
+
+
+class ObjectChanges(collections.namedtuple('ObjectChanges', ['added', 'removed', 'modified'])):
+    """Sets of the IDs of objects that were added, removed or modified between two versions of a project file."""
+
+    def __nonzero__(self):
+        return bool(self.added or self.removed or self.modified)
+
+
+class PBXProjFile(object):
+    """
+    A memory-mapped project.pbxproj file, parsed in a single pass.
+
+    Besides the parsed data, this keeps the mapping open along with an index
+    of the byte span of every object, so the original source text of any
+    object can be retrieved without reading the file again.
+
+    If a previous version of the same file is given, only the objects whose
+    source text changed are parsed again, and :py:attr:`object_changes` lists
+    the added, removed and modified objects. This relies on the previous
+    mapping still showing the old contents, which is the case when the file
+    was replaced, as Xcode and most other tools do when saving. If the file
+    was rewritten in place, or its layout is not the one Xcode writes, it is
+    parsed completely and the changes are determined by comparing the data.
+
+    :param str path: The path to a project.pbxproj file.
+    :param cache: An optional :py:class:`xcodeproject.cache.ParseCache`. If it has
+                  a valid entry for the file, the parse step is skipped.
+    :param previous: An optional earlier :py:class:`PBXProjFile` for the same path.
+    :param intern_pool: An optional :py:class:`xcodeproject.interning.InternPool` for the
+                        parser. The strings of data loaded from the cache are pooled too.
+
+    """
+
+    # Xcode writes one object per line or block of lines, with the object ID indented by two tabs
+    objects_start_re = re.compile(r'^\tobjects = \{\n', re.M)
+    objects_end_re = re.compile(r'^\t\};\n', re.M)
+    object_start_re = re.compile(r'^\t\t(?:"([^"\\\n]*)"|([\w$+/:.\-]+))[ \t]*(?:/\*[^\n]*?\*/[ \t]*)?=[ \t]*\{', re.M)
+
+    def __init__(self, path, cache=None, previous=None, timings=None, intern_pool=None):
+        self.path = path
+        self.intern_pool = intern_pool
+        with timing.phase(timings, 'read'):
+            with open(path, 'rb') as f:
+                self.stat_result = os.fstat(f.fileno())
+                try:
+                    self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    # empty files cannot be mapped, let the parser report them
+                    self.buffer = ''
+        self.loaded_from_cache = False
+        self.loaded_incrementally = False
+        self.object_changes = None
+
+        if previous is not None:
+            with timing.phase(timings, 'parse') as phase:
+                updated = self.update_from_previous(previous)
+                phase.count = len(self.object_changes.added | self.object_changes.modified) if updated else None
+            if updated:
+                return
+
+        payload = None
+        if cache:
+            with timing.phase(timings, 'cache'):
+                payload = cache.load(path, self.stat_result, self.buffer)
+        if payload:
+            if intern_pool is not None:
+                with timing.phase(timings, 'cache'):
+                    payload = intern_pool.intern_payload(payload)
+            self.data, self.object_line_number_map, self.object_span_map, self.class_name_to_object_ids_map = payload
+            self.loaded_from_cache = True
+        else:
+            with timing.phase(timings, 'parse') as phase:
+                parser = PBXProjParser(self.buffer, path=path, intern_pool=intern_pool)
+                self.data = parser.parse()
+                self.object_line_number_map = parser.object_line_number_map
+                self.object_span_map = parser.object_span_map
+                self.class_name_to_object_ids_map = self.class_name_to_object_ids_map_for_objects(self.data.get('objects', {}))
+                phase.count = len(self.object_span_map)
+            if cache:
+                with timing.phase(timings, 'cache'):
+                    cache.store(path, self.stat_result, self.buffer, (self.data, self.object_line_number_map, self.object_span_map, self.class_name_to_object_ids_map))
+
+        if previous is not None:
+            self.object_changes = self.object_changes_for_objects(previous.data['objects'], self.data['objects'])
+
+    def is_current(self):
+        """Return True if the file at the path is still the one that was loaded."""
+        try:
+            stat_result = os.stat(self.path)
+        except OSError:
+            return False
+        return self.file_identity(stat_result) == self.file_identity(self.stat_result)
+
+    @classmethod
+    def file_identity(cls, stat_result):
+        return stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime
+
+    @classmethod
+    def object_changes_for_objects(cls, previous_objects, objects):
+        changes = ObjectChanges(set(objects) - set(previous_objects), set(previous_objects) - set(objects), set())
+        for object_id, object_data in objects.items():
+            previous_object_data = previous_objects.get(object_id)
+            if previous_object_data is None:
+                continue
+            if previous_object_data == object_data:
+                # keep sharing the unchanged data with existing items
+                objects[object_id] = previous_object_data
+            else:
+                changes.modified.add(object_id)
+        return changes
+
+    def update_from_previous(self, previous):
+        """
+        Load the data by re-parsing only the objects whose source text differs from
+        the previous version. Returns False if that is not possible.
+
+        Objects before the first and after the last changed byte are reused as they
+        are, only with their spans and line numbers shifted. The changed region in
+        between is split at the object boundaries, and every object in it whose text
+        is not identical to its previous text is parsed again.
+
+        """
+        if (self.stat_result.st_dev, self.stat_result.st_ino) == (previous.stat_result.st_dev, previous.stat_result.st_ino):
+            # rewritten in place, the previous mapping no longer shows the old contents
+            return False
+        buffer, previous_buffer = self.buffer, previous.buffer
+        objects_start = self.objects_start_re.search(buffer) if buffer else None
+        if not objects_start or not previous.object_span_map:
+            return False
+
+        prefix_length, suffix_length = self.common_affix_lengths(previous_buffer, buffer)
+        length_delta = len(buffer) - len(previous_buffer)
+        # sort the previous objects into those before, after and in the changed region
+        region_object_ids, tail_object_ids = set(), []
+        head_end, tail_start, tail_end = None, None, None
+        tail_limit = len(previous_buffer) - suffix_length
+        for object_id, (start, end) in previous.object_span_map.iteritems():
+            if end <= prefix_length:
+                head_end = max(head_end, end)
+            elif start >= tail_limit:
+                tail_object_ids.append(object_id)
+                tail_start = start if tail_start is None else min(tail_start, start)
+                tail_end = max(tail_end, end)
+            else:
+                region_object_ids.add(object_id)
+
+        parser = PBXProjParser(buffer, path=self.path, intern_pool=self.intern_pool)
+        region_start = head_end if head_end is not None else objects_start.end()
+        if tail_start is not None:
+            region_end = tail_start + length_delta
+        else:
+            objects_end = self.objects_end_re.search(buffer, region_start)
+            if not objects_end:
+                return False
+            region_end = objects_end.start()
+
+        previous_objects = previous.data['objects']
+        objects = dict(previous_objects)
+        object_span_map = dict(previous.object_span_map)
+        object_line_number_map = dict(previous.object_line_number_map)
+        changes = ObjectChanges(set(), set(), set())
+
+        # everything in the changed region must be whitespace, comments or objects starting on their own line
+        object_starts = []
+        for match in self.object_start_re.finditer(buffer, region_start, region_end):
+            object_id = match.group(1) if match.group(1) is not None else match.group(2)
+            object_starts.append((object_id, match.start() + 2))
+        position = region_start
+        line_number, line_number_pos = 1 + parser.count_newlines(0, region_start), region_start
+        seen_object_ids = set()
+        for i, (object_id, start) in enumerate(object_starts):
+            boundary = object_starts[i + 1][1] if i + 1 < len(object_starts) else region_end
+            end = buffer.rfind(';', start, boundary) + 1
+            if not end or PBXProjParser.whitespace_re.match(buffer, position).end() != start or object_id in seen_object_ids:
+                return False
+            if object_id in previous_objects and object_id not in region_object_ids:
+                # also present outside the changed region
+                return False
+            seen_object_ids.add(object_id)
+            position = end
+
+            line_number += parser.count_newlines(line_number_pos, start)
+            line_number_pos = start
+            line_number_end = line_number + parser.count_newlines(start, end)
+
+            previous_span = previous.object_span_map.get(object_id)
+            if not previous_span or previous_buffer[previous_span[0]:previous_span[1]] != buffer[start:end]:
+                parser.pos, parser.line_number, parser.line_number_pos = start, line_number, start
+                try:
+                    parsed_object_id, object_data, _, _, span = next(parser.iter_object_entries())
+                except (PBXProjParseError, StopIteration):
+                    return False
+                if parsed_object_id != object_id or span != (start, end):
+                    return False
+                objects[object_id] = object_data
+                if previous_span:
+                    changes.modified.add(object_id)
+                else:
+                    changes.added.add(object_id)
+            object_span_map[object_id] = (start, end)
+            object_line_number_map[object_id] = [line_number, line_number_end]
+        if PBXProjParser.whitespace_re.match(buffer, position).end() < region_end:
+            return False
+
+        changes.removed.update(region_object_ids - seen_object_ids)
+        for object_id in changes.removed:
+            del objects[object_id]
+            del object_span_map[object_id]
+            del object_line_number_map[object_id]
+
+        # objects after the changed region only moved
+        line_delta = parser.count_newlines(prefix_length, len(buffer) - suffix_length) - previous_buffer[prefix_length:len(previous_buffer) - suffix_length].count('\n')
+        if length_delta or line_delta:
+            for object_id in tail_object_ids:
+                start, end = object_span_map[object_id]
+                object_span_map[object_id] = (start + length_delta, end + length_delta)
+                line_number_start, line_number_end = object_line_number_map[object_id]
+                object_line_number_map[object_id] = [line_number_start + line_delta, line_number_end + line_delta]
+
+        # the rest of the file is small, parse it with an empty objects dictionary
+        objects_end = self.objects_end_re.search(buffer, tail_end + length_delta if tail_end is not None else position)
+        if not objects_end:
+            return False
+        try:
+            data = PBXProjParser(buffer[:objects_start.end()] + buffer[objects_end.start():], path=self.path, intern_pool=self.intern_pool).parse()
+        except PBXProjParseError:
+            return False
+        data['objects'] = objects
+
+        self.data = data
+        self.object_span_map = object_span_map
+        self.object_line_number_map = object_line_number_map
+        self.class_name_to_object_ids_map = self.updated_class_name_to_object_ids_map(previous.class_name_to_object_ids_map, previous_objects, objects, changes)
+        self.object_changes = changes
+        self.loaded_incrementally = True
+        return True
+
+    @classmethod
+    def common_affix_lengths(cls, a, b, chunk_size=64 * 1024):
+        """Return the lengths of the longest common prefix and suffix of two buffers that do not overlap."""
+        limit = min(len(a), len(b))
+        prefix_length, size = 0, chunk_size
+        while size and prefix_length < limit:
+            size = min(size, limit - prefix_length)
+            if a[prefix_length:prefix_length + size] == b[prefix_length:prefix_length + size]:
+                prefix_length += size
+            else:
+                size //= 2
+
+        limit -= prefix_length
+        suffix_length, size = 0, chunk_size
+        while size and suffix_length < limit:
+            size = min(size, limit - suffix_length)
+            if a[len(a) - suffix_length - size:len(a) - suffix_length] == b[len(b) - suffix_length - size:len(b) - suffix_length]:
+                suffix_length += size
+            else:
+                size //= 2
+        return prefix_length, suffix_length
+
+    @classmethod
+    def updated_class_name_to_object_ids_map(cls, class_name_to_object_ids_map, previous_objects, objects, changes):
+        class_name_to_object_ids_map = dict(class_name_to_object_ids_map)
+        removed_ids_by_class = collections.defaultdict(set)
+        for object_id in changes.removed | changes.modified:
+            removed_ids_by_class[previous_objects[object_id].get('isa')].add(object_id)
+        for class_name, object_ids in removed_ids_by_class.items():
+            class_name_to_object_ids_map[class_name] = [i for i in class_name_to_object_ids_map[class_name] if i not in object_ids]
+        added_ids_by_class = collections.defaultdict(list)
+        for object_id in changes.added | changes.modified:
+            added_ids_by_class[objects[object_id].get('isa')].append(object_id)
+        for class_name, object_ids in added_ids_by_class.items():
+            class_name_to_object_ids_map[class_name] = class_name_to_object_ids_map.get(class_name, []) + object_ids
+        return dict((class_name, object_ids) for class_name, object_ids in class_name_to_object_ids_map.items() if object_ids)
+
+    @classmethod
+    def class_name_to_object_ids_map_for_objects(cls, objects):
+        class_name_to_object_ids_map = {}
+        for object_id, object_data in objects.items():
+            class_name_to_object_ids_map.setdefault(object_data.get('isa'), []).append(object_id)
+        return class_name_to_object_ids_map
+
+    def raw_source_buffer(self, object_id):
+        """
+        Return a zero-copy, read-only buffer over the source text of the given object.
+        The buffer is only valid until :py:meth:`close` is called.
+
+        """
+        start, end = self.object_span_map[object_id]
+        return buffer(self.buffer, start, end - start)
+
+    def raw_source(self, object_id):
+        """Return the source text of the given object as a string."""
+        start, end = self.object_span_map[object_id]
+        return self.buffer[start:end]
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+
+class PBXProjWriter(object):
+    """
+    Applies property changes to the objects of a :py:class:`PBXProjFile` and
+    writes the result.
+
+    Only the source text of the changed dictionary entries is replaced, the
+    rest of the file is copied byte for byte. New entries are inserted in
+    the sorted position and with the indentation Xcode uses, so the result
+    looks as if Xcode had written it. The file is written to a temporary
+    file first, which is then renamed over the original.
+
+    :param project_file: The :py:class:`PBXProjFile` to change.
+
+    """
+
+    unquoted_string_re = re.compile(r'^[\w$./]+\Z')
+    escape_re = re.compile(r'[\\"\n\t]')
+    escape_map = {'\\': '\\\\', '"': '\\"', '\n': '\\n', '\t': '\\t'}
+
+    def __init__(self, project_file):
+        self.project_file = project_file
+        # object ID -> {key: new value, or None to remove the entry}
+        self.property_changes = {}
+
+    def set_property(self, object_id, key, value):
+        """
+        Set a property of the object with the given ID. Nothing changes if it already
+        has that value. The key can also be a tuple of keys to set a value in a nested
+        dictionary, like ``('buildSettings', 'SDKROOT')``.
+
+        """
+        if object_id not in self.project_file.data['objects']:
+            raise KeyError(object_id)
+        self.property_changes.setdefault(object_id, {})[key] = value
+
+    def remove_property(self, object_id, key):
+        """Remove a property of the object with the given ID, if it has it. Keys work like in :py:meth:`set_property`."""
+        if object_id not in self.project_file.data['objects']:
+            raise KeyError(object_id)
+        self.property_changes.setdefault(object_id, {})[key] = None
+
+    def patches(self):
+        """Return a list of ``(start, end, text)`` replacements, sorted by position."""
+        patches = []
+        for object_id, changes in self.property_changes.items():
+            patches.extend(self.patches_for_object(object_id, changes))
+        # stable, so insertions at the same position stay sorted by key
+        patches.sort(key=lambda patch: (patch[0], patch[1]))
+        return patches
+
+    def patches_for_object(self, object_id, changes):
+        start, end = self.project_file.object_span_map[object_id]
+        parser = PBXProjParser(self.project_file.buffer, path=self.project_file.path)
+        parser.pos = start
+        parser.consume(parser.dictionary_entry_re, 'Invalid object entry')
+        return self.patches_for_dictionary(parser, self.project_file.data['objects'][object_id], changes)
+
+    def patches_for_dictionary(self, parser, dictionary, changes):
+        # the parser is positioned after the opening brace of the dictionary
+        buffer = parser.data
+        dictionary_start = parser.pos
+        entry_spans = list(parser.iter_dictionary_entry_spans())
+        closing_brace = parser.pos - 1
+        multi_line = '\n' in buffer[dictionary_start:closing_brace]
+        entry_span_map = dict((key, (entry_start, entry_end)) for key, entry_start, entry_end in entry_spans)
+
+        direct_changes, nested_changes = {}, {}
+        for key, value in changes.items():
+            if isinstance(key, tuple) and len(key) > 1:
+                nested_changes.setdefault(key[0], {})[key[1:] if len(key) > 2 else key[1]] = value
+            else:
+                direct_changes[key[0] if isinstance(key, tuple) else key] = value
+
+        patches = []
+        for key, changes in sorted(nested_changes.items()):
+            if key in entry_span_map and isinstance(dictionary[key], dict):
+                parser.pos = entry_span_map[key][0]
+                parser.consume(parser.dictionary_entry_re, 'Invalid dictionary entry')
+                patches.extend(self.patches_for_dictionary(parser, dictionary[key], changes))
+            elif key not in direct_changes:
+                # not a dictionary yet, replace the whole value
+                value = self.changed_dictionary({}, changes)
+                if value or key in dictionary:
+                    direct_changes[key] = value
+
+        for key, value in sorted(direct_changes.items()):
+            if key in entry_span_map:
+                entry_start, entry_end = entry_span_map[key]
+                if value is None:
+                    patches.append(self.removal_patch(buffer, entry_start, entry_end, multi_line))
+                elif dictionary[key] != value:
+                    indent = self.indent_before(buffer, entry_start) if multi_line else None
+                    patches.append((entry_start, entry_end, self.format_entry(key, value, indent)))
+            elif value is not None:
+                following_entries = [entry_start for entry_key, entry_start, entry_end in entry_spans if entry_key != 'isa' and entry_key > key]
+                position = following_entries[0] if following_entries else closing_brace
+                indent = self.indent_before(buffer, position) if multi_line else None
+                if indent is None:
+                    patches.append((position, position, self.format_entry(key, value, None) + ' '))
+                else:
+                    if position == closing_brace:
+                        indent += '\t'
+                    line_start = buffer.rfind('\n', 0, position) + 1
+                    patches.append((line_start, line_start, indent + self.format_entry(key, value, indent) + '\n'))
+        return patches
+
+    @classmethod
+    def changed_dictionary(cls, dictionary, changes):
+        dictionary = dict(dictionary)
+        for key, value in changes.items():
+            if isinstance(key, tuple):
+                value = cls.changed_dictionary(dictionary.get(key[0]) if isinstance(dictionary.get(key[0]), dict) else {}, {key[1:] if len(key) > 2 else key[1]: value})
+                key = key[0]
+            if value is None:
+                dictionary.pop(key, None)
+            else:
+                dictionary[key] = value
+        return dictionary
+
+    @classmethod
+    def removal_patch(cls, buffer, entry_start, entry_end, multi_line):
+        if multi_line and cls.indent_before(buffer, entry_start) is not None:
+            line_end = buffer.find('\n', entry_end)
+            if line_end != -1 and not buffer[entry_end:line_end].strip(' \t'):
+                # the whole line
+                return buffer.rfind('\n', 0, entry_start) + 1, line_end + 1, ''
+        # up to the next entry, which keeps the indentation of this one
+        return entry_start, PBXProjParser.whitespace_re.match(buffer, entry_end).end(), ''
+
+    @classmethod
+    def indent_before(cls, buffer, position):
+        # the whitespace before a position if it is the first thing on its line
+        line_start = buffer.rfind('\n', 0, position) + 1
+        indent = buffer[line_start:position]
+        return indent if not indent.strip(' \t') else None
+
+    @classmethod
+    def format_entry(cls, key, value, indent):
+        return '{} = {};'.format(cls.format_string(key), cls.format_value(value, indent))
+
+    @classmethod
+    def format_value(cls, value, indent=None):
+        """
+        Format a value in the style Xcode uses, on multiple lines below the given
+        indentation, or on a single line if it is None.
+
+        """
+        if isinstance(value, dict):
+            # Xcode sorts keys, except that isa comes first
+            keys = sorted(value, key=lambda key: (key != 'isa', key))
+            if indent is None:
+                return '{' + ''.join(cls.format_entry(key, value[key], None) + ' ' for key in keys) + '}'
+            return '{\n' + ''.join(indent + '\t' + cls.format_entry(key, value[key], indent + '\t') + '\n' for key in keys) + indent + '}'
+        if isinstance(value, (list, tuple)):
+            if indent is None:
+                return '(' + ''.join(cls.format_value(element) + ', ' for element in value) + ')'
+            return '(\n' + ''.join(indent + '\t' + cls.format_value(element, indent + '\t') + ',\n' for element in value) + indent + ')'
+        if isinstance(value, (int, long)):
+            return str(value)
+        return cls.format_string(value)
+
+    @classmethod
+    def format_string(cls, value):
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        if cls.unquoted_string_re.match(value):
+            return value
+        return '"{}"'.format(cls.escape_re.sub(lambda match: cls.escape_map[match.group(0)], value))
+
+    def iter_chunks(self, patches=None):
+        """Yield the new contents of the file in pieces."""
+        buffer = self.project_file.buffer
+        position = 0
+        for start, end, text in patches if patches is not None else self.patches():
+            yield buffer[position:start]
+            yield text
+            position = end
+        yield buffer[position:]
+
+    def unified_diff(self, patches=None):
+        """Return the changes as a unified diff."""
+        lines = self.project_file.buffer[:].splitlines(True)
+        changed_lines = ''.join(self.iter_chunks(patches)).splitlines(True)
+        return ''.join(difflib.unified_diff(lines, changed_lines, self.project_file.path, self.project_file.path))
+
+    def write(self, path=None):
+        """
+        Write the changed file, by default over the original one. Returns False
+        without writing anything if none of the changes has any effect.
+
+        """
+        patches = self.patches()
+        if not patches:
+            return False
+        path = path or self.project_file.path
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            os.fchmod(fd, stat.S_IMODE(self.project_file.stat_result.st_mode))
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self.iter_chunks(patches):
+                    f.write(chunk)
+            os.rename(temp_path, path)
+        except:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return True
+
+
+def parse_pbxproj_file(path):
+    """
+    Parse the project.pbxproj file at the given path and return a
+    ``(data, object_line_number_map)`` tuple.
+
+    """
+    with open(path, 'rb') as f:
+        parser = PBXProjParser(f.read(), path=path)
+    return parser.parse(), parser.object_line_number_map
+
+
+def iter_objects(path, isa=None):
+    """
+    Stream the objects of a project file as ``(object_id, isa, data, (line_number_start,
+    line_number_end))`` tuples, in file order, without building the whole object graph.
+
+    The file is memory-mapped and only one object is held at a time, so memory use
+    is bounded by the size of the largest object. Unlike :py:class:`PBXProjFile`,
+    this does not detect duplicate object IDs.
+
+    :param str path: The path to a project.pbxproj file or to the .xcodeproj bundle containing it.
+    :param isa: A class name like ``'PBXShellScriptBuildPhase'``, or a collection of class
+                names. If given, only objects of those classes are yielded.
+
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, 'project.pbxproj')
+    if isinstance(isa, basestring):
+        isa = (isa,)
+    isa_names = frozenset(isa) if isa is not None else None
+
+    with open(path, 'rb') as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files cannot be mapped, let the parser report them
+            buffer = ''
+    try:
+        parser = PBXProjParser(buffer, path=path)
+        for object_id, object_data, line_number_start, line_number_end, span in parser.iter_objects():
+            object_isa = object_data.get('isa')
+            if isa_names is None or object_isa in isa_names:
+                yield object_id, object_isa, object_data, (line_number_start, line_number_end)
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
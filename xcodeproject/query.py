@@ -0,0 +1,167 @@
+#!usr/bin/env python
+
+import re
+import fnmatch
+import collections
+
+from . import xcodeproject
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class QueryFilter(collections.namedtuple('QueryFilter', 'property_name operator value')):
+    """
+    A condition in square brackets. ``operator`` is ``=``, ``!=`` or ``~=`` (glob match),
+    or None for ``[name]``, which only requires the property to be present.
+
+    """
+
+    def matches(self, value):
+        if value is None:
+            return self.operator == '!='
+        if self.operator is None:
+            return True
+        # a list matches if any of its elements does
+        elements = value if isinstance(value, list) else [value]
+        if self.operator == '~=':
+            return any(isinstance(element, basestring) and fnmatch.fnmatchcase(element, self.value) for element in elements)
+        matched = self.value in elements
+        return matched if self.operator == '=' else not matched
+
+
+class QueryStep(collections.namedtuple('QueryStep', 'name filters')):
+    pass
+
+
+class Query(object):
+    """
+    A compiled selector over the objects of a project, like
+    ``PBXNativeTarget[name=App].buildPhases[isa=PBXShellScriptBuildPhase].shellScript``.
+
+    The first step selects objects by class, either an isa name like ``PBXGroup`` or
+    the name of an item class like ``AbstractTarget``, which includes the isa names of
+    its subclasses, or ``*`` for all objects. Each following step selects a property
+    of the current values. References to objects are followed, and lists are
+    flattened, so ``buildPhases`` yields each build phase item. Properties of
+    dictionaries like ``buildSettings`` work the same way, and ``id`` is the ID
+    of an object.
+
+    Each step can have filters in square brackets: ``[name=App]``, ``[name!=App]``,
+    ``[path~=*.m]`` for glob patterns and ``[name]`` for the presence of a property.
+    Values can be quoted with double quotes. In the first step, ``=`` filters are
+    answered from a per-project index instead of looking at every object.
+
+    A query is parsed once and can be evaluated against any number of projects.
+
+    """
+
+    step_re = re.compile(r'\s*(\*|[A-Za-z_][A-Za-z0-9_]*|"(?:[^"\\]|\\.)*")\s*')
+    filter_re = re.compile(r'\[\s*([A-Za-z_][A-Za-z0-9_]*)\s*(?:(=|!=|~=)\s*("(?:[^"\\]|\\.)*"|[^\]]*?))?\s*\]\s*')
+
+    def __init__(self, text):
+        self.text = text
+        self.steps = self.parse(text)
+
+    def __repr__(self):
+        return 'Query({!r})'.format(self.text)
+
+    @classmethod
+    def parse(cls, text):
+        steps = []
+        pos = 0
+        while True:
+            match = cls.step_re.match(text, pos)
+            if not match:
+                raise QuerySyntaxError('Expected a class or property name at position {} of "{}"'.format(pos, text))
+            name = cls.unquote(match.group(1))
+            pos = match.end()
+            filters = []
+            while True:
+                match = cls.filter_re.match(text, pos)
+                if not match:
+                    break
+                property_name, operator, value = match.groups()
+                filters.append(QueryFilter(property_name, operator, cls.unquote(value) if operator else None))
+                pos = match.end()
+            steps.append(QueryStep(name, filters))
+            if pos == len(text):
+                return steps
+            if text[pos] != '.':
+                raise QuerySyntaxError('Expected "." or "[" at position {} of "{}"'.format(pos, text))
+            pos += 1
+
+    @classmethod
+    def unquote(cls, value):
+        if value.startswith('"'):
+            return re.sub(r'\\(.)', r'\1', value[1:-1])
+        return value
+
+    def evaluate(self, project):
+        """Return the list of values the query selects in the given :py:class:`xcodeproject.XcodeProject`, in a stable order."""
+        values = self.select_objects(project, self.steps[0])
+        for step in self.steps[1:]:
+            values = [value for value in self.property_values(project, values, step.name) if self.passes_filters(value, step.filters)]
+        return values
+
+    def select_objects(self, project, step):
+        index_filter = next((f for f in step.filters if f.operator == '='), None)
+        object_ids = set()
+        for class_name in self.class_names_for_step(project, step.name):
+            class_object_ids = project.class_name_to_item_map.get(class_name, {})
+            if index_filter is None:
+                object_ids.update(class_object_ids.keys())
+            elif index_filter.property_name == 'id':
+                if index_filter.value in class_object_ids:
+                    object_ids.add(index_filter.value)
+            else:
+                object_ids.update(project.object_ids_for_property_value(class_name, index_filter.property_name, index_filter.value))
+
+        # the other filters are tested against the raw data, so only matching objects get items
+        remaining_filters = [f for f in step.filters if f is not index_filter]
+        object_data = project.object_data
+        return [project.object_for_id(object_id) for object_id in sorted(object_ids) if all(f.matches(self.raw_property_value(object_id, object_data[object_id], f.property_name)) for f in remaining_filters)]
+
+    @classmethod
+    def class_names_for_step(cls, project, name):
+        class_names = project.project_file.class_name_to_object_ids_map.keys()
+        if name == '*':
+            return class_names
+        item_class = project.project_class_map.get(name)
+        if item_class is None:
+            return [name] if name in class_names else []
+        return [class_name for class_name in class_names if issubclass(project.item_class_for_name(class_name), item_class)]
+
+    @classmethod
+    def raw_property_value(cls, object_id, data, property_name):
+        if property_name == 'id':
+            return object_id
+        return data.get(property_name)
+
+    @classmethod
+    def property_values(cls, project, values, property_name):
+        for value in values:
+            if isinstance(value, xcodeproject.ProjectItem):
+                property_value = cls.raw_property_value(value.id, value.data, property_name)
+            elif isinstance(value, dict):
+                property_value = value.get(property_name)
+            else:
+                continue
+            if property_value is None:
+                continue
+            for element in property_value if isinstance(property_value, list) else [property_value]:
+                if isinstance(element, basestring) and element in project.object_data and property_name != 'id':
+                    yield project.object_for_id(element)
+                else:
+                    yield element
+
+    @classmethod
+    def passes_filters(cls, value, filters):
+        if not filters:
+            return True
+        if isinstance(value, xcodeproject.ProjectItem):
+            return all(f.matches(cls.raw_property_value(value.id, value.data, f.property_name)) for f in filters)
+        if isinstance(value, dict):
+            return all(f.matches(value.get(f.property_name)) for f in filters)
+        return False
@@ -0,0 +1,215 @@
+#!usr/bin/env python
+
+import os
+import json
+import stat
+import errno
+import socket
+import tempfile
+import traceback
+import collections
+import SocketServer
+
+
+# environment variables that change what a command does, sent along with forwarded requests
+FORWARDED_ENVIRONMENT_VARIABLES = ('XCODEPROJECT_CACHE_DIR',)
+
+
+def default_socket_path():
+    """Return $XCODEPROJECT_SOCKET, or a per-user path in $XDG_RUNTIME_DIR or the temporary directory."""
+    if os.environ.get('XCODEPROJECT_SOCKET'):
+        return os.environ['XCODEPROJECT_SOCKET']
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(), 'xcodeproject-util-{}.sock'.format(os.getuid()))
+
+
+class ProjectLRU(object):
+    """
+    Keeps loaded projects in memory for reuse, dropping the least recently used
+    ones when their total number of objects or total project file size exceeds
+    the given limits. The most recently used project is always kept.
+
+    A project whose file changed since it was loaded is refreshed, see
+    :py:meth:`xcodeproject.XcodeProject.refresh`, before it is returned.
+
+    :param int max_objects: The maximum total number of objects.
+    :param int max_bytes: The maximum total size of the project files.
+
+    """
+
+    def __init__(self, max_objects=2000000, max_bytes=None):
+        self.max_objects = max_objects
+        self.max_bytes = max_bytes
+        # (path, lazy) -> project
+        self.projects = collections.OrderedDict()
+        self.object_count = 0
+        self.byte_count = 0
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def __len__(self):
+        return len(self.projects)
+
+    def project(self, path, lazy, load):
+        """
+        Return the project at the given path, calling ``load`` without arguments
+        to load it if it is not in the cache.
+
+        """
+        key = os.path.abspath(path), lazy
+        project = self.pop(key)
+        if project is not None:
+            if project.project_file.is_current():
+                self.hits += 1
+            else:
+                try:
+                    project.refresh()
+                    self.refreshes += 1
+                except Exception:
+                    # most likely caught in the middle of a save, load it again below
+                    project.close()
+                    project = None
+        if project is None:
+            project = load()
+            self.misses += 1
+
+        self.projects[key] = project
+        self.object_count += len(project.object_data)
+        self.byte_count += project.project_file.stat_result.st_size
+        while len(self.projects) > 1 and self.exceeds_limits():
+            self.pop(next(iter(self.projects))).close()
+        return project
+
+    def pop(self, key):
+        project = self.projects.pop(key, None)
+        if project is not None:
+            self.object_count -= len(project.object_data)
+            self.byte_count -= project.project_file.stat_result.st_size
+        return project
+
+    def exceeds_limits(self):
+        if self.max_objects is not None and self.object_count > self.max_objects:
+            return True
+        return self.max_bytes is not None and self.byte_count > self.max_bytes
+
+    def clear(self):
+        for key in list(self.projects):
+            self.pop(key).close()
+
+
+class RequestHandler(SocketServer.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        response = self.server.run_request(request)
+        self.wfile.write(json.dumps(response) + '\n')
+
+
+class ToolServer(SocketServer.UnixStreamServer):
+    """
+    Runs tool command lines sent by :py:func:`forward_request` over a Unix socket,
+    one at a time, and sends back their exit status and output.
+
+    :param str socket_path: The path of the socket to listen on.
+    :param run_tool: A callable that runs the tool with the given list of arguments
+                     and returns a ``(status, output, error_output)`` tuple.
+
+    """
+
+    def __init__(self, socket_path, run_tool):
+        self.socket_path = socket_path
+        self.run_tool = run_tool
+        if os.path.exists(socket_path):
+            if is_server_running(socket_path):
+                raise socket.error(errno.EADDRINUSE, 'A server is already running at {}'.format(socket_path))
+            os.unlink(socket_path)
+        SocketServer.UnixStreamServer.__init__(self, socket_path, RequestHandler)
+        os.chmod(socket_path, 0600)
+
+    def run_request(self, request):
+        saved_cwd = os.getcwd()
+        saved_environment = dict((name, os.environ.get(name)) for name in FORWARDED_ENVIRONMENT_VARIABLES)
+        try:
+            os.chdir(request.get('cwd') or saved_cwd)
+            # the client's values, not the server's
+            set_environment(dict((name, request.get('environment', {}).get(name)) for name in FORWARDED_ENVIRONMENT_VARIABLES))
+            status, output, error_output = self.run_tool(request['arguments'])
+        except Exception:
+            status, output, error_output = 1, '', traceback.format_exc()
+        finally:
+            os.chdir(saved_cwd)
+            set_environment(saved_environment)
+        return {'status': status, 'stdout': output.decode('utf-8', 'replace'), 'stderr': error_output.decode('utf-8', 'replace')}
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def set_environment(values):
+    """Set the given environment variables, removing those whose value is None."""
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value.encode('utf-8') if isinstance(value, unicode) else value
+
+
+def connect(socket_path):
+    """
+    Return a socket connected to the server at the given path, or None if none is
+    running there. A socket that belongs to another user is ignored, so that
+    nobody else can receive this user's command lines by creating it first.
+
+    """
+    try:
+        stat_result = os.lstat(socket_path)
+    except OSError:
+        return None
+    if not stat.S_ISSOCK(stat_result.st_mode) or stat_result.st_uid != os.getuid():
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except socket.error:
+        client.close()
+        return None
+    return client
+
+
+def is_server_running(socket_path):
+    client = connect(socket_path)
+    if client is None:
+        return False
+    client.close()
+    return True
+
+
+def forward_request(socket_path, arguments):
+    """
+    Run the tool with the given arguments in the server at the given path. Returns a
+    ``(status, output, error_output)`` tuple, or None if no server is running there.
+
+    """
+    client = connect(socket_path)
+    if client is None:
+        return None
+    try:
+        environment = dict((name, os.environ[name]) for name in FORWARDED_ENVIRONMENT_VARIABLES if name in os.environ)
+        client.sendall(json.dumps({'arguments': arguments, 'cwd': os.getcwd(), 'environment': environment}) + '\n')
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        client.close()
+    response = json.loads(''.join(chunks))
+    return response['status'], response['stdout'].encode('utf-8'), response['stderr'].encode('utf-8')
@@ -0,0 +1,167 @@
+#!usr/bin/env python
+
+import re
+import csv
+import json
+import array
+import fnmatch
+import collections
+
+
+class StringTable(object):
+    """Assigns each distinct string a small integer id, so that repeated strings are stored once."""
+
+    def __init__(self):
+        self.strings = []
+        self.ids = {}
+
+    def id_for_string(self, string):
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class SettingsFilter(collections.namedtuple('SettingsFilter', 'column negated pattern')):
+    """
+    A condition on one column of a :py:class:`BuildSettingsStore`. The pattern can
+    contain the glob wildcards ``*``, ``?`` and ``[...]``.
+
+    """
+
+    expression_re = re.compile(r'^(\w+)\s*(!?=)(.*)$')
+
+    @classmethod
+    def from_expression(cls, expression):
+        """Create a filter from an expression like ``name=SWIFT_VERSION`` or ``value!=5*``. Raises ValueError if it is malformed."""
+        match = cls.expression_re.match(expression)
+        if not match or match.group(1) not in BuildSettingsStore.columns:
+            raise ValueError('Expected COLUMN=PATTERN or COLUMN!=PATTERN with one of the columns {} instead of "{}"'.format(', '.join(BuildSettingsStore.columns), expression))
+        return cls(match.group(1), match.group(2) == '!=', match.group(3))
+
+    def is_exact(self):
+        return not any(c in self.pattern for c in '*?[')
+
+    def matches(self, string):
+        if self.is_exact():
+            matched = string == self.pattern
+        else:
+            matched = fnmatch.fnmatchcase(string, self.pattern)
+        return matched != self.negated
+
+
+class BuildSettingsStore(object):
+    """
+    A table of the build settings defined in any number of projects, with one
+    row per setting per build configuration, stored column by column.
+
+    Each column holds integer ids into a string table shared by all rows, so
+    the name of a setting, a common value, a target name or a project path is
+    stored only once however often it occurs. Each column also has an index
+    from string id to rows, built on first use, so that filters on exact
+    values and group-by queries do not have to look at every row.
+
+    The ``target`` column is empty for project-level settings. List values
+    are joined with spaces.
+
+    """
+
+    columns = ('project', 'target', 'configuration', 'name', 'value')
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.column_data = collections.OrderedDict((column, array.array('i')) for column in self.columns)
+        # column -> string id -> array of row numbers
+        self.indexes = {}
+
+    def __len__(self):
+        return len(self.column_data['name'])
+
+    def add_project(self, project):
+        """Add the project-level and target-level build settings of an :py:class:`xcodeproject.XcodeProject`."""
+        self.add_rows(project.path, self.rows_for_project(project))
+
+    @classmethod
+    def rows_for_project(cls, project):
+        """Return the build settings of a project as ``(target, configuration, name, value)`` tuples."""
+        rows = []
+        configuration_lists = [('', project.root_object().buildConfigurationList)]
+        configuration_lists.extend((target.name, target.buildConfigurationList) for target in project.targets())
+        for target_name, configuration_list in configuration_lists:
+            for config in configuration_list:
+                for name, value in config.build_settings().items():
+                    if isinstance(value, list):
+                        value = ' '.join(value)
+                    rows.append((target_name, config.name, name, value))
+        return rows
+
+    def add_rows(self, project_path, rows):
+        """Add the ``(target, configuration, name, value)`` rows of the project with the given path."""
+        id_for_string = self.strings.id_for_string
+        project_id = id_for_string(project_path)
+        project_column, target_column, configuration_column, name_column, value_column = self.column_data.values()
+        for target_name, configuration_name, name, value in rows:
+            project_column.append(project_id)
+            target_column.append(id_for_string(target_name))
+            configuration_column.append(id_for_string(configuration_name))
+            name_column.append(id_for_string(name))
+            value_column.append(id_for_string(value))
+        self.indexes.clear()
+
+    def index(self, column):
+        """Return a dictionary mapping each string id in the column to the row numbers that have it."""
+        if column not in self.indexes:
+            index = {}
+            for row, string_id in enumerate(self.column_data[column]):
+                rows = index.get(string_id)
+                if rows is None:
+                    rows = index[string_id] = array.array('i')
+                rows.append(row)
+            self.indexes[column] = index
+        return self.indexes[column]
+
+    def rows(self, filters=()):
+        """Return the numbers of the rows that match all given :py:class:`SettingsFilter` conditions, in ascending order."""
+        candidate_rows = None
+        remaining_filters = []
+        for settings_filter in filters:
+            if settings_filter.negated or not settings_filter.is_exact():
+                remaining_filters.append(settings_filter)
+                continue
+            string_id = self.strings.ids.get(settings_filter.pattern)
+            rows = self.index(settings_filter.column).get(string_id, ()) if string_id is not None else ()
+            candidate_rows = set(rows) if candidate_rows is None else candidate_rows.intersection(rows)
+        rows = range(len(self)) if candidate_rows is None else sorted(candidate_rows)
+
+        for settings_filter in remaining_filters:
+            column = self.column_data[settings_filter.column]
+            # test each distinct string once instead of once per row
+            matching_ids = set(string_id for string_id in self.index(settings_filter.column) if settings_filter.matches(self.strings[string_id]))
+            rows = [row for row in rows if column[row] in matching_ids]
+        return rows
+
+    def group_counts(self, column, rows):
+        """Return an ordered dictionary mapping the values of the column in the given rows to their number of rows, most frequent first."""
+        column_data = self.column_data[column]
+        counts = collections.Counter(column_data[row] for row in rows)
+        return collections.OrderedDict((self.strings[string_id], count) for string_id, count in sorted(counts.items(), key=lambda item: (-item[1], self.strings[item[0]])))
+
+    def row_values(self, row):
+        return [self.strings[column[row]] for column in self.column_data.values()]
+
+    def write_csv(self, f, rows):
+        writer = csv.writer(f)
+        writer.writerow(self.columns)
+        for row in rows:
+            writer.writerow([value.encode('utf-8') if isinstance(value, unicode) else value for value in self.row_values(row)])
+
+    def write_ndjson(self, f, rows):
+        for row in rows:
+            f.write(json.dumps(collections.OrderedDict(zip(self.columns, self.row_values(row)))) + '\n')
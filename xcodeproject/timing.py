@@ -0,0 +1,89 @@
+#!usr/bin/env python
+
+import time
+import json
+import collections
+
+
+class PhaseTimings(object):
+    """
+    Accumulates the wall time spent in named phases of processing a project,
+    along with a count of the things processed in each, like objects.
+
+    Phases can nest. The time of a nested phase is only counted for that
+    phase, not also for the one around it, so the times add up to the total.
+
+    """
+
+    def __init__(self):
+        # phase name -> [seconds, count]
+        self.phases = collections.OrderedDict()
+        self.active_phases = []
+
+    def phase(self, name, count=None):
+        """Return a context manager that adds the time spent in it to the given phase."""
+        return Phase(self, name, count)
+
+    def add(self, name, seconds, count=None):
+        totals = self.phases.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        if count is not None:
+            totals[1] += count
+
+    def total_seconds(self):
+        return sum(seconds for seconds, count in self.phases.values())
+
+    def as_dict(self):
+        return collections.OrderedDict((name, {'seconds': seconds, 'count': count}) for name, (seconds, count) in self.phases.items())
+
+    def report_text(self, title):
+        lines = ['Timings for {}: {:.3f}s'.format(title, self.total_seconds())]
+        for name, (seconds, count) in self.phases.items():
+            lines.append('    {:<12} {:>9.3f}s {:>9}'.format(name, seconds, count or ''))
+        return '\n'.join(lines) + '\n'
+
+    def report_json(self, title):
+        return json.dumps(collections.OrderedDict([('project', title), ('seconds', self.total_seconds()), ('phases', self.as_dict())])) + '\n'
+
+
+class Phase(object):
+
+    def __init__(self, timings, name, count):
+        self.timings = timings
+        self.name = name
+        self.count = count
+
+    def __enter__(self):
+        self.nested_seconds = 0.0
+        self.timings.active_phases.append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.time() - self.start
+        self.timings.active_phases.pop()
+        if self.timings.active_phases:
+            self.timings.active_phases[-1].nested_seconds += seconds
+        self.timings.add(self.name, seconds - self.nested_seconds, self.count)
+        return False
+
+
+class NullPhase(object):
+
+    count = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+null_phase = NullPhase()
+
+
+def phase(timings, name, count=None):
+    """Like :py:meth:`PhaseTimings.phase`, but does nothing if ``timings`` is None."""
+    if timings is None:
+        return null_phase
+    return timings.phase(name, count)
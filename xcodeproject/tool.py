@@ -2,51 +2,212 @@
 
 from . import tool_base
 from . import xcodeproject
+from . import cache
+from . import discovery
+from . import pbxproj
+from . import buildsettings
+from . import settingsstore
+from . import missingfiles
+from . import server
+from . import query
+from . import workspace
+from . import timing
 
 import os
+import re
 import sys
+import csv
+import json
+import socket
+import argparse
+import collections
+import time
+import logging
+import traceback
+import multiprocessing
+import cProfile
+
+
+class OutputBuffer(object):
+    """A file-like object that collects output, with unicode encoded as UTF-8 like on a terminal."""
+
+    def __init__(self):
+        self.chunks = []
+        self.softspace = 0
+
+    def write(self, text):
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        self.chunks.append(text)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self.chunks)
 
 
 class ProjectFileProcessingSubcommand(tool_base.AbstractSubcommand):
-    
+
+    # Subcommands that only look at a small part of the object graph set this
+    # to load projects in lazy mode, see XcodeProject
+    lazy_loading = False
+
+    # Subcommands that write their own output after processing all projects
+    # turn this off so that project paths do not end up in it
+    print_project_paths = True
+
     def run(self):
         project_paths = []
         if self.args.recursive:
             project_paths = self.find_projects()
         else:
             project_paths = [self.args.path]
-        self.process_project_paths(project_paths)
+        failed_project_paths = self.process_project_paths(project_paths)
+        self.finish()
+        if failed_project_paths:
+            print >> sys.stderr, 'Processing failed for {} project(s):\n{}'.format(len(failed_project_paths), '\n'.join(failed_project_paths))
+            exit(1)
 
     def process_project_paths(self, paths):
-        for project_path in paths:
-            print project_path
-            project = xcodeproject.XcodeProject(project_path)
-            self.process_project(project)
+        """
+        Process the projects at the given paths, in a pool of worker processes if --jobs
+        is greater than one. A failure in one project is reported and does not stop the
+        processing of the others. Returns the list of paths of projects that failed.
+
+        """
+        jobs = job_count(self.args.jobs)
+        if jobs == 1:
+            results = (self.process_project_path(project_path) for project_path in paths)
+        else:
+            pool = multiprocessing.Pool(jobs or None, initializer=initialize_worker_subcommand, initargs=(type(self), self.args))
+            # imap() yields in submission order, so output stays deterministic
+            results = pool.imap(process_project_path_in_worker, paths)
+
+        failed_project_paths = []
+        for project_path, output, error_output, failed, result in results:
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            sys.stderr.write(error_output)
+            if failed:
+                failed_project_paths.append(project_path)
+            elif result is not None:
+                self.collect_result(project_path, result)
+
+        if jobs != 1:
+            pool.close()
+            pool.join()
+        return failed_project_paths
+
+    def process_project_path(self, project_path):
+        """
+        Load and process one project, buffering its output. Returns a ``(path, output,
+        error_output, failed, result)`` tuple, where ``result`` is the return value of
+        :py:meth:`process_project`.
+
+        """
+        saved_stdout, saved_stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = OutputBuffer(), OutputBuffer()
+        failed = False
+        result = None
+        timings = timing.PhaseTimings() if getattr(self.args, 'timings', None) else None
+        try:
+            if self.print_project_paths:
+                print project_path
+            project = self.load_project(project_path, timings=timings)
+            with timing.phase(timings, 'subcommand'):
+                result = self.process_project(project)
+        except Exception:
+            failed = True
+            print >> sys.stderr, 'Unable to process {}:\n{}'.format(project_path, traceback.format_exc())
+        finally:
+            if timings:
+                sys.stderr.write(timings.report_json(project_path) if self.args.timings == 'json' else timings.report_text(project_path))
+            output, error_output = sys.stdout.getvalue(), sys.stderr.getvalue()
+            sys.stdout, sys.stderr = saved_stdout, saved_stderr
+        return project_path, output, error_output, failed, result
+
+    def load_project(self, path, timings=None):
+        if server_project_cache is None:
+            return xcodeproject.XcodeProject(path, lazy=self.lazy_loading, cache=self.parse_cache(), timings=timings)
+        project = server_project_cache.project(path, self.lazy_loading, lambda: xcodeproject.XcodeProject(path, lazy=self.lazy_loading, cache=self.parse_cache(), timings=timings))
+        project.timings = timings
+        return project
+
+    def parse_cache(self):
+        if not self.args.cache_dir:
+            return None
+        if not hasattr(self, '_parse_cache'):
+            self._parse_cache = cache.ParseCache(self.args.cache_dir, max_size=self.args.cache_size * 1024 * 1024)
+        return self._parse_cache
 
     def process_project(self, project):
+        """
+        Process one project. A return value other than None is passed to :py:meth:`collect_result`
+        in the main process, so it must be picklable if --jobs is used.
+
+        """
         raise NotImplementedError()
-    
+
+    def collect_result(self, project_path, result):
+        pass
+
+    def finish(self):
+        """Called after all projects were processed."""
+        pass
+
     def find_projects(self):
-        project_paths = []
-        for dirpath, dirnames, filenames in os.walk(self.args.path, topdown=True):
-            for exclude in self.args.exclude_dir:
-                if exclude in dirnames:
-                    print >> sys.stderr, 'Skipping {}'.format(os.path.join(dirpath, exclude))
-                    del dirnames[dirnames.index(exclude)]
-            for dirname in [d for d in dirnames if d.endswith('.xcodeproj')]:
-                project_paths.append(os.path.abspath(os.path.expanduser(os.path.join(dirpath, dirname))))
-        return project_paths
+        """Return a generator that yields project paths while the directory tree is being walked."""
+        exclude_patterns = self.args.exclude_dir + self.args.exclude
+        pruned_directory_names = [] if self.args.no_default_excludes else discovery.DEFAULT_PRUNED_DIRECTORY_NAMES
+        return discovery.iter_project_paths(self.args.path, exclude_patterns=exclude_patterns, pruned_directory_names=pruned_directory_names, skip_callback=self.report_skipped_directory)
+
+    def report_skipped_directory(self, path):
+        print >> sys.stderr, 'Skipping {}'.format(path)
     
     @classmethod
     def configure_argument_parser(cls, parser):
         parser.add_argument('path', help='Path to the project file, or to the toplevel directory in which to find project files if --recursive is given')
         parser.add_argument('-r', '--recursive', action='store_true', help='Treat the given path as a root directory instead of an xcode project bundle and recursively find and process all xcode projects below that root')
         parser.add_argument('--exclude-dir', action='append', default=[], help='Exclude subdirectories with the given name in recursive mode')
+        parser.add_argument('--exclude', action='append', default=[], help='Exclude subdirectories whose name, or path relative to the root if the pattern contains a slash, matches the given glob pattern in recursive mode')
+        parser.add_argument('--no-default-excludes', action='store_true', help='Also search {} directories in recursive mode'.format(', '.join(discovery.DEFAULT_PRUNED_DIRECTORY_NAMES)))
+        parser.add_argument('-j', '--jobs', type=int, default=1, help='Process this many projects in parallel, 0 means one per CPU. Ignored for commands run by a server, see the serve subcommand')
+        add_cache_arguments(parser)
+
+
+# Each worker process of the --jobs pool keeps one subcommand instance for all projects it processes
+worker_subcommand = None
+
+# The loaded projects kept by the serve subcommand, None if this process is not a server
+server_project_cache = None
+
+
+def initialize_worker_subcommand(subcommand_class, args):
+    global worker_subcommand
+    worker_subcommand = subcommand_class(args)
+
+
+def process_project_path_in_worker(project_path):
+    return worker_subcommand.process_project_path(project_path)
+
+
+def job_count(requested_jobs):
+    # worker processes forked by a server would each get their own copy of its
+    # project cache, so nothing they load would be kept, and its listening socket
+    return 1 if server_project_cache is not None else requested_jobs
+
+
+def add_cache_arguments(parser):
+    parser.add_argument('--cache-dir', default=os.environ.get('XCODEPROJECT_CACHE_DIR'), help='Cache parsed project files in this directory. Defaults to $XCODEPROJECT_CACHE_DIR, caching is off if neither is set')
+    parser.add_argument('--cache-size', type=int, default=cache.ParseCache.default_max_size / (1024 * 1024), help='Maximum total size of the parse cache in MB')
 
 
 class SubcommandListProjectFileBuildSettings(ProjectFileProcessingSubcommand):
     """List build settings that are defined in a project file, either at the project or target level."""
 
+    lazy_loading = True
+
     def process_project(self, project):
         project_header = ['\n========== Project {} ({}) =========='.format(project.name, project.path)]
         project_configs = project.root_object().buildConfigurationList
@@ -89,7 +250,9 @@ class SubcommandListProjectFileBuildSettings(ProjectFileProcessingSubcommand):
 
 class SubcommandPrintShellScripts(ProjectFileProcessingSubcommand):
     """Print the code of all shell script build phases"""
-    
+
+    lazy_loading = True
+
     def process_project(self, project):
         all_phases = []
         for target in project.targets():
@@ -111,54 +274,455 @@ class SubcommandPrintShellScripts(ProjectFileProcessingSubcommand):
 
 class SubcommandPrintOrphanedFileReferences(ProjectFileProcessingSubcommand):
     """Print file references that are not used anywhere"""
+
+    lazy_loading = True
     
     def process_project(self, project):
-        known_file_reference_map = self.known_file_reference_map_for_project(project)
-        orphaned_file_references = {k: v for k, v in project.file_reference_map().items() if k not in known_file_reference_map}
+        orphaned_file_references = [ref for id, ref in sorted(project.file_reference_map().items()) if not project.referrers_of(id)]
 
         if orphaned_file_references:
             print '======= Orphaned file references (PBXFileReference) in {}'.format(project.name)
-            for id, ref in orphaned_file_references.items():
-                print '{} {}'.format(id, ref.path)
+            for ref in orphaned_file_references:
+                print '{} {}'.format(ref.id, ref.path)
+
+
+class SubcommandPrintMissingFiles(ProjectFileProcessingSubcommand):
+    """Print file references whose files do not exist. Directories shared by several projects are listed once per process, so with --jobs once per worker process"""
+
+    lazy_loading = True
 
-    def known_file_reference_map_for_project(self, project):
-        known_file_reference_map = {}
+    def process_project(self, project):
+        # shared by all projects processed in this process, so common directories are listed once per process
+        if not hasattr(self, 'listing_cache'):
+            self.listing_cache = missingfiles.DirectoryListingCache(threads=self.args.threads)
+        missing_file_references = missingfiles.missing_file_references(project, self.listing_cache)
+
+        if missing_file_references:
+            print '======= File references to missing files in {}'.format(project.name)
+            for object_id, path in missing_file_references:
+                print '{} {}'.format(object_id, path)
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        super(SubcommandPrintMissingFiles, cls).configure_argument_parser(parser)
+        parser.add_argument('--threads', type=int, default=8, help='Number of threads per process that list directories. Each process, one per job with --jobs, keeps its own directory listings')
 
-        for id, build_file in project.build_file_map().items():
-            known_file_reference_map[build_file.fileRef.id] = build_file
 
-        for group_id, group in project.all_groups_map().items():
-            for item in group.children:
-                if item.is_file_reference():
-                    known_file_reference_map[item.id] = item
-        
-        return known_file_reference_map
+class SubcommandPrintUnreachableObjects(ProjectFileProcessingSubcommand):
+    """Print objects of any kind that cannot be reached from the project's root object"""
+
+    lazy_loading = True
+
+    def process_project(self, project):
+        unreachable_objects = project.unreachable_objects()
+        if not unreachable_objects:
+            return
+
+        print '======= {} unreachable objects in {}'.format(len(unreachable_objects), project.name)
+        for item in sorted(unreachable_objects, key=lambda item: (item.isa, item.id)):
+            print '{} {} line {}'.format(item.id, item.isa, item.line_number_start)
 
 
-# TODO: generalize this for arbitrary settings
 class SubcommandChangeProjectLevelWhitespaceSetting(ProjectFileProcessingSubcommand):
-    """Generate sed statements for adding a usesTabs setting and value for a project"""
-    
+    """Add or change the usesTabs setting of a project"""
+
+    lazy_loading = True
+
     def process_project(self, project):
         main_group = project.object_for_id(project.main_group_id())
 
-        if 'usesTabs' in main_group.data:
+        if main_group.data.get('usesTabs') == self.args.value:
             print 'already has usesTabs setting: {} {}'.format(main_group.data['usesTabs'], project.path)
             return
 
-        print r"sed -i '' -e $'{}i\\\n\\\t\\\t\\\tusesTabs = {};\n' '{}'".format(main_group.line_number_end, self.args.value, os.path.join(project.path, 'project.pbxproj'))
+        if self.args.dry_run:
+            print 'would set usesTabs = {}: {}'.format(self.args.value, project.path)
+            return
+
+        writer = pbxproj.PBXProjWriter(project.project_file)
+        writer.set_property(main_group.id, 'usesTabs', self.args.value)
+        writer.write()
+        print 'set usesTabs = {}: {}'.format(self.args.value, project.path)
 
     @classmethod
     def configure_argument_parser(cls, parser):
         super(SubcommandChangeProjectLevelWhitespaceSetting, cls).configure_argument_parser(parser)
-        parser.add_argument('value', help='New settings value, 0 or 1')
+        parser.add_argument('value', choices=['0', '1'], help='New settings value, 0 or 1')
+        parser.add_argument('-n', '--dry-run', action='store_true', help='Only report the projects that would change')
+
+
+class SubcommandSetBuildSettings(ProjectFileProcessingSubcommand):
+    """Set, unset or append to build settings at the project or target level"""
+
+    lazy_loading = True
+
+    def run(self):
+        if not self.args.edits:
+            print >> sys.stderr, 'No build setting edits given, use --set, --unset or --append'
+            exit(1)
+        super(SubcommandSetBuildSettings, self).run()
+
+    def process_project(self, project):
+        if not hasattr(self, 'editor'):
+            self.editor = buildsettings.BuildSettingsEditor(self.args.edits, targets=self.args.targets, target_names=self.args.target_names, configuration_names=self.args.configuration_names)
+        writer = pbxproj.PBXProjWriter(project.project_file)
+        changed_configurations = self.editor.apply(project, writer)
+        if not changed_configurations:
+            return
+
+        if self.args.dry_run:
+            sys.stdout.write(writer.unified_diff())
+            return
+        writer.write()
+        print 'changed {} build configuration(s): {}'.format(len(changed_configurations), project.path)
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        super(SubcommandSetBuildSettings, cls).configure_argument_parser(parser)
+        for operation, metavar, help in (('set', 'NAME=VALUE', 'Set a build setting'), ('unset', 'NAME', 'Remove a build setting'), ('append', 'NAME=VALUE', 'Append a value to a list build setting')):
+            parser.add_argument('--' + operation, dest='edits', action='append', metavar=metavar, type=build_setting_edit_argument_type(operation), help=help + ', can be given multiple times')
+        parser.add_argument('--targets', action='store_true', help='Edit the target-level instead of the project-level build settings')
+        parser.add_argument('-t', '--target', dest='target_names', action='append', metavar='NAME', help='Only edit the target with this name, can be given multiple times. Implies --targets')
+        parser.add_argument('-c', '--configuration', dest='configuration_names', action='append', metavar='NAME', help='Only edit the build configuration with this name, can be given multiple times')
+        parser.add_argument('-n', '--dry-run', action='store_true', help='Print the changes as a diff instead of applying them')
+
+
+class SubcommandQueryBuildSettings(ProjectFileProcessingSubcommand):
+    """Load the build settings of all projects into a table and filter, group or export it"""
+
+    lazy_loading = True
+    print_project_paths = False
+
+    def process_project(self, project):
+        return settingsstore.BuildSettingsStore.rows_for_project(project)
+
+    def collect_result(self, project_path, rows):
+        if not hasattr(self, 'store'):
+            self.store = settingsstore.BuildSettingsStore()
+        self.store.add_rows(project_path, rows)
+
+    def finish(self):
+        store = getattr(self, 'store', settingsstore.BuildSettingsStore())
+        rows = store.rows(self.args.filters or ())
+        output = open(self.args.output, 'wb') if self.args.output else sys.stdout
+        try:
+            if self.args.group_by:
+                self.write_group_counts(output, store.group_counts(self.args.group_by, rows))
+            elif self.args.format == 'csv':
+                store.write_csv(output, rows)
+            elif self.args.format == 'ndjson':
+                store.write_ndjson(output, rows)
+            else:
+                for row in rows:
+                    output.write(u'\t'.join(store.row_values(row)).encode('utf-8') + '\n')
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+    def write_group_counts(self, output, group_counts):
+        if self.args.format == 'csv':
+            writer = csv.writer(output)
+            writer.writerow([self.args.group_by, 'count'])
+            for value, count in group_counts.items():
+                writer.writerow([value.encode('utf-8') if isinstance(value, unicode) else value, count])
+        elif self.args.format == 'ndjson':
+            for value, count in group_counts.items():
+                output.write(json.dumps(collections.OrderedDict([(self.args.group_by, value), ('count', count)])) + '\n')
+        else:
+            for value, count in group_counts.items():
+                output.write(u'{:>8} {}\n'.format(count, value).encode('utf-8'))
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        super(SubcommandQueryBuildSettings, cls).configure_argument_parser(parser)
+        parser.add_argument('-w', '--where', dest='filters', action='append', metavar='COLUMN=PATTERN', type=settings_filter_argument_type, help='Only include rows whose column matches the glob pattern, or does not match it with !=. The columns are {}. Can be given multiple times'.format(', '.join(settingsstore.BuildSettingsStore.columns)))
+        parser.add_argument('-g', '--group-by', choices=settingsstore.BuildSettingsStore.columns, help='Print the number of matching rows per value of this column instead of the rows')
+        parser.add_argument('-f', '--format', choices=['text', 'csv', 'ndjson'], default='text', help='Output format')
+        parser.add_argument('-o', '--output', help='Write the result to this file instead of stdout')
+
+
+class SubcommandQuery(ProjectFileProcessingSubcommand):
+    """Print the values selected by a query like 'PBXNativeTarget[name=App].buildPhases[isa=PBXShellScriptBuildPhase].shellScript'"""
+
+    lazy_loading = True
+
+    def process_project(self, project):
+        # compiled once when the arguments were parsed and reused for every project
+        values = self.args.query.evaluate(project)
+        if self.args.count:
+            print len(values)
+            return
+        for value in values:
+            if self.args.json:
+                print json.dumps(self.json_value(value), sort_keys=True)
+            elif isinstance(value, xcodeproject.ProjectItem):
+                print '{} {} line {}'.format(value.id, value.isa, value.line_number_start)
+            elif isinstance(value, basestring):
+                print value.encode('utf-8') if isinstance(value, unicode) else value
+            else:
+                print json.dumps(value, sort_keys=True)
+
+    @classmethod
+    def json_value(cls, value):
+        if isinstance(value, xcodeproject.ProjectItem):
+            return {'id': value.id, 'isa': value.isa, 'line': value.line_number_start}
+        return value
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        super(SubcommandQuery, cls).configure_argument_parser(parser)
+        parser.add_argument('query', type=query_argument_type, help='The query. It starts with an isa or item class name, or * for all objects, followed by property names separated by ".". Each can have filters like [name=App], [name!=App], [path~=*.m] or [name]')
+        parser.add_argument('--count', action='store_true', help='Only print the number of values per project')
+        parser.add_argument('--json', action='store_true', help='Print each value as JSON, objects as their ID, isa and line number')
+
+
+def query_argument_type(text):
+    try:
+        return query.Query(text)
+    except query.QuerySyntaxError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def settings_filter_argument_type(expression):
+    try:
+        return settingsstore.SettingsFilter.from_expression(expression)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def build_setting_edit_argument_type(operation):
+    def argument_type(argument):
+        try:
+            return buildsettings.BuildSettingEdit.from_argument(operation, argument)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return argument_type
+
+
+class SubcommandWatch(tool_base.AbstractSubcommand):
+    """Watch a project and print the objects that were added, removed or modified whenever its project file changes"""
+
+    def run(self):
+        if server_project_cache is not None:
+            print >> sys.stderr, 'The watch subcommand cannot run in the server, use --no-server'
+            exit(1)
+        project = xcodeproject.XcodeProject(self.args.path, lazy=True, cache=self.parse_cache())
+        print 'Watching {} ({} objects)'.format(project.path, len(project.object_data))
+        sys.stdout.flush()
+        try:
+            while True:
+                time.sleep(self.args.interval)
+                previous_object_data = project.object_data
+                try:
+                    changes = project.refresh()
+                except (IOError, OSError, pbxproj.PBXProjParseError) as e:
+                    # most likely caught in the middle of a save, try again on the next check
+                    print >> sys.stderr, 'Unable to reload: {}'.format(e)
+                    continue
+                if changes:
+                    self.report_changes(project, previous_object_data, changes)
+        except KeyboardInterrupt:
+            pass
+
+    def report_changes(self, project, previous_object_data, changes):
+        print '{} {} added, {} removed, {} modified'.format(time.strftime('%H:%M:%S'), len(changes.added), len(changes.removed), len(changes.modified))
+        for prefix, object_ids in (('+', changes.added), ('-', changes.removed), ('~', changes.modified)):
+            for object_id in sorted(object_ids):
+                if object_id in project.object_data:
+                    item = project.object_for_id(object_id)
+                    print u'    {} {} line {}'.format(prefix, item, item.line_number_start).encode('utf-8')
+                else:
+                    print '    {} {} {}'.format(prefix, object_id, previous_object_data[object_id]['isa'])
+        sys.stdout.flush()
+
+    def parse_cache(self):
+        if not self.args.cache_dir:
+            return None
+        return cache.ParseCache(self.args.cache_dir, max_size=self.args.cache_size * 1024 * 1024)
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        parser.add_argument('path', help='Path to the .xcodeproj bundle')
+        parser.add_argument('-i', '--interval', type=float, default=1.0, help='Seconds between checks for changes')
+        add_cache_arguments(parser)
+
+
+class SubcommandPrintWorkspaceDependencies(tool_base.AbstractSubcommand):
+    """Print the target dependencies of all projects in a workspace, including those between projects"""
+
+    def run(self):
+        parse_cache = cache.ParseCache(self.args.cache_dir, max_size=self.args.cache_size * 1024 * 1024) if self.args.cache_dir else None
+        xcode_workspace = workspace.XcodeWorkspace(self.args.path, lazy=True, cache=parse_cache, jobs=job_count(self.args.jobs))
+        for project in xcode_workspace.projects.values():
+            print project.path
+            for target in sorted(project.targets(), key=lambda target: target.name):
+                for dependency_target in target.dependency_targets():
+                    print u'{} -> {} {}'.format(target.name, dependency_target.name, dependency_target.project.name).encode('utf-8')
+
+        for path in xcode_workspace.missing_project_paths:
+            print >> sys.stderr, 'Missing project {}'.format(path)
+        for project_path, proxy_id in xcode_workspace.unresolved_proxy_ids:
+            print >> sys.stderr, 'Unresolved container item proxy {} in {}'.format(proxy_id, project_path)
+        for path in xcode_workspace.failed_project_paths:
+            print >> sys.stderr, 'Unable to load {}: {}'.format(path, xcode_workspace.load_errors[path])
+        xcode_workspace.close()
+        if xcode_workspace.failed_project_paths:
+            exit(1)
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        parser.add_argument('path', help='Path to the .xcworkspace bundle')
+        parser.add_argument('-j', '--jobs', type=int, default=0, help='Parse this many project files in parallel, 0 means one per CPU. Ignored for commands run by a server')
+        add_cache_arguments(parser)
+
+
+class SubcommandCache(tool_base.AbstractSubcommand):
+    """Show or clear the contents of the parse cache"""
+
+    def run(self):
+        if not self.args.cache_dir:
+            print >> sys.stderr, 'No cache directory given, use --cache-dir or set XCODEPROJECT_CACHE_DIR'
+            exit(1)
+
+        parse_cache = cache.ParseCache(self.args.cache_dir, max_size=self.args.cache_size * 1024 * 1024)
+        if self.args.clear:
+            print 'Removed {} cache entries from {}'.format(parse_cache.clear(), parse_cache.directory)
+            return
+
+        entries = parse_cache.entries()
+        for path, size, last_used in entries:
+            print '{:>10} {} {}'.format(size, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used)), path)
+        print '{} entries, {:.1f} MB of {} MB in {}'.format(len(entries), sum(entry[1] for entry in entries) / (1024.0 * 1024), self.args.cache_size, parse_cache.directory)
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        add_cache_arguments(parser)
+        parser.add_argument('--clear', action='store_true', help='Remove all cache entries')
+
+
+class SubcommandServe(tool_base.AbstractSubcommand):
+    """Keep loaded projects in memory and run the commands of other invocations of this tool against them"""
+
+    def run(self):
+        global server_project_cache
+        if server_project_cache is not None:
+            print >> sys.stderr, 'Already running as a server'
+            exit(1)
+
+        try:
+            tool_server = server.ToolServer(self.args.socket, run_tool)
+        except socket.error as e:
+            print >> sys.stderr, 'Unable to listen on {}: {}'.format(self.args.socket, e)
+            exit(1)
+        server_project_cache = server.ProjectLRU(max_objects=self.args.max_objects, max_bytes=self.args.max_mb * 1024 * 1024 if self.args.max_mb else None)
+        print 'Serving on {}'.format(self.args.socket)
+        sys.stdout.flush()
+        try:
+            tool_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            tool_server.server_close()
+            server_project_cache.clear()
+            server_project_cache = None
+
+    @classmethod
+    def configure_argument_parser(cls, parser):
+        parser.add_argument('--socket', default=server.default_socket_path(), help='Path of the Unix socket to listen on. Defaults to $XCODEPROJECT_SOCKET or a per-user path in $XDG_RUNTIME_DIR or the temporary directory, which is where other invocations look for the server')
+        parser.add_argument('--max-objects', type=int, default=2000000, help='Drop the least recently used projects when the loaded projects have more objects than this')
+        parser.add_argument('--max-mb', type=int, help='Drop the least recently used projects when the loaded project files are larger than this in total')
+
+
+def run_tool(arguments):
+    """Run the tool in this process with the given arguments, buffering its output. Returns a ``(status, output, error_output)`` tuple."""
+    saved_argv, saved_stdout, saved_stderr = sys.argv, sys.stdout, sys.stderr
+    # --verbose configures the root logger, which must not keep that request's level and output buffer
+    root_logger = logging.getLogger()
+    saved_level, saved_handlers = root_logger.level, root_logger.handlers[:]
+    root_logger.handlers = []
+    root_logger.setLevel(logging.WARNING)
+    sys.argv = ['xcodeproject-util'] + list(arguments)
+    sys.stdout, sys.stderr = OutputBuffer(), OutputBuffer()
+    status = 0
+    try:
+        XcodeprojectTool.main()
+    except SystemExit as e:
+        status = e.code
+        if status is not None and not isinstance(status, int):
+            print >> sys.stderr, status
+            status = 1
+    except Exception:
+        status = 1
+        traceback.print_exc(file=sys.stderr)
+    finally:
+        output, error_output = sys.stdout.getvalue(), sys.stderr.getvalue()
+        sys.argv, sys.stdout, sys.stderr = saved_argv, saved_stdout, saved_stderr
+        root_logger.handlers = saved_handlers
+        root_logger.setLevel(saved_level)
+    return status or 0, output, error_output
 
-        
 
 class XcodeprojectTool(tool_base.Tool):
     """Xcode Project Tool"""
-    
-    pass
+
+    # never forwarded to a server
+    local_subcommand_names = ('serve', 'watch')
+
+    def run(self):
+        global_args, remaining_arguments = self.global_argument_parser().parse_known_args()
+        if self.should_forward_to_server(global_args, remaining_arguments):
+            result = server.forward_request(server.default_socket_path(), sys.argv[1:])
+            if result is not None:
+                status, output, error_output = result
+                sys.stdout.write(output)
+                sys.stderr.write(error_output)
+                if status:
+                    exit(status)
+                return
+
+        if not global_args.profile:
+            super(XcodeprojectTool, self).run()
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(super(XcodeprojectTool, self).run)
+        finally:
+            profiler.dump_stats(global_args.profile)
+
+    def global_argument_parser(self):
+        """Return a parser for only the options that come before the subcommand name."""
+        parser = argparse.ArgumentParser(add_help=False)
+        self.configure_argument_parser(parser)
+        return parser
+
+    def should_forward_to_server(self, global_args, remaining_arguments):
+        if server_project_cache is not None or os.environ.get('XCODEPROJECT_NO_SERVER') or global_args.no_server:
+            return False
+        return self.subcommand_name_for_arguments(remaining_arguments) not in self.local_subcommand_names
+
+    def subcommand_name_for_arguments(self, arguments):
+        """
+        Return the name of the subcommand that the given arguments after the global
+        options run, with abbreviations resolved like the base class does, or None if
+        there is no unique one.
+
+        """
+        names = [argument for argument in arguments if not argument.startswith('-')][:1]
+        if not names:
+            return None
+        subcommand_names = self.subcommand_map().keys()
+        if names[0] in subcommand_names:
+            return names[0]
+        regex = re.compile('.*?'.join('(' + re.escape(character) + ')' for character in names[0]))
+        candidates = [name for name in subcommand_names if regex.match(name)]
+        return candidates[0] if len(candidates) == 1 else None
+
+    def configure_argument_parser(self, parser):
+        parser.add_argument('--timings', action='store_const', const='text', help='Report the time spent in each phase of processing each project on stderr')
+        parser.add_argument('--timings-json', dest='timings', action='store_const', const='json', help='Like --timings, but report one JSON object per project')
+        parser.add_argument('--profile', metavar='FILE', help='Write cProfile statistics of the run to this file, for use with the pstats module')
+        parser.add_argument('--no-server', action='store_true', help='Do not forward the command to a running server, see the serve subcommand. Setting $XCODEPROJECT_NO_SERVER has the same effect')
     
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+#!usr/bin/env python
+
+import os
+import sys
+import shutil
+import tempfile
+import collections
+import multiprocessing
+import xml.etree.ElementTree
+
+from . import pbxproj
+from . import xcodeproject
+from .cache import ParseCache
+
+
+class XcodeWorkspace(object):
+    """
+    An Xcode workspace bundle and the projects it refers to.
+
+    All projects are loaded when the workspace is created, each one only once
+    even if the workspace refers to it several times. Like in Xcode, projects
+    that the loaded ones refer to through ``projectReferences`` are loaded as
+    well. Each project's ``workspace`` attribute is set to the workspace, which
+    lets :py:class:`xcodeproject.PBXContainerItemProxy`,
+    :py:class:`xcodeproject.PBXTargetDependency` and
+    :py:class:`xcodeproject.PBXReferenceProxy` items resolve references to
+    objects in other projects, see :py:meth:`xcodeproject.AbstractTarget.dependency_targets`.
+
+    Projects that do not exist or fail to load are listed in
+    :py:attr:`missing_project_paths` and :py:attr:`failed_project_paths`, the
+    others are loaded anyway.
+
+    With more than one job, the project files are parsed in a pool of worker
+    processes, which store the results in the parse cache, so that the main
+    process only has to unpickle them. A temporary cache is used instead if
+    none is given, or if the given one is too small to hold the results of
+    all the files parsed at once, which would otherwise be evicted before
+    they are read and parsed again.
+
+    :param str path: The path to the .xcworkspace bundle.
+    :param bool lazy: Load the projects in lazy mode, see :py:class:`xcodeproject.XcodeProject`.
+    :param cache: An optional :py:class:`xcodeproject.cache.ParseCache`.
+    :param int jobs: The number of worker processes that parse project files, 0 means one per CPU
+                     and 1 parses them in this process.
+    :param intern_pool: An optional :py:class:`xcodeproject.interning.InternPool` shared by all
+                        projects. Data parsed by worker processes does not go through it.
+    :param bool include_referenced_projects: If false, only the projects listed in the workspace are loaded.
+
+    """
+
+    def __init__(self, path, lazy=False, cache=None, jobs=0, intern_pool=None, include_referenced_projects=True):
+        path = os.path.abspath(os.path.expanduser(path))
+        if not os.path.exists(os.path.join(path, 'contents.xcworkspacedata')):
+            raise Exception('Not a valid workspace path: {}'.format(path))
+        self.path = path
+        self.lazy = lazy
+        self.cache = cache
+        self.jobs = jobs
+        self.intern_pool = intern_pool
+        self.include_referenced_projects = include_referenced_projects
+        # real path -> project, in the order they were loaded
+        self.projects = collections.OrderedDict()
+        self.missing_project_paths = []
+        self.failed_project_paths = []
+        # path -> the exception raised while loading it
+        self.load_errors = {}
+        # (project path, proxy ID) -> project that contains the remote object
+        self.proxy_projects = {}
+        self.unresolved_proxy_ids = []
+        self.load()
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def container_directory(self):
+        """Return the directory that ``container:`` locations are relative to, the one containing the project for a workspace inside a project bundle."""
+        directory = os.path.dirname(self.path)
+        if directory.endswith('.xcodeproj'):
+            return os.path.dirname(directory)
+        return directory
+
+    def project_paths(self):
+        """Return the absolute paths of the projects listed in the workspace, in the order of the workspace file."""
+        root = xml.etree.ElementTree.parse(os.path.join(self.path, 'contents.xcworkspacedata')).getroot()
+        paths = []
+        self.collect_project_paths(root, self.container_directory(), paths)
+        return paths
+
+    def collect_project_paths(self, element, group_directory, paths):
+        for child in element:
+            path = self.path_for_location(child.get('location', ''), group_directory)
+            if child.tag == 'Group':
+                self.collect_project_paths(child, path or group_directory, paths)
+            elif child.tag == 'FileRef' and path and path.endswith('.xcodeproj'):
+                paths.append(path)
+
+    def path_for_location(self, location, group_directory):
+        kind, _, path = location.partition(':')
+        if kind == 'group':
+            base_path = group_directory
+        elif kind == 'container':
+            base_path = self.container_directory()
+        elif kind == 'absolute':
+            base_path = '/'
+        elif kind == 'self':
+            enclosing_path = os.path.dirname(self.path)
+            if not path and enclosing_path.endswith('.xcodeproj'):
+                return enclosing_path
+            base_path = self.container_directory()
+        else:
+            # developer: and other locations outside of the workspace
+            return None
+        return os.path.normpath(os.path.join(base_path, path))
+
+    def load(self):
+        paths = self.project_paths()
+        while paths:
+            projects = self.load_projects(paths)
+            paths = [path for project in projects for path in self.referenced_project_paths(project)] if self.include_referenced_projects else []
+        self.resolve_proxies()
+
+    def load_projects(self, paths):
+        """Load the projects at the given paths that are not loaded yet, and return them."""
+        pending_paths = collections.OrderedDict()
+        for path in paths:
+            key = os.path.realpath(path)
+            if key in self.projects or key in pending_paths or path in self.load_errors:
+                continue
+            if not os.path.exists(os.path.join(path, 'project.pbxproj')):
+                if path not in self.missing_project_paths:
+                    self.missing_project_paths.append(path)
+                continue
+            pending_paths[key] = path
+
+        parse_cache = self.cache
+        temporary_directory = None
+        # on a single CPU, parsing in the main process saves storing and reading the results
+        if (self.jobs or multiprocessing.cpu_count()) > 1 and len(pending_paths) > 1:
+            # cache entries are smaller than the project files they were parsed from
+            file_sizes = [os.path.getsize(os.path.join(path, 'project.pbxproj')) for path in pending_paths.values()]
+            if parse_cache is None or parse_cache.max_size < sum(file_sizes):
+                temporary_directory = tempfile.mkdtemp(prefix='xcodeproject-workspace-')
+                # large enough that no entry is evicted before the main process reads it
+                parse_cache = ParseCache(temporary_directory, max_size=sys.maxint)
+            self.parse_in_worker_processes(pending_paths.values(), parse_cache)
+
+        projects = []
+        try:
+            for key, path in pending_paths.items():
+                try:
+                    project = xcodeproject.XcodeProject(path, lazy=self.lazy, cache=parse_cache, intern_pool=self.intern_pool)
+                except Exception as e:
+                    self.failed_project_paths.append(path)
+                    self.load_errors[path] = e
+                    continue
+                project.workspace = self
+                self.projects[key] = project
+                projects.append(project)
+        finally:
+            if temporary_directory:
+                shutil.rmtree(temporary_directory, ignore_errors=True)
+        return projects
+
+    def parse_in_worker_processes(self, paths, parse_cache):
+        pool = multiprocessing.Pool(min(self.jobs or multiprocessing.cpu_count(), len(paths)))
+        try:
+            pool.map(parse_project_file_in_worker, [(os.path.join(path, 'project.pbxproj'), parse_cache.directory, parse_cache.max_size) for path in paths], chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    def referenced_project_paths(self, project):
+        """Return the paths of the projects that the given project refers to through ``projectReferences``."""
+        references = project.object_data[project.root_object_id].get('projectReferences', ())
+        paths = [self.file_reference_path(project, reference.get('ProjectRef')) for reference in references]
+        return [path for path in paths if path]
+
+    @classmethod
+    def file_reference_path(cls, project, object_id):
+        if object_id not in project.object_data:
+            return None
+        path = project.resolved_path_for_id(object_id)
+        if path is None:
+            # not in the group tree, so only paths that do not depend on a group work
+            path = project.resolved_path_for_data(project.object_data[object_id], None, project.source_root())
+        if not path or not os.path.isabs(path):
+            return None
+        return os.path.normpath(path)
+
+    def resolve_proxies(self):
+        """
+        Find the project that each container item proxy referring to another project
+        points into. Proxies whose project or remote object cannot be found are listed
+        in :py:attr:`unresolved_proxy_ids` as ``(project path, proxy ID)`` tuples. Call
+        this again after refreshing projects.
+
+        """
+        self.proxy_projects = {}
+        self.unresolved_proxy_ids = []
+        for project in self.projects.values():
+            for proxy_id in sorted(project.project_file.class_name_to_object_ids_map.get('PBXContainerItemProxy', ())):
+                data = project.object_data[proxy_id]
+                container_portal_id = data.get('containerPortal')
+                if container_portal_id == project.root_object_id:
+                    continue
+                path = self.file_reference_path(project, container_portal_id)
+                remote_project = self.project_for_path(path) if path else None
+                if remote_project is not None:
+                    self.proxy_projects[project.path, proxy_id] = remote_project
+                if remote_project is None or data.get('remoteGlobalIDString') not in remote_project.object_data:
+                    self.unresolved_proxy_ids.append((project.path, proxy_id))
+
+    def project_for_path(self, path):
+        """Return the loaded project at the given path, or None."""
+        return self.projects.get(os.path.realpath(os.path.abspath(os.path.expanduser(path))))
+
+    def project_for_proxy_id(self, project, proxy_id):
+        """Return the project that the container item proxy with the given ID in the given project points into, or None."""
+        return self.proxy_projects.get((project.path, proxy_id))
+
+    def close(self):
+        for project in self.projects.values():
+            project.close()
+
+
+def parse_project_file_in_worker(arguments):
+    project_file_path, cache_directory, cache_max_size = arguments
+    try:
+        pbxproj.PBXProjFile(project_file_path, cache=ParseCache(cache_directory, max_size=cache_max_size)).close()
+    except Exception:
+        # reported when the main process loads the project
+        pass
@@ -0,0 +1,162 @@
+#!usr/bin/env python
+
+import os
+import re
+import logging
+
+
+class XcconfigFile(object):
+    """
+    The parsed contents of one .xcconfig file, without its includes resolved.
+
+    ``entries`` lists the settings and includes in file order as
+    ``('setting', name, value)`` and ``('include', path, optional)`` tuples.
+    Setting names keep their conditions in a normalized form, like
+    ``OTHER_LDFLAGS[sdk=iphoneos*][arch=arm64]``. Include paths are absolute.
+
+    """
+
+    setting_re = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)\s*((?:\[[^\]]*\]\s*)*)=(.*)$')
+    condition_re = re.compile(r'\[([^\]]*)\]')
+    include_re = re.compile(r'^#include(\?)?\s*"([^"]*)"')
+
+    def __init__(self, path, stat_result, entries):
+        self.path = path
+        self.stat_result = stat_result
+        self.entries = entries
+
+    @classmethod
+    def parse(cls, path):
+        """Read and parse the file at the given path. Raises IOError or OSError if it cannot be read."""
+        with open(path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            text = f.read()
+        return cls(path, stat_result, cls.parse_text(text, os.path.dirname(path)))
+
+    @classmethod
+    def parse_text(cls, text, directory):
+        entries = []
+        for line in text.decode('utf-8', 'replace').splitlines():
+            line = line.strip()
+            include_match = cls.include_re.match(line)
+            if include_match:
+                include_path = os.path.normpath(os.path.join(directory, include_match.group(2)))
+                entries.append(('include', include_path, bool(include_match.group(1))))
+                continue
+
+            # like Xcode, "//" always starts a comment, even inside a value
+            line = line.split('//', 1)[0].strip()
+            if not line:
+                continue
+            setting_match = cls.setting_re.match(line)
+            if not setting_match:
+                logging.debug('Ignoring unrecognized line in xcconfig file in %s: %s', directory, line)
+                continue
+            name, conditions, value = setting_match.groups()
+            entries.append(('setting', name + cls.normalized_conditions(conditions), value.strip().rstrip(';').rstrip()))
+        return entries
+
+    @classmethod
+    def normalized_conditions(cls, conditions):
+        # "[sdk=iphoneos*, arch=arm64]" and "[sdk=iphoneos*][arch=arm64]" are equivalent
+        normalized = []
+        for condition_list in cls.condition_re.findall(conditions):
+            for condition in condition_list.split(','):
+                condition = condition.strip()
+                if condition:
+                    condition_name, unused, pattern = condition.partition('=')
+                    normalized.append('[{}={}]'.format(condition_name.strip(), pattern.strip()))
+        return ''.join(normalized)
+
+    def is_current(self):
+        try:
+            stat_result = os.stat(self.path)
+        except OSError:
+            return False
+        return (stat_result.st_mtime, stat_result.st_size) == (self.stat_result.st_mtime, self.stat_result.st_size)
+
+
+class XcconfigCache(object):
+    """
+    Parses .xcconfig files and resolves their includes, keeping the results
+    for as long as the files' modification times and sizes do not change.
+
+    Each file is parsed once, however many other files include it, so a
+    shared base configuration used by many projects is read only once per run.
+    The flattened settings of a file are cached too and reused as long as none
+    of the files in its include tree changed.
+
+    """
+
+    def __init__(self):
+        # path -> XcconfigFile
+        self.files = {}
+        # path -> (list of XcconfigFile in the include tree, paths of missing includes, settings)
+        self.settings_cache = {}
+        self.parse_count = 0
+
+    def file(self, path):
+        """Return the parsed :py:class:`XcconfigFile` at the given path. Raises IOError or OSError if it cannot be read."""
+        path = os.path.abspath(path)
+        xcconfig_file = self.files.get(path)
+        if xcconfig_file is None or not xcconfig_file.is_current():
+            xcconfig_file = XcconfigFile.parse(path)
+            self.parse_count += 1
+            self.files[path] = xcconfig_file
+        return xcconfig_file
+
+    def settings(self, path):
+        """
+        Return a dictionary of the settings defined by the xcconfig file at the given
+        path and the files it includes, or None if the file cannot be read. A setting
+        assigned more than once gets its last value. Missing optional includes are
+        skipped, missing required ones are logged.
+
+        """
+        path = os.path.abspath(path)
+        cached = self.settings_cache.get(path)
+        if cached and all(self.files.get(f.path) is f and f.is_current() for f in cached[0]) and not any(os.path.exists(p) for p in cached[1]):
+            return cached[2]
+
+        try:
+            self.file(path)
+        except (IOError, OSError):
+            return None
+        included_files, missing_paths = [], []
+        settings = {}
+        self.collect_settings(path, settings, included_files, missing_paths, set())
+        self.settings_cache[path] = (included_files, missing_paths, settings)
+        return settings
+
+    def collect_settings(self, path, settings, included_files, missing_paths, active_paths):
+        xcconfig_file = self.file(path)
+        included_files.append(xcconfig_file)
+        active_paths.add(path)
+        for kind, name, value in xcconfig_file.entries:
+            if kind == 'setting':
+                settings[name] = value
+                continue
+            include_path, optional = name, value
+            if include_path in active_paths:
+                logging.warning('Ignoring recursive include of %s in %s', include_path, path)
+                continue
+            try:
+                self.collect_settings(include_path, settings, included_files, missing_paths, active_paths)
+            except (IOError, OSError):
+                missing_paths.append(include_path)
+                if not optional:
+                    logging.warning('Unable to read %s included by %s', include_path, path)
+        active_paths.discard(path)
+
+
+shared_cache = XcconfigCache()
+
+
+def load_xcconfig(path):
+    """
+    Return the settings of the .xcconfig file at the given path, including those
+    of the files it includes, or None if it cannot be read. Uses a process-wide
+    :py:class:`XcconfigCache`.
+
+    """
+    return shared_cache.settings(path)
@@ -1,13 +1,12 @@
 #!usr/bin/env python
 
 import os
-import re
-import sys
-import plistlib
-import subprocess
 import logging
 import collections
 
+from . import pbxproj
+from . import timing
+
 
 # def camel_case_to_underscore(camelcase_value):
 #     return re.sub(r'([a-z])([A-Z])', lambda match: match.group(1) + '_' + match.group(2).lower(), camelcase_value)
@@ -45,26 +44,151 @@ class ObjectReferenceListPropertyConverter(object):
         return [project.object_for_id(i) for i in value]
 
 
+class ReferenceProperty(object):
+    """
+    Descriptor that resolves an object reference property of a project
+    item on first access and caches the result on the instance.
+
+    """
+
+    def __init__(self, name, converter_class):
+        self.name = name
+        self.converter_class = converter_class
+        self.slot_name = self.slot_name_for_property_name(name)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            instance_dict = object.__getattribute__(instance, '__dict__')
+        except AttributeError:
+            # instances of classes with __slots__ cache the value in a slot
+            instance_dict = None
+            try:
+                return object.__getattribute__(instance, self.slot_name)
+            except AttributeError:
+                pass
+
+        if self.name not in instance.data:
+            raise AttributeError("'{}' object has no attribute '{}'".format(owner.__name__, self.name))
+        project = instance.project
+        if project.timings is None:
+            # the hottest accessor in lazy mode, so skip the phase unless timings are collected
+            value = self.converter_class.decode_property_value(project, instance.data[self.name])
+        else:
+            with project.timings.phase('references', 1):
+                value = self.converter_class.decode_property_value(project, instance.data[self.name])
+        if instance_dict is None:
+            setattr(instance, self.slot_name, value)
+        else:
+            # non-data descriptor, so the cached value shadows it from now on
+            instance_dict[self.name] = value
+        return value
+
+    @classmethod
+    def slot_name_for_property_name(cls, name):
+        return '_resolved_' + name
+
+
+class ProjectItemClass(type):
+    """
+    Metaclass for project items.
+
+    It merges the ``property_converters`` and ``property_defaults`` tables
+    declared by a class with those of its base classes once, when the
+    class is defined, and installs a :py:class:`ReferenceProperty`
+    descriptor for every object reference property. Classes that declare
+    ``__slots__`` get an additional slot for each of their reference
+    properties.
+
+    """
+
+    def __new__(metaclass, name, bases, namespace):
+        if '__slots__' in namespace:
+            # classes without an instance dictionary need a slot to cache each reference property
+            reference_slot_names = [ReferenceProperty.slot_name_for_property_name(property_name) for property_name, converter_class in namespace.get('property_converters', {}).items() if converter_class is not IdentityPropertyConverter]
+            namespace['__slots__'] = tuple(namespace['__slots__']) + tuple(reference_slot_names)
+        return super(ProjectItemClass, metaclass).__new__(metaclass, name, bases, namespace)
+
+    def __init__(cls, name, bases, namespace):
+        super(ProjectItemClass, cls).__init__(name, bases, namespace)
+        converter_map = dict(getattr(cls, 'converter_map', {}))
+        converter_map.update(namespace.get('property_converters', {}))
+        cls.converter_map = converter_map
+
+        property_defaults = dict(getattr(cls, 'merged_property_defaults', {}))
+        property_defaults.update(namespace.get('property_defaults', {}))
+        cls.merged_property_defaults = property_defaults
+
+        for property_name, converter_class in namespace.get('property_converters', {}).items():
+            if converter_class is not IdentityPropertyConverter:
+                setattr(cls, property_name, ReferenceProperty(property_name, converter_class))
+
+
 class ProjectItem(object):
+    """
+    An object in a project file.
+
+    Subclasses without ``__slots__`` get an instance dictionary as usual.
+    Classes with a very large number of instances in typical projects
+    declare an empty ``__slots__`` to avoid that overhead.
+
+    """
+
+    __metaclass__ = ProjectItemClass
+
+    __slots__ = ('id', 'data', 'line_number_start', 'line_number_end', 'byte_offset_start', 'byte_offset_end', 'project', '__weakref__')
+
+    property_converters = {
+        'files': ObjectReferenceListPropertyConverter
+    }
+
+    property_defaults = {
+        'name': '(no name)'
+    }
 
     def __init__(self, id, data):
         self.id = id
         self.data = data
         self.line_number_start = None
         self.line_number_end = None
-        self.name = '(no name)'
-
-    def parse_data(self, project):
-        converter_map = self.property_converter_map()
-        for property_name, value in self.data.items():
-            converter_class = converter_map.get(property_name, IdentityPropertyConverter)
-            value = converter_class.decode_property_value(project, value)
-            setattr(self, property_name, value)
-    
+        self.byte_offset_start = None
+        self.byte_offset_end = None
+        self.project = None
+
+    def __getattr__(self, name):
+        # plain properties are read from the data on each access instead of
+        # being copied onto the instance, reference properties are handled
+        # by ReferenceProperty descriptors
+        try:
+            data = object.__getattribute__(self, 'data')
+        except AttributeError:
+            data = None
+        if data is not None and name in data:
+            return data[name]
+        if name in self.merged_property_defaults:
+            return self.merged_property_defaults[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+
     def property_converter_map(self):
-        return {
-            'files': ObjectReferenceListPropertyConverter
-        }
+        return self.converter_map
+
+    def reset_resolved_references(self):
+        """Forget the resolved values of reference properties so that they are resolved again on next access."""
+        try:
+            instance_dict = object.__getattribute__(self, '__dict__')
+        except AttributeError:
+            instance_dict = None
+        for property_name, converter_class in self.converter_map.items():
+            if converter_class is IdentityPropertyConverter:
+                continue
+            if instance_dict is not None:
+                instance_dict.pop(property_name, None)
+                continue
+            try:
+                delattr(self, ReferenceProperty.slot_name_for_property_name(property_name))
+            except AttributeError:
+                pass
 
     def is_target(self):
         return False
@@ -72,6 +196,18 @@ class ProjectItem(object):
     def is_file_reference(self):
         return False
 
+    def raw_source(self):
+        """Return the text of this object as it appears in the project file."""
+        return self.project.project_file.raw_source(self.id)
+
+    def raw_source_buffer(self):
+        """
+        Return a zero-copy buffer over the text of this object in the memory-mapped
+        project file. It is only valid while the project is open.
+
+        """
+        return self.project.project_file.raw_source_buffer(self.id)
+
     def __unicode__(self):
         return u'<{} {} {}>'.format(type(self).__name__, self.id, self.name)
 
@@ -88,28 +224,40 @@ class ProjectItem(object):
 
 class PBXFileReference(ProjectItem):
 
+    __slots__ = ()
+
     def is_file_reference(self):
         return True
 
+    def parent_group(self):
+        return self.project.parent_group_for_id(self.id)
+
+    def resolved_path(self):
+        """See :py:meth:`XcodeProject.resolved_path_map`."""
+        return self.project.resolved_path_for_id(self.id)
+
 
 class PBXBuildFile(ProjectItem):
 
-    def property_converter_map(self):
-        converter_map = super(PBXBuildFile, self).property_converter_map()
-        converter_map.update({
-            'fileRef': ObjectReferencePropertyConverter
-        })
-        return converter_map
+    __slots__ = ()
+
+    property_converters = {
+        'fileRef': ObjectReferencePropertyConverter
+    }
 
 
 class PBXGroup(ProjectItem):
 
-    def property_converter_map(self):
-        converter_map = super(PBXGroup, self).property_converter_map()
-        converter_map.update({
-            'children': ObjectReferenceListPropertyConverter
-        })
-        return converter_map
+    property_converters = {
+        'children': ObjectReferenceListPropertyConverter
+    }
+
+    def parent_group(self):
+        return self.project.parent_group_for_id(self.id)
+
+    def resolved_path(self):
+        """See :py:meth:`XcodeProject.resolved_path_map`."""
+        return self.project.resolved_path_for_id(self.id)
 
 
 class PBXVariantGroup(PBXGroup):
@@ -121,11 +269,20 @@ class XCVersionGroup(PBXGroup):
 
 class XCBuildConfiguration(ProjectItem):
 
+    property_converters = {
+        'baseConfigurationReference': ObjectReferencePropertyConverter
+    }
+
     def build_settings(self):
         return self.data['buildSettings']
 
     def build_settings_text(self):
         settings = self.build_settings()
+        # cached until the settings dictionary is replaced, e.g. by a refresh
+        cached = self.__dict__.get('_build_settings_text')
+        if cached and cached[0] is settings:
+            return cached[1]
+
         setting_names = sorted(settings.keys())
         items = []
         for name in setting_names:
@@ -133,8 +290,10 @@ class XCBuildConfiguration(ProjectItem):
             if isinstance(value, list):
                 value = ' '.join(value)
             items.append('{} = {}\n'.format(name, value))
-        
-        return ''.join(items)
+
+        text = ''.join(items)
+        self._build_settings_text = (settings, text)
+        return text
 
 
 class XCConfigurationList(ProjectItem):
@@ -143,42 +302,44 @@ class XCConfigurationList(ProjectItem):
         for config in self.buildConfigurations:
             yield config
 
-    def property_converter_map(self):
-        converter_map = super(XCConfigurationList, self).property_converter_map()
-        converter_map.update({
-            'buildConfigurations': ObjectReferenceListPropertyConverter
-        })
-        return converter_map
+    property_converters = {
+        'buildConfigurations': ObjectReferenceListPropertyConverter
+    }
 
 
 class ConfigurableProjectItem(ProjectItem):
 
-    def property_converter_map(self):
-        property_map = super(ConfigurableProjectItem, self).property_converter_map()
-        property_map.update({
-            'buildConfigurationList': ObjectReferencePropertyConverter
-        })
-        return property_map
+    property_converters = {
+        'buildConfigurationList': ObjectReferencePropertyConverter
+    }
 
 
 class AbstractTarget(ConfigurableProjectItem):
 
-    def __init__(self, *args, **kwargs):
-        super(AbstractTarget, self).__init__(*args, **kwargs)
-        self.productName = '(no product name)'
+    property_defaults = {
+        'productName': '(no product name)'
+    }
 
     def is_target(self):
         return True
         
     def script_build_phases(self):
         return [p for p in self.buildPhases if isinstance(p, PBXShellScriptBuildPhase)]
+
+    def dependency_targets(self):
+        """
+        Return the targets this target depends on, including targets in other projects
+        if its project was loaded by an :py:class:`xcodeproject.workspace.XcodeWorkspace`
+        that contains them.
+
+        """
+        targets = [dependency.resolved_target() for dependency in self.dependencies]
+        return [target for target in targets if target is not None]
     
-    def property_converter_map(self):
-        property_map = super(AbstractTarget, self).property_converter_map()
-        property_map.update({
-            'buildPhases': ObjectReferenceListPropertyConverter
-        })
-        return property_map
+    property_converters = {
+        'buildPhases': ObjectReferenceListPropertyConverter,
+        'dependencies': ObjectReferenceListPropertyConverter
+    }
 
 
 class PBXProject(ConfigurableProjectItem):
@@ -197,14 +358,150 @@ class PBXShellScriptBuildPhase(ProjectItem):
     pass
 
 
-class XcodeProject(object):
+class PBXContainerItemProxy(ProjectItem):
+    """
+    A reference to an object that may live in another project, identified by
+    ``remoteGlobalIDString``. ``containerPortal`` is either the root object of
+    this item's project or the file reference of the other project.
 
-    def __init__(self, path):
+    """
+
+    property_converters = {
+        'containerPortal': ObjectReferencePropertyConverter
+    }
+
+    def is_local(self):
+        return self.data.get('containerPortal') == self.project.root_object_id
+
+    def remote_project(self):
+        """
+        Return the project that contains the remote object, or None if it is another
+        project that was not loaded by the workspace of this item's project.
+
+        """
+        if self.is_local():
+            return self.project
+        if self.project.workspace is None:
+            return None
+        return self.project.workspace.project_for_proxy_id(self.project, self.id)
+
+    def remote_object(self):
+        """Return the item this proxy refers to, or None if it cannot be found."""
+        project = self.remote_project()
+        object_id = self.data.get('remoteGlobalIDString')
+        if project is None or object_id not in project.object_data:
+            return None
+        return project.object_for_id(object_id)
+
+
+class PBXTargetDependency(ProjectItem):
+
+    property_converters = {
+        'target': ObjectReferencePropertyConverter,
+        'targetProxy': ObjectReferencePropertyConverter
+    }
+
+    def resolved_target(self):
+        """
+        Return the target this dependency refers to. Targets in other projects have
+        no ``target`` property and are found through the ``targetProxy``.
+
+        """
+        if self.data.get('target'):
+            return self.target
+        if self.data.get('targetProxy'):
+            return self.targetProxy.remote_object()
+        return None
+
+
+class PBXReferenceProxy(ProjectItem):
+    """A product of a target in another project, like a library that this project links against."""
+
+    property_converters = {
+        'remoteRef': ObjectReferencePropertyConverter
+    }
+
+    def remote_object(self):
+        """Return the product file reference in the other project, or None if it cannot be found."""
+        if not self.data.get('remoteRef'):
+            return None
+        return self.remoteRef.remote_object()
+
+
+class LazyItemMap(collections.Mapping):
+    """
+    A read-only mapping of object IDs to project items that creates
+    each item only when it is first looked up.
+
+    """
+
+    def __init__(self, project, object_ids):
+        self.project = project
+        self.object_ids = object_ids
+
+    def __getitem__(self, object_id):
+        if object_id not in self.object_ids:
+            raise KeyError(object_id)
+        return self.project.object_for_id(object_id)
+
+    def __contains__(self, object_id):
+        return object_id in self.object_ids
+
+    def __iter__(self):
+        return iter(self.object_ids)
+
+    def __len__(self):
+        return len(self.object_ids)
+
+
+class XcodeProject(object):
+    """
+    An Xcode project bundle.
+
+    :param str path: The path to the .xcodeproj bundle.
+    :param bool lazy: If true, project items are only created when they are first
+                      looked up through :py:meth:`object_for_id`, :py:meth:`targets`,
+                      :py:attr:`objects` or :py:attr:`class_name_to_item_map`.
+    :param cache: An optional :py:class:`xcodeproject.cache.ParseCache` used to
+                  skip parsing project files that have not changed since they
+                  were last parsed.
+    :param timings: An optional :py:class:`xcodeproject.timing.PhaseTimings` that
+                    records the time spent reading and parsing the file, creating
+                    items and resolving references.
+    :param intern_pool: An optional :py:class:`xcodeproject.interning.InternPool`
+                        to share strings with other projects loaded with the same pool.
+
+    In both modes, object references in item properties are only resolved
+    when the properties are first accessed.
+
+    """
+
+    # (kind, item class, property names) of the indexes behind lookup methods like target_for_name()
+    lookup_index_definitions = [
+        ('target', AbstractTarget, ('name', 'productName')),
+        ('file_reference', PBXFileReference, ('path', 'name', 'lastKnownFileType')),
+        ('build_configuration', XCBuildConfiguration, ('name',)),
+    ]
+
+    def __init__(self, path, lazy=False, cache=None, timings=None, intern_pool=None):
         path = os.path.abspath(os.path.expanduser(path))
         if not os.path.exists(os.path.join(path, 'project.pbxproj')):
             raise Exception('Not a valid project path: {}'.format(path))
         self.path = path
-        self.class_name_to_item_map = collections.defaultdict(dict)
+        self.lazy = lazy
+        self.cache = cache
+        self.timings = timings
+        self.intern_pool = intern_pool
+        # set by an XcodeWorkspace that loads this project, to resolve references to other projects
+        self.workspace = None
+        self.lookup_indexes = None
+        self.property_indexes = {}
+        self.reference_graph = None
+        self.group_tree = None
+        if lazy:
+            self.class_name_to_item_map = collections.defaultdict(lambda: LazyItemMap(self, set()))
+        else:
+            self.class_name_to_item_map = collections.defaultdict(dict)
         self.parse()
 
     @property    
@@ -212,69 +509,205 @@ class XcodeProject(object):
         return os.path.basename(self.path)
 
     def parse(self):
-        project_file_path = os.path.join(self.path, 'project.pbxproj')
-        xml_data = subprocess.check_output(['plutil', '-convert', 'xml1', '-o', '-', project_file_path])
-        data = plistlib.readPlistFromString(xml_data)
-        
-        object_id_to_line_number_map = self.object_id_line_number_map_for_path(project_file_path)
-
-        self.objects = {}
-        project_class_map = ProjectItem.subclass_map()
+        self.project_file = pbxproj.PBXProjFile(os.path.join(self.path, 'project.pbxproj'), cache=self.cache, timings=self.timings, intern_pool=self.intern_pool)
+        data = self.project_file.data
+        # checked once here instead of for every item
+        self.debug_logging = logging.getLogger().isEnabledFor(logging.DEBUG)
 
+        self.project_class_map = ProjectItem.subclass_map()
         self.root_object_id = data['rootObject']
+        self.object_data = data['objects']
+
+        if self.lazy:
+            self.materialized_objects = {}
+            self.objects = LazyItemMap(self, self.object_data)
+            for item_class_name, object_ids in self.project_file.class_name_to_object_ids_map.items():
+                self.class_name_to_item_map[item_class_name].object_ids.update(object_ids)
+            return
 
-        for object_id, object_data in data['objects'].items():
-            item_class_name = object_data['isa']
-            item_class = project_class_map.get(item_class_name, ProjectItem)
-            item = item_class(object_id, object_data)
-            item.line_number_start, item.line_number_end = object_id_to_line_number_map[object_id]
-            logging.debug('{}: {} {}'.format(object_id, item_class_name, item))
-            self.objects[object_id] = item
-            self.class_name_to_item_map[item_class_name][object_id] = item
-
-        for item in self.objects.values():
-            item.parse_data(self)
+        self.objects = {}
+        with timing.phase(self.timings, 'objects', len(self.object_data)):
+            for object_id, object_data in self.object_data.items():
+                item = self.create_item(object_id, object_data)
+                self.objects[object_id] = item
+                self.class_name_to_item_map[object_data['isa']][object_id] = item
+
+    def refresh(self):
+        """
+        Bring the project up to date with its project file if the file changed since
+        it was loaded, re-parsing only the objects whose source text changed.
+
+        Items of unchanged objects are kept as they are. Modified items are updated
+        in place, unless their class changed, and their references are resolved
+        again on next access. Items of removed objects are dropped.
+
+        :return: An :py:class:`xcodeproject.pbxproj.ObjectChanges` tuple with the IDs
+                 of added, removed and modified objects. It is false if nothing changed.
+
+        """
+        previous_file = self.project_file
+        if previous_file.is_current():
+            return pbxproj.ObjectChanges(set(), set(), set())
+
+        project_file = pbxproj.PBXProjFile(previous_file.path, cache=self.cache, previous=previous_file, timings=self.timings, intern_pool=self.intern_pool)
+        changes = project_file.object_changes
+        self.apply_object_changes(project_file, changes)
+        previous_file.close()
+        return changes
+
+    def apply_object_changes(self, project_file, changes):
+        previous_object_data = self.object_data
+        self.project_file = project_file
+        self.root_object_id = project_file.data['rootObject']
+        self.object_data = project_file.data['objects']
+        self.lookup_indexes = None
+        self.property_indexes = {}
+        self.reference_graph = None
+        self.group_tree = None
+
+        items = self.materialized_objects if self.lazy else self.objects
+        replaced_ids = set()
+        for object_id in changes.removed | changes.modified:
+            previous_item_class_name = previous_object_data[object_id]['isa']
+            item_class_name = self.object_data[object_id]['isa'] if object_id in self.object_data else None
+            if item_class_name == previous_item_class_name:
+                continue
+            replaced_ids.add(object_id)
+            items.pop(object_id, None)
+            if self.lazy:
+                self.class_name_to_item_map[previous_item_class_name].object_ids.discard(object_id)
+            else:
+                del self.class_name_to_item_map[previous_item_class_name][object_id]
+
+        for object_id in (changes.modified - replaced_ids):
+            item = items.get(object_id)
+            if item is not None:
+                item.data = self.object_data[object_id]
+                item.reset_resolved_references()
+
+        for object_id in changes.added | (replaced_ids - changes.removed):
+            item_class_name = self.object_data[object_id]['isa']
+            if self.lazy:
+                self.class_name_to_item_map[item_class_name].object_ids.add(object_id)
+            else:
+                item = self.create_item(object_id, self.object_data[object_id])
+                self.objects[object_id] = item
+                self.class_name_to_item_map[item_class_name][object_id] = item
+
+        if self.lazy:
+            self.objects.object_ids = self.object_data
+        if replaced_ids - changes.removed:
+            # references to removed objects go away with changes to the referring objects,
+            # but any item may hold a resolved reference to an item that was replaced
+            for item in items.values():
+                item.reset_resolved_references()
+
+        for object_id, item in items.items():
+            item.line_number_start, item.line_number_end = project_file.object_line_number_map[object_id]
+            item.byte_offset_start, item.byte_offset_end = project_file.object_span_map[object_id]
+
+    def create_item(self, object_id, object_data):
+        item_class_name = object_data['isa']
+        item_class = self.item_class_for_name(item_class_name)
+        item = item_class(object_id, object_data)
+        item.line_number_start, item.line_number_end = self.project_file.object_line_number_map[object_id]
+        item.byte_offset_start, item.byte_offset_end = self.project_file.object_span_map[object_id]
+        item.project = self
+        if self.debug_logging:
+            logging.debug('%s: %s %s', object_id, item_class_name, item)
+        return item
+
+    def item_class_for_name(self, item_class_name):
+        return self.project_class_map.get(item_class_name, ProjectItem)
     
     def object_id_line_number_map_for_path(self, path):
-        object_id_line_re = re.compile(r'(\s*)([A-F0-9]{24})\s*(?:/\*s*.*\s*\*/)?\s*=\s*{(.*)')
-        object_end_line_re = None
-        state = 'start'
-        current_object_start_line_number = None
-        current_object_id = None
-        object_id_to_line_number_map = {}
-        with open(path) as f:
-            for line_number, line in enumerate(f, start=1):
-                if state == 'start':
-                    match = object_id_line_re.match(line)
-                    if match:
-                        object_id = match.group(2)
-                        assert object_id not in object_id_to_line_number_map, 'Object ID {} seen on line {} and {}'.format(object_id, object_id_to_line_number_map[object_id], line_number)
-                        if '}' in match.group(3):
-                            # one-line object
-                            object_id_to_line_number_map[object_id] = [line_number, line_number]
-                        else:
-                            # multi-line object
-                            current_object_start_line_number = line_number
-                            current_object_id = object_id
-                            object_end_line_re = re.compile(match.group(1) + '}')
-                            state = 'reading_object'
-                if state == 'reading_object':
-                    match = object_end_line_re.match(line)
-                    if match:
-                        object_id_to_line_number_map[current_object_id] = [current_object_start_line_number, line_number]
-                        state = 'start'
-        return object_id_to_line_number_map
+        project_file = pbxproj.PBXProjFile(path)
+        project_file.close()
+        return project_file.object_line_number_map
 
+    def close(self):
+        """Release the memory mapping of the project file. Raw object source is unavailable afterwards."""
+        self.project_file.close()
 
     def targets(self):
-        return [i for i in self.objects.values() if isinstance(i, AbstractTarget)]
+        targets = []
+        for item_class_name, item_map in self.class_name_to_item_map.items():
+            if issubclass(self.item_class_for_name(item_class_name), AbstractTarget):
+                targets.extend(item_map.values())
+        return targets
     
     def target_for_name(self, target_name):
-        for target in self.targets():
-            if target.name == target_name:
-                return target
-        return None
+        targets = self.items_for_index_value('target', 'name', target_name)
+        return targets[0] if targets else None
+
+    def targets_for_product_name(self, product_name):
+        return self.items_for_index_value('target', 'productName', product_name)
+
+    def file_references_for_path(self, path):
+        return self.items_for_index_value('file_reference', 'path', path)
+
+    def file_references_for_name(self, name):
+        return self.items_for_index_value('file_reference', 'name', name)
+
+    def file_references_for_file_type(self, file_type):
+        return self.items_for_index_value('file_reference', 'lastKnownFileType', file_type)
+
+    def build_configurations_for_name(self, name):
+        return self.items_for_index_value('build_configuration', 'name', name)
+
+    def items_for_index_value(self, kind, property_name, value):
+        """
+        Return the items of the given kind (see :py:attr:`lookup_index_definitions`)
+        whose given property has the given value.
+
+        """
+        if self.lookup_indexes is None:
+            self.lookup_indexes = self.build_lookup_indexes()
+        return [self.object_for_id(object_id) for object_id in self.lookup_indexes[kind, property_name].get(value, [])]
+
+    def build_lookup_indexes(self):
+        """
+        Build all lookup indexes in one pass over the raw data of the objects of the
+        indexed classes, without creating any items.
+
+        """
+        indexes = {}
+        kinds_for_class_name = collections.defaultdict(list)
+        for kind, item_class, property_names in self.lookup_index_definitions:
+            for property_name in property_names:
+                indexes[kind, property_name] = {}
+            for item_class_name in self.project_file.class_name_to_object_ids_map:
+                if issubclass(self.item_class_for_name(item_class_name), item_class):
+                    kinds_for_class_name[item_class_name].append((kind, property_names))
+
+        for item_class_name, kinds in kinds_for_class_name.items():
+            for object_id in sorted(self.project_file.class_name_to_object_ids_map[item_class_name]):
+                object_data = self.object_data[object_id]
+                for kind, property_names in kinds:
+                    for property_name in property_names:
+                        value = object_data.get(property_name)
+                        if value is not None:
+                            indexes[kind, property_name].setdefault(value, []).append(object_id)
+        return indexes
     
+    def object_ids_for_property_value(self, class_name, property_name, value):
+        """
+        Return the IDs of the objects of the given class whose given property has the
+        given value, or contains it if the property is a list. The index for each class
+        and property is built from the raw object data the first time it is needed.
+
+        """
+        key = class_name, property_name
+        index = self.property_indexes.get(key)
+        if index is None:
+            index = self.property_indexes[key] = {}
+            for object_id in sorted(self.project_file.class_name_to_object_ids_map.get(class_name, ())):
+                property_value = self.object_data[object_id].get(property_name)
+                for element in property_value if isinstance(property_value, list) else [property_value]:
+                    if isinstance(element, basestring):
+                        index.setdefault(element, []).append(object_id)
+        return index.get(value, [])
+
     def build_file_map(self):
         return self.class_name_to_item_map['PBXBuildFile']
 
@@ -297,11 +730,166 @@ class XcodeProject(object):
         groups.update(self.version_group_map())
         return groups
 
+    def source_root(self):
+        """Return the absolute path of the directory that ``SOURCE_ROOT`` paths are relative to."""
+        return os.path.normpath(os.path.join(os.path.dirname(self.path), self.object_data[self.root_object_id].get('projectDirPath', '')))
+
+    def parent_group_id_map(self):
+        """Return a map from the ID of each group and file reference in the group tree to the ID of its parent group."""
+        return self.group_tree_maps()[0]
+
+    def resolved_path_map(self):
+        """
+        Return a map from the ID of each group and file reference in the group tree
+        to its resolved path.
+
+        Paths of items whose ``sourceTree`` is ``<group>`` are relative to their parent
+        group's, up to the project's source root for the main group. ``SOURCE_ROOT`` and
+        ``<absolute>`` paths are relative to the source root and absolute, respectively.
+        These all resolve to absolute paths. Paths relative to any other source tree,
+        like ``BUILT_PRODUCTS_DIR`` or ``SDKROOT``, and items in groups with such paths
+        resolve to a path that starts with a build setting reference like
+        ``$(BUILT_PRODUCTS_DIR)/``.
+
+        """
+        return self.group_tree_maps()[1]
+
+    def parent_group_for_id(self, object_id):
+        parent_id = self.parent_group_id_map().get(object_id)
+        return self.object_for_id(parent_id) if parent_id else None
+
+    def resolved_path_for_id(self, object_id):
+        """Return the resolved path of the group or file reference with the given ID, or None if it is not in the group tree."""
+        return self.resolved_path_map().get(object_id)
+
+    def group_tree_maps(self):
+        """
+        Return a ``(parent_ids, resolved_paths)`` tuple of the maps behind
+        :py:meth:`parent_group_id_map` and :py:meth:`resolved_path_map`. Both are built
+        together in a single walk of the raw object data from the main group the first
+        time they are needed.
+
+        """
+        if self.group_tree is None:
+            object_data = self.object_data
+            source_root = self.source_root()
+            main_group_id = object_data[self.root_object_id].get('mainGroup')
+            parent_ids = {}
+            resolved_paths = {}
+            pending_ids = [main_group_id] if main_group_id in object_data else []
+            while pending_ids:
+                object_id = pending_ids.pop()
+                data = object_data[object_id]
+                parent_id = parent_ids.get(object_id)
+                resolved_paths[object_id] = self.resolved_path_for_data(data, resolved_paths[parent_id] if parent_id else source_root, source_root)
+                for child_id in data.get('children', ()):
+                    if child_id in object_data and child_id not in resolved_paths and child_id not in parent_ids and child_id != main_group_id:
+                        parent_ids[child_id] = object_id
+                        pending_ids.append(child_id)
+            self.group_tree = parent_ids, resolved_paths
+        return self.group_tree
+
+    @classmethod
+    def resolved_path_for_data(cls, data, parent_path, source_root):
+        path = data.get('path', '')
+        source_tree = data.get('sourceTree', '<group>')
+        if source_tree == '<group>':
+            if parent_path is None:
+                return None
+            base_path = parent_path
+        elif source_tree == 'SOURCE_ROOT':
+            base_path = source_root
+        elif source_tree == '<absolute>':
+            base_path = '/'
+        else:
+            base_path = '$({})'.format(source_tree)
+        if not path:
+            return base_path
+        return os.path.normpath(os.path.join(base_path, path))
+
+    def referrers_of(self, item):
+        """Return the items whose properties refer to the given item or object ID."""
+        object_id = getattr(item, 'id', item)
+        return [self.object_for_id(referrer_id) for referrer_id in sorted(self.reference_graph_edges()[1].get(object_id, ()))]
+
+    def referenced_object_ids(self, item):
+        """Return the set of IDs of the objects that the given item or object ID refers to."""
+        object_id = getattr(item, 'id', item)
+        return self.reference_graph_edges()[0].get(object_id, frozenset())
+
+    def reference_graph_edges(self):
+        """
+        Return a ``(references, referrers)`` tuple of maps from object IDs to the sets of
+        object IDs the object refers to and is referred to by, respectively. Both are built
+        together in a single pass over the raw object data the first time they are needed.
+
+        Any string in an object's properties, at any nesting depth and including
+        dictionary keys such as those in ``TargetAttributes``, that is the ID of an object
+        in the project counts as a reference.
+
+        """
+        if self.reference_graph is None:
+            references = {}
+            referrers = collections.defaultdict(set)
+            object_data = self.object_data
+            for object_id, data in object_data.items():
+                referenced_ids = set()
+                pending_values = data.values()
+                while pending_values:
+                    value = pending_values.pop()
+                    if isinstance(value, basestring):
+                        if value in object_data:
+                            referenced_ids.add(value)
+                    elif isinstance(value, list):
+                        pending_values.extend(value)
+                    elif isinstance(value, dict):
+                        pending_values.extend(value.keys())
+                        pending_values.extend(value.values())
+                referenced_ids.discard(object_id)
+                references[object_id] = referenced_ids
+                for referenced_id in referenced_ids:
+                    referrers[referenced_id].add(object_id)
+            self.reference_graph = references, dict(referrers)
+        return self.reference_graph
+
+    def reachable_object_ids(self):
+        """Return the set of IDs of all objects reachable from the root object."""
+        references = self.reference_graph_edges()[0]
+        reachable_ids = set([self.root_object_id])
+        pending_ids = [self.root_object_id]
+        while pending_ids:
+            for referenced_id in references.get(pending_ids.pop(), ()):
+                if referenced_id not in reachable_ids:
+                    reachable_ids.add(referenced_id)
+                    pending_ids.append(referenced_id)
+        return reachable_ids
+
+    def unreachable_objects(self):
+        """Return all items, of any class, that cannot be reached from the root object, sorted by ID."""
+        reachable_ids = self.reachable_object_ids()
+        return [self.object_for_id(object_id) for object_id in sorted(self.object_data) if object_id not in reachable_ids]
+
     def object_for_id(self, object_id):
+        if self.lazy:
+            item = self.materialized_objects.get(object_id)
+            if item is None:
+                item = self.materialize_item(object_id)
+            return item
         if object_id not in self.objects:
             raise Exception('Invalid object reference {} in {}'.format(object_id, self.path))
         return self.objects[object_id]
 
+    def materialize_item(self, object_id):
+        if object_id not in self.object_data:
+            raise Exception('Invalid object reference {} in {}'.format(object_id, self.path))
+        if self.timings is None:
+            item = self.create_item(object_id, self.object_data[object_id])
+        else:
+            with self.timings.phase('objects', 1):
+                item = self.create_item(object_id, self.object_data[object_id])
+        self.materialized_objects[object_id] = item
+        return item
+
     def main_group_id(self):
         return self.root_object().mainGroup
 